@@ -1,9 +1,23 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
 
+from metas import DEPARTAMENTOS, STATUS
+from metas.banco import INTERVALO_SNAPSHOT_PADRAO as INTERVALO_SNAPSHOT
+from metas.agendador import INTERVALO_PADRAO as INTERVALO_ATRASO, AgendadorAtrasos
+from metas.diagnostico import ALERTA_ATRASADA, ALERTAS_CRITICOS, AVALIACOES, RECOMENDACOES, diagnosticar
+from metas.exportacao import FORMATOS as FORMATOS_EXPORTACAO, exportar_para_temporario
+from metas.fila_escrita import GestorComFila
+from metas.historico import FREQUENCIAS as FREQUENCIAS_HISTORICO, tendencia_departamentos
+from metas.importacao import COLUNAS_IMPORTACAO, importar_metas
+from metas.metricas import METRICAS_PATH_PADRAO, medir_view, registrar_estado
+from metas.questionario import (
+    AREAS_MELHORIA, OBSTACULOS, QUESTOES_INDIVIDUAIS, QUESTOES_ORGANIZACIONAIS, TOTAL_PONTOS,
+    codificar_questionario, codificar_respostas, codificar_selecao, pontos_questionario,
+    problemas_das_respostas, problemas_identificados,
+)
+
 # Configuração da página
 st.set_page_config(
     page_title="Sistema de Gestão de Metas",
@@ -79,893 +93,927 @@ st.markdown("""
 # Título com emoji de onda
 st.title("🌊 Sistema de Gestão de Metas")
 
-class GestorMetas:
-    def __init__(self):
-        self.init_database()
+TAMANHOS_PAGINA = [25, 50, 100, 200]
 
-    def init_database(self):
-        """Inicializa o banco de dados SQLite."""
-        conn = sqlite3.connect('metas.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_name TEXT NOT NULL,
-                department TEXT NOT NULL,
-                goal_description TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                status TEXT NOT NULL,
-                progress INTEGER NOT NULL,
-                completion_date TEXT,
-                diagnosis TEXT,
-                suggestions TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+@st.cache_resource
+def get_gestor():
+    """Retorna o gestor compartilhado por todas as sessões do processo.
 
-    def add_meta(self, employee_name, department, goal_description, start_date, end_date, status, progress):
-        """Adiciona uma nova meta ao banco de dados."""
-        conn = sqlite3.connect('metas.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO metas (employee_name, department, goal_description, start_date, end_date, status, progress)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (employee_name, department, goal_description, start_date, end_date, status, progress))
-        
-        conn.commit()
-        conn.close()
-        return True
-
-    def get_all_metas(self):
-        """Retorna todas as metas do banco de dados."""
-        conn = sqlite3.connect('metas.db')
-        df = pd.read_sql_query('SELECT * FROM metas', conn)
-        conn.close()
-        return df
-
-    def update_meta(self, meta_id, **kwargs):
-        """Atualiza uma meta específica."""
-        conn = sqlite3.connect('metas.db')
-        cursor = conn.cursor()
-        
-        set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-        values = list(kwargs.values()) + [meta_id]
-        
-        cursor.execute(f'''
-            UPDATE metas SET {set_clause} WHERE id = ?
-        ''', values)
-        
-        conn.commit()
-        conn.close()
-        return True
-
-    def delete_meta(self, meta_id):
-        """Remove uma meta do banco de dados."""
-        conn = sqlite3.connect('metas.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM metas WHERE id = ?', (meta_id,))
-        
-        conn.commit()
-        conn.close()
-        return True
-
-    def get_meta_by_id(self, meta_id):
-        """Retorna uma meta específica pelo ID."""
-        conn = sqlite3.connect('metas.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM metas WHERE id = ?', (meta_id,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        return result
+    As inclusões e atualizações das sessões passam por uma fila de escrita
+    e são confirmadas em grupo.
+    """
+    return GestorComFila()
 
-def main():
-    gestor = GestorMetas()
-    
-    # Tabs horizontais com cores personalizadas
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📝 Adicionar Meta",
-        "📊 Visualizar Metas",
-        "🔄 Atualizar Meta",
-        "🔍 Diagnóstico",
-        "📈 Relatórios"
-    ])
-
-    with tab1:
-        st.subheader("Adicionar Nova Meta")
-        with st.form("nova_meta"):
-            col1, col2 = st.columns(2)
-            with col1:
-                employee_name = st.text_input("Nome do Funcionário")
-                department = st.selectbox(
-                    "Área/Departamento",
-                    ["Vendas", "Marketing", "RH", "Financeiro", "TI", 
-                     "Operações", "Administrativo", "Produção", "Logística"]
-                )
-                goal_description = st.text_area("Descrição da Meta")
-            
-            with col2:
-                start_date = st.date_input("Data Início")
-                end_date = st.date_input("Data Fim")
-                status = st.selectbox(
-                    "Status",
-                    ["Em Andamento", "Concluída", "Não Concluída", "Atrasada"]
-                )
-                progress = st.slider("Progresso (%)", 0, 100, 0)
-
-            submitted = st.form_submit_button("Adicionar Meta")
-            if submitted:
-                if employee_name and department and goal_description:
-                    try:
-                        gestor.add_meta(
-                            employee_name=employee_name,
-                            department=department,
-                            goal_description=goal_description,
-                            start_date=str(start_date),
-                            end_date=str(end_date),
-                            status=status,
-                            progress=progress
-                        )
-                        st.success("Meta adicionada com sucesso!")
-                    except Exception as e:
-                        st.error(f"Erro ao adicionar meta: {e}")
-                else:
-                    st.error("Por favor, preencha todos os campos obrigatórios.")
+@st.cache_resource
+def get_gestor_relatorios():
+    """Gestor de leitura dos relatórios: um snapshot do banco renovado periodicamente."""
+    gestor = get_gestor()
+    return gestor.leitura(INTERVALO_SNAPSHOT) if INTERVALO_SNAPSHOT > 0 else gestor
 
-    with tab2:
-        st.subheader("Visualizar Metas")
-        
-        # Filtros
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            filter_department = st.selectbox(
-                "Filtrar por Departamento",
-                ["Todos", "Vendas", "Marketing", "RH", "Financeiro", "TI", 
-                 "Operações", "Administrativo", "Produção", "Logística"]
-            )
-        with col2:
-            filter_status = st.selectbox(
-                "Filtrar por Status",
-                ["Todos", "Em Andamento", "Concluída", "Não Concluída", "Atrasada"]
-            )
-        with col3:
-            st.write("")  # Espaçamento
-        
+def aviso_snapshot(gestor):
+    """Mostra a idade do snapshot de leitura e permite renová-lo."""
+    if not hasattr(gestor.pool, "idade"):
+        return
+    col_idade, col_atualizar = st.columns([4, 1])
+    with col_idade:
+        st.caption(
+            f"📸 Dados de {gestor.pool.idade():.0f}s atrás; "
+            f"os relatórios são atualizados a cada {INTERVALO_SNAPSHOT}s."
+        )
+    with col_atualizar:
+        st.button("🔄 Atualizar dados", on_click=gestor.pool.atualizar, key="atualizar_snapshot")
+
+@st.cache_resource
+def get_agendador():
+    """Marcação periódica de metas atrasadas, iniciada uma vez por processo."""
+    return AgendadorAtrasos(get_gestor(), INTERVALO_ATRASO).iniciar()
+
+def colunas_percentis(gestor, dimensao, incluir_arquivo=False):
+    """Percentis de progresso da dimensão, com os rótulos das colunas dos relatórios."""
+    percentis = gestor.analitico.percentis_progresso(dimensao, incluir_arquivo)
+    percentis = percentis[['p25', 'p50', 'p75', 'p90']].round(1)
+    percentis.columns = ['Progresso P25', 'Progresso Mediana', 'Progresso P75', 'Progresso P90']
+    return percentis
+
+def pergunta_organizacional(chave):
+    """Pergunta de escolha única do questionário organizacional."""
+    pergunta, opcoes, _pontuam = QUESTOES_ORGANIZACIONAIS[chave]
+    return st.radio(pergunta, opcoes)
+
+def seletor_meta(gestor, label, key, limite=20):
+    """Campo de busca com as metas mais relevantes; retorna o ID escolhido."""
+    termo = st.text_input("Buscar meta (funcionário, descrição ou ID)", key=f"busca_{key}")
+    resultados = gestor.buscar_metas(termo, limite)
+    if not resultados:
+        st.info("Nenhuma meta encontrada para a busca.")
+        return None
+    rotulos = {r['id']: f"ID {r['id']} - {r['employee_name']} - {r['resumo'][:50]}..." for r in resultados}
+    return st.selectbox(label, list(rotulos), format_func=rotulos.get, key=f"meta_{key}")
+
+@st.fragment
+@medir_view("importacao_em_lote")
+def importacao_em_lote(gestor):
+    """Envio de arquivo para importação em lote; reexecuta só esta seção."""
+    st.caption("Colunas obrigatórias: " + ", ".join(COLUNAS_IMPORTACAO))
+    arquivo_importacao = st.file_uploader("Arquivo CSV ou Parquet", type=["csv", "parquet"])
+    if arquivo_importacao is not None and st.button("📤 Importar Metas"):
         try:
-            df = gestor.get_all_metas()
-            
-            if not df.empty:
-                # Aplicar filtros
-                if filter_department != "Todos":
-                    df = df[df['department'] == filter_department]
-                if filter_status != "Todos":
-                    df = df[df['status'] == filter_status]
-                
-                # Exibir dataframe
+            resultado = importar_metas(gestor, arquivo_importacao)
+            st.success(
+                f"{resultado['inseridas']} metas importadas em {resultado['segundos']:.1f}s "
+                f"({resultado['linhas_por_segundo']:.0f} linhas/s)."
+            )
+            if resultado['rejeitadas']:
+                st.warning(f"{resultado['rejeitadas']} linhas rejeitadas.")
                 st.dataframe(
-                    df,
-                    use_container_width=True,
+                    pd.DataFrame(resultado['erros'], columns=["Linha", "Motivo"]),
                     hide_index=True
                 )
-                
-                # Estatísticas
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total de Metas", len(df))
-                with col2:
-                    concluidas = len(df[df['status'] == 'Concluída'])
-                    st.metric("Concluídas", concluidas)
-                with col3:
-                    em_andamento = len(df[df['status'] == 'Em Andamento'])
-                    st.metric("Em Andamento", em_andamento)
-                with col4:
-                    progresso_medio = df['progress'].mean() if not df.empty else 0
-                    st.metric("Progresso Médio", f"{progresso_medio:.1f}%")
-            else:
-                st.info("Nenhuma meta encontrada. Adicione uma meta na aba 'Adicionar Meta'.")
-                
         except Exception as e:
-            st.error(f"Erro ao carregar metas: {e}")
+            st.error(f"Erro ao importar metas: {e}")
 
-    with tab3:
-        st.subheader("Atualizar Meta")
+@medir_view("adicionar")
+def pagina_adicionar():
+    gestor = get_gestor()
+    st.subheader("Adicionar Nova Meta")
+    with st.form("nova_meta"):
+        col1, col2 = st.columns(2)
+        with col1:
+            employee_name = st.text_input("Nome do Funcionário")
+            department = st.selectbox("Área/Departamento", DEPARTAMENTOS)
+            goal_description = st.text_area("Descrição da Meta")
         
-        try:
-            df = gestor.get_all_metas()
-            
-            if not df.empty:
-                # Seleção da meta
-                meta_options = [f"ID {row['id']} - {row['employee_name']} - {row['goal_description'][:50]}..." 
-                               for _, row in df.iterrows()]
-                selected_meta = st.selectbox("Selecione a meta para atualizar:", meta_options)
-                
-                if selected_meta:
-                    meta_id = int(selected_meta.split(" ")[1])
-                    meta_data = df[df['id'] == meta_id].iloc[0]
-                    
-                    with st.form("atualizar_meta"):
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            new_employee_name = st.text_input("Nome do Funcionário", value=meta_data['employee_name'])
-                            new_department = st.selectbox(
-                                "Área/Departamento",
-                                ["Vendas", "Marketing", "RH", "Financeiro", "TI", 
-                                 "Operações", "Administrativo", "Produção", "Logística"],
-                                index=["Vendas", "Marketing", "RH", "Financeiro", "TI", 
-                                       "Operações", "Administrativo", "Produção", "Logística"].index(meta_data['department'])
-                            )
-                            new_goal_description = st.text_area("Descrição da Meta", value=meta_data['goal_description'])
-                        
-                        with col2:
-                            new_start_date = st.date_input("Data Início", value=pd.to_datetime(meta_data['start_date']).date())
-                            new_end_date = st.date_input("Data Fim", value=pd.to_datetime(meta_data['end_date']).date())
-                            new_status = st.selectbox(
-                                "Status",
-                                ["Em Andamento", "Concluída", "Não Concluída", "Atrasada"],
-                                index=["Em Andamento", "Concluída", "Não Concluída", "Atrasada"].index(meta_data['status'])
-                            )
-                            new_progress = st.slider("Progresso (%)", 0, 100, int(meta_data['progress']))
-                        
-                        col_update, col_delete = st.columns(2)
-                        with col_update:
-                            update_submitted = st.form_submit_button("Atualizar Meta", type="primary")
-                        with col_delete:
-                            delete_submitted = st.form_submit_button("Excluir Meta", type="secondary")
-                        
-                        if update_submitted:
-                            try:
-                                gestor.update_meta(
-                                    meta_id,
-                                    employee_name=new_employee_name,
-                                    department=new_department,
-                                    goal_description=new_goal_description,
-                                    start_date=str(new_start_date),
-                                    end_date=str(new_end_date),
-                                    status=new_status,
-                                    progress=new_progress
-                                )
-                                st.success("Meta atualizada com sucesso!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Erro ao atualizar meta: {e}")
-                        
-                        if delete_submitted:
-                            try:
-                                gestor.delete_meta(meta_id)
-                                st.success("Meta excluída com sucesso!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Erro ao excluir meta: {e}")
+        with col2:
+            start_date = st.date_input("Data Início")
+            end_date = st.date_input("Data Fim")
+            status = st.selectbox("Status", STATUS)
+            progress = st.slider("Progresso (%)", 0, 100, 0)
+
+        submitted = st.form_submit_button("Adicionar Meta")
+        if submitted:
+            if employee_name and department and goal_description:
+                try:
+                    gestor.add_meta(
+                        employee_name=employee_name,
+                        department=department,
+                        goal_description=goal_description,
+                        start_date=str(start_date),
+                        end_date=str(end_date),
+                        status=status,
+                        progress=progress
+                    )
+                    st.success("Meta adicionada com sucesso!")
+                except Exception as e:
+                    st.error(f"Erro ao adicionar meta: {e}")
             else:
-                st.info("Nenhuma meta encontrada para atualizar.")
-                
-        except Exception as e:
-            st.error(f"Erro ao carregar metas: {e}")
+                st.error("Por favor, preencha todos os campos obrigatórios.")
 
-    with tab4:
-        st.subheader("Diagnóstico de Metas")
-        
-        # Seleção do tipo de diagnóstico
-        diagnostic_type = st.selectbox(
-            "Tipo de Diagnóstico:",
-            ["Análise Geral", "Diagnóstico Interativo", "Análise Individual de Meta"]
+    st.markdown("---")
+    st.markdown("#### 📦 Importação em Lote")
+    importacao_em_lote(gestor)
+
+@st.fragment
+@medir_view("tabela_metas")
+def tabela_metas(gestor, filtros, total):
+    """Página da tabela de metas com seleção de linha; a paginação reexecuta só esta seção."""
+    page_size = st.selectbox("Metas por página", TAMANHOS_PAGINA, index=1)
+
+    # Cursores da paginação por chave; reiniciados quando filtros mudam
+    assinatura = (tuple(filtros.items()), page_size)
+    if st.session_state.get("pagina_assinatura") != assinatura:
+        st.session_state.pagina_assinatura = assinatura
+        st.session_state.pagina_cursores = [0]
+    cursores = st.session_state.pagina_cursores
+
+    df, tem_proxima = gestor.pagina_metas(cursores[-1], page_size, **filtros)
+
+    # Exibir página atual; textos longos só são carregados ao selecionar uma linha
+    evento = st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"tabela_metas_{cursores[-1]}"
+    )
+
+    # Os cursores mudam nos callbacks, antes da reexecução do fragmento
+    col_ant, col_pag, col_prox = st.columns([1, 2, 1])
+    with col_ant:
+        st.button("◀ Anterior", disabled=len(cursores) == 1, on_click=cursores.pop)
+    with col_pag:
+        total_paginas = -(-total // page_size)
+        st.write(f"Página {len(cursores)} de {total_paginas}")
+    with col_prox:
+        st.button("Próxima ▶", disabled=not tem_proxima,
+                  on_click=cursores.append, args=(int(df['id'].iloc[-1]),))
+
+    linhas = evento.selection.rows
+    if linhas:
+        meta_id = int(df['id'].iloc[linhas[0]])
+        detalhes = gestor.get_meta_detalhes(meta_id)
+        if detalhes:
+            with st.expander(f"Detalhes da meta ID {meta_id}", expanded=True):
+                st.write(f"**Descrição:** {detalhes['goal_description']}")
+                if detalhes['diagnosis']:
+                    st.text(detalhes['diagnosis'])
+                if detalhes['suggestions']:
+                    st.text(detalhes['suggestions'])
+
+@medir_view("visualizar")
+def pagina_visualizar():
+    gestor = get_gestor()
+    st.subheader("Visualizar Metas")
+    
+    # Filtros
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filter_department = st.selectbox(
+            "Filtrar por Departamento",
+            ["Todos"] + DEPARTAMENTOS
         )
+    with col2:
+        filter_status = st.selectbox(
+            "Filtrar por Status",
+            ["Todos"] + STATUS
+        )
+    with col3:
+        filter_employee = st.text_input("Filtrar por Funcionário")
+    
+    # Filtros aplicados diretamente no SQL
+    filtros = {
+        "department": None if filter_department == "Todos" else filter_department,
+        "status": None if filter_status == "Todos" else filter_status,
+        "employee": filter_employee.strip() or None,
+    }
+    
+    try:
+        resumo = gestor.resumo_metas(**filtros)
         
-        try:
-            df = gestor.get_all_metas()
+        if resumo["total"] > 0:
+            tabela_metas(gestor, filtros, resumo["total"])
+
+            # Estatísticas
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total de Metas", resumo["total"])
+            with col2:
+                st.metric("Concluídas", resumo["concluidas"])
+            with col3:
+                st.metric("Em Andamento", resumo["em_andamento"])
+            with col4:
+                st.metric("Progresso Médio", f"{resumo['progresso_medio']:.1f}%")
+        elif any(filtros.values()):
+            st.info("Nenhuma meta encontrada com os filtros selecionados.")
+        else:
+            st.info("Nenhuma meta encontrada. Adicione uma meta na página 'Adicionar Meta'.")
             
-            if not df.empty:
-                if diagnostic_type == "Análise Geral":
-                    # Análise geral (código existente)
-                    st.markdown("### 📊 Análise Geral")
-                    
-                    col1, col2, col3 = st.columns(3)
+    except Exception as e:
+        st.error(f"Erro ao carregar metas: {e}")
+
+@medir_view("atualizar")
+def pagina_atualizar():
+    gestor = get_gestor()
+    st.subheader("Atualizar Meta")
+    
+    try:
+        if gestor.resumo_metas()["total"] > 0:
+            # Seleção da meta
+            meta_id = seletor_meta(gestor, "Selecione a meta para atualizar:", "atualizar")
+            
+            if meta_id is not None:
+                meta_data = gestor.get_meta(meta_id)
+                
+                with st.form("atualizar_meta"):
+                    col1, col2 = st.columns(2)
                     
                     with col1:
-                        # Distribuição por status
-                        status_counts = df['status'].value_counts()
-                        st.markdown("**Distribuição por Status:**")
-                        for status, count in status_counts.items():
-                            percentage = (count / len(df)) * 100
-                            st.write(f"• {status}: {count} ({percentage:.1f}%)")
+                        new_employee_name = st.text_input("Nome do Funcionário", value=meta_data['employee_name'])
+                        new_department = st.selectbox(
+                            "Área/Departamento",
+                            DEPARTAMENTOS,
+                            index=DEPARTAMENTOS.index(meta_data['department'])
+                        )
+                        new_goal_description = st.text_area("Descrição da Meta", value=meta_data['goal_description'])
                     
                     with col2:
-                        # Distribuição por departamento
-                        dept_counts = df['department'].value_counts()
-                        st.markdown("**Distribuição por Departamento:**")
-                        for dept, count in dept_counts.items():
-                            percentage = (count / len(df)) * 100
-                            st.write(f"• {dept}: {count} ({percentage:.1f}%)")
-                    
-                    with col3:
-                        # Estatísticas de progresso
-                        avg_progress = df['progress'].mean()
-                        min_progress = df['progress'].min()
-                        max_progress = df['progress'].max()
-                        
-                        st.markdown("**Estatísticas de Progresso:**")
-                        st.write(f"• Média: {avg_progress:.1f}%")
-                        st.write(f"• Mínimo: {min_progress}%")
-                        st.write(f"• Máximo: {max_progress}%")
-                    
-                    st.markdown("---")
-                    
-                    # Metas críticas
-                    st.markdown("### ⚠️ Metas que Precisam de Atenção")
-                    
-                    metas_criticas = df[
-                        (df['status'].isin(['Em Andamento', 'Atrasada'])) & 
-                        (df['progress'] < 50)
-                    ]
-                    
-                    if not metas_criticas.empty:
-                        for _, meta in metas_criticas.iterrows():
-                            with st.expander(f"🔴 {meta['employee_name']} - {meta['goal_description'][:50]}..."):
-                                col1, col2 = st.columns(2)
-                                with col1:
-                                    st.write(f"**Funcionário:** {meta['employee_name']}")
-                                    st.write(f"**Departamento:** {meta['department']}")
-                                    st.write(f"**Status:** {meta['status']}")
-                                with col2:
-                                    st.write(f"**Progresso:** {meta['progress']}%")
-                                    st.write(f"**Data Início:** {meta['start_date']}")
-                                    st.write(f"**Data Fim:** {meta['end_date']}")
-                                
-                                # Diagnóstico automático
-                                if meta['progress'] < 25:
-                                    st.warning("🚨 **Diagnóstico:** Meta com progresso muito baixo. Recomenda-se revisão urgente.")
-                                elif meta['progress'] < 50:
-                                    st.info("⚡ **Diagnóstico:** Meta precisando de aceleração para atingir objetivo.")
-                    else:
-                        st.success("✅ Todas as metas estão com progresso satisfatório!")
-                    
-                    # Metas de destaque
-                    st.markdown("### 🌟 Metas de Destaque")
-                    metas_destaque = df[df['progress'] >= 80]
+                        new_start_date = st.date_input("Data Início", value=pd.to_datetime(meta_data['start_date']).date())
+                        new_end_date = st.date_input("Data Fim", value=pd.to_datetime(meta_data['end_date']).date())
+                        new_status = st.selectbox(
+                            "Status",
+                            STATUS,
+                            index=STATUS.index(meta_data['status'])
+                        )
+                        new_progress = st.slider("Progresso (%)", 0, 100, int(meta_data['progress']))
                     
-                    if not metas_destaque.empty:
-                        for _, meta in metas_destaque.iterrows():
-                            st.success(f"🎯 {meta['employee_name']} - {meta['goal_description'][:50]}... ({meta['progress']}%)")
-                    else:
-                        st.info("Nenhuma meta com progresso acima de 80% encontrada.")
-
-                elif diagnostic_type == "Diagnóstico Interativo":
-                    st.markdown("### 🔍 Diagnóstico Interativo")
-                    st.markdown("Responda às perguntas abaixo para obter um diagnóstico personalizado das metas:")
+                    col_update, col_delete = st.columns(2)
+                    with col_update:
+                        update_submitted = st.form_submit_button("Atualizar Meta", type="primary")
+                    with col_delete:
+                        delete_submitted = st.form_submit_button("Excluir Meta", type="secondary")
                     
-                    with st.form("diagnostic_form"):
-                        st.markdown("#### 1. Contexto Organizacional")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            recursos_adequados = st.radio(
-                                "Os funcionários têm recursos adequados para atingir suas metas?",
-                                ["Sim, completamente", "Parcialmente", "Não, faltam recursos", "Não sei avaliar"]
-                            )
-                            
-                            comunicacao_clara = st.radio(
-                                "As metas foram comunicadas de forma clara?",
-                                ["Sim, muito clara", "Razoavelmente clara", "Pouco clara", "Confusa"]
-                            )
-                            
-                            prazo_realista = st.radio(
-                                "Os prazos estabelecidos são realistas?",
-                                ["Sim, adequados", "Um pouco apertados", "Muito apertados", "Impossíveis"]
-                            )
-                        
-                        with col2:
-                            apoio_gestao = st.radio(
-                                "Há apoio suficiente da gestão?",
-                                ["Sim, total apoio", "Apoio moderado", "Pouco apoio", "Sem apoio"]
-                            )
-                            
-                            treinamento = st.radio(
-                                "Os funcionários receberam treinamento adequado?",
-                                ["Sim, completo", "Parcial", "Mínimo", "Nenhum"]
-                            )
-                            
-                            motivacao_equipe = st.radio(
-                                "Como está a motivação da equipe?",
-                                ["Muito alta", "Alta", "Média", "Baixa", "Muito baixa"]
-                            )
-                        
-                        st.markdown("#### 2. Obstáculos e Desafios")
-                        
-                        col3, col4 = st.columns(2)
-                        with col3:
-                            principais_obstaculos = st.multiselect(
-                                "Quais são os principais obstáculos?",
-                                ["Falta de tempo", "Recursos insuficientes", "Falta de conhecimento técnico", 
-                                 "Problemas de comunicação", "Mudanças de prioridades", "Sobrecarga de trabalho",
-                                 "Falta de apoio da gestão", "Problemas externos", "Outros"]
-                            )
-                            
-                            frequencia_revisao = st.radio(
-                                "Com que frequência as metas são revisadas?",
-                                ["Semanalmente", "Quinzenalmente", "Mensalmente", "Trimestralmente", "Raramente"]
-                            )
-                        
-                        with col4:
-                            feedback_regular = st.radio(
-                                "Há feedback regular sobre o progresso?",
-                                ["Sim, constante", "Ocasionalmente", "Raramente", "Nunca"]
+                    if update_submitted:
+                        try:
+                            gestor.update_meta(
+                                meta_id,
+                                employee_name=new_employee_name,
+                                department=new_department,
+                                goal_description=new_goal_description,
+                                start_date=str(new_start_date),
+                                end_date=str(new_end_date),
+                                status=new_status,
+                                progress=new_progress
                             )
-                            
-                            ferramentas_adequadas = st.radio(
-                                "As ferramentas de trabalho são adequadas?",
-                                ["Sim, excelentes", "Adequadas", "Básicas", "Inadequadas"]
-                            )
-                        
-                        st.markdown("#### 3. Expectativas e Melhorias")
-                        
-                        areas_melhoria = st.multiselect(
-                            "Que áreas precisam de melhoria?",
-                            ["Planejamento de metas", "Comunicação", "Recursos e ferramentas", 
-                             "Treinamento", "Acompanhamento", "Motivação da equipe", 
-                             "Processos internos", "Suporte técnico"]
-                        )
-                        
-                        comentarios_adicionais = st.text_area(
-                            "Comentários ou observações adicionais:",
-                            placeholder="Descreva qualquer situação específica ou sugestão..."
-                        )
-                        
-                        submit_diagnostic = st.form_submit_button("🔍 Gerar Diagnóstico")
-                        
-                        if submit_diagnostic:
-                            # Gerar diagnóstico baseado nas respostas
-                            st.markdown("---")
-                            st.markdown("## 📋 Resultado do Diagnóstico")
-                            
-                            # Análise de recursos
-                            if recursos_adequados in ["Não, faltam recursos", "Parcialmente"]:
-                                st.warning("⚠️ **Recursos:** Identificada deficiência de recursos que pode impactar o cumprimento das metas.")
-                                st.markdown("**Recomendação:** Revisar e alocar recursos adicionais ou redistribuir cargas de trabalho.")
-                            
-                            # Análise de comunicação
-                            if comunicacao_clara in ["Pouco clara", "Confusa"]:
-                                st.error("🚨 **Comunicação:** Problemas na clareza da comunicação das metas.")
-                                st.markdown("**Recomendação:** Reorganizar reuniões de alinhamento e documentar metas de forma mais clara.")
-                            
-                            # Análise de prazos
-                            if prazo_realista in ["Muito apertados", "Impossíveis"]:
-                                st.error("🚨 **Prazos:** Prazos inadequados podem levar ao fracasso das metas.")
-                                st.markdown("**Recomendação:** Revisar cronograma e ajustar prazos de forma realista.")
-                            
-                            # Análise de apoio
-                            if apoio_gestao in ["Pouco apoio", "Sem apoio"]:
-                                st.error("🚨 **Gestão:** Falta de apoio da gestão é crítica para o sucesso.")
-                                st.markdown("**Recomendação:** Engajar liderança e estabelecer canais de suporte.")
-                            
-                            # Análise de motivação
-                            if motivacao_equipe in ["Baixa", "Muito baixa"]:
-                                st.warning("⚠️ **Motivação:** Baixa motivação da equipe pode comprometer resultados.")
-                                st.markdown("**Recomendação:** Implementar programas de motivação e reconhecimento.")
-                            
-                            # Análise de obstáculos
-                            if principais_obstaculos:
-                                st.info(f"📌 **Obstáculos Identificados:** {', '.join(principais_obstaculos)}")
-                                st.markdown("**Recomendação:** Criar plano de ação específico para cada obstáculo identificado.")
-                            
-                            # Análise de frequência de revisão
-                            if frequencia_revisao in ["Raramente"]:
-                                st.warning("⚠️ **Acompanhamento:** Baixa frequência de revisão pode levar à perda de controle.")
-                                st.markdown("**Recomendação:** Estabelecer ciclos regulares de revisão (pelo menos mensais).")
-                            
-                            # Score geral
-                            score_pontos = 0
-                            total_pontos = 6
-                            
-                            if recursos_adequados == "Sim, completamente": score_pontos += 1
-                            if comunicacao_clara == "Sim, muito clara": score_pontos += 1
-                            if prazo_realista == "Sim, adequados": score_pontos += 1
-                            if apoio_gestao == "Sim, total apoio": score_pontos += 1
-                            if treinamento == "Sim, completo": score_pontos += 1
-                            if motivacao_equipe in ["Muito alta", "Alta"]: score_pontos += 1
-                            
-                            score_percentual = (score_pontos / total_pontos) * 100
-                            
-                            st.markdown("### 🎯 Score de Saúde das Metas")
-                            st.progress(score_percentual / 100)
-                            st.write(f"**Score:** {score_percentual:.0f}% ({score_pontos}/{total_pontos} pontos)")
-                            
-                            if score_percentual >= 80:
-                                st.success("🌟 **Excelente!** Ambiente muito favorável ao cumprimento das metas.")
-                            elif score_percentual >= 60:
-                                st.info("👍 **Bom!** Algumas melhorias podem otimizar os resultados.")
-                            elif score_percentual >= 40:
-                                st.warning("⚠️ **Atenção!** Várias áreas precisam de melhoria urgente.")
-                            else:
-                                st.error("🚨 **Crítico!** Ambiente desfavorável. Revisão completa necessária.")
-                            
-                            if comentarios_adicionais:
-                                st.markdown("### 💬 Observações Registradas")
-                                st.info(comentarios_adicionais)
-
-                elif diagnostic_type == "Análise Individual de Meta":
-                    st.markdown("### 🎯 Análise Individual de Meta")
+                            st.success("Meta atualizada com sucesso!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Erro ao atualizar meta: {e}")
                     
-                    # Seleção da meta
-                    meta_options = [f"ID {row['id']} - {row['employee_name']} - {row['goal_description'][:50]}..." 
-                                   for _, row in df.iterrows()]
-                    selected_meta = st.selectbox("Selecione a meta para análise detalhada:", meta_options)
-                    
-                    if selected_meta:
-                        meta_id = int(selected_meta.split(" ")[1])
-                        meta_data = df[df['id'] == meta_id].iloc[0]
-                        
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("#### 📊 Informações da Meta")
-                            st.write(f"**Funcionário:** {meta_data['employee_name']}")
-                            st.write(f"**Departamento:** {meta_data['department']}")
-                            st.write(f"**Descrição:** {meta_data['goal_description']}")
-                            st.write(f"**Status:** {meta_data['status']}")
-                            st.write(f"**Progresso:** {meta_data['progress']}%")
-                        
-                        with col2:
-                            st.markdown("#### 📅 Cronograma")
-                            st.write(f"**Data Início:** {meta_data['start_date']}")
-                            st.write(f"**Data Fim:** {meta_data['end_date']}")
-                            
-                            # Calcular dias restantes
-                            from datetime import datetime
-                            try:
-                                end_date = datetime.strptime(meta_data['end_date'], '%Y-%m-%d')
-                                today = datetime.now()
-                                days_remaining = (end_date - today).days
-                                
-                                if days_remaining > 0:
-                                    st.write(f"**Dias Restantes:** {days_remaining}")
-                                elif days_remaining == 0:
-                                    st.write("**Prazo:** Hoje!")
-                                else:
-                                    st.write(f"**Atrasada:** {abs(days_remaining)} dias")
-                            except:
-                                st.write("**Dias Restantes:** Não calculado")
-                        
-                        # Análise específica da meta
-                        st.markdown("#### 🔍 Análise Detalhada")
-                        
-                        progress = meta_data['progress']
-                        status = meta_data['status']
-                        
-                        if status == 'Concluída':
-                            st.success("🎉 **Meta Concluída!** Parabéns pelo sucesso!")
-                        elif status == 'Não Concluída':
-                            st.error("❌ **Meta Não Concluída** - Necessária análise para próximas ações.")
-                        elif status == 'Atrasada':
-                            st.error(f"⏰ **Meta Atrasada** - Progresso atual: {progress}%")
-                            if progress < 50:
-                                st.warning("🚨 Progresso baixo para meta atrasada. Intervenção urgente necessária.")
-                        elif status == 'Em Andamento':
-                            if progress >= 80:
-                                st.success(f"🚀 **Excelente progresso!** {progress}% - Meta no caminho certo.")
-                            elif progress >= 60:
-                                st.info(f"👍 **Bom progresso!** {progress}% - Manter o ritmo.")
-                            elif progress >= 40:
-                                st.warning(f"⚠️ **Progresso moderado** {progress}% - Pode precisar de aceleração.")
-                            else:
-                                st.error(f"🚨 **Progresso baixo** {progress}% - Revisão urgente necessária.")
-                        
-                        # Recomendações específicas
-                        st.markdown("#### 💡 Recomendações")
-                        
-                        if progress < 25:
-                            st.markdown("""
-                            - 🔄 **Revisar estratégia** - A abordagem atual pode não estar funcionando
-                            - 🤝 **Buscar suporte** - Solicitar ajuda da gestão ou colegas
-                            - 📚 **Capacitação** - Considerar treinamento adicional
-                            - ⏰ **Reagendamento** - Avaliar se o prazo é realista
-                            """)
-                        elif progress < 50:
-                            st.markdown("""
-                            - ⚡ **Acelerar ritmo** - Intensificar esforços nas atividades principais
-                            - 🎯 **Focar prioridades** - Concentrar em tarefas de maior impacto
-                            - 📞 **Comunicação** - Manter gestão informada sobre desafios
-                            - 🔧 **Otimizar processos** - Buscar eficiências operacionais
-                            """)
-                        elif progress < 80:
-                            st.markdown("""
-                            - 📈 **Manter progresso** - Continuar com a estratégia atual
-                            - 🔍 **Monitorar de perto** - Acompanhar indicadores regularmente
-                            - 🚀 **Últimos 20%** - Preparar para o sprint final
-                            """)
-                        else:
-                            st.markdown("""
-                            - 🎯 **Finalizar com qualidade** - Foco na entrega final
-                            - 📝 **Documentar aprendizados** - Registrar boas práticas
-                            - 🏆 **Celebrar conquista** - Reconhecer o bom trabalho
-                            """)
-                        
-                        # Formulário para adicionar observações
-                        with st.form("individual_observations"):
-                            st.markdown("#### 📝 Diagnóstico Individual da Meta")
-                            st.markdown("Responda às perguntas abaixo para gerar um diagnóstico específico desta meta:")
-                            
-                            col_q1, col_q2 = st.columns(2)
-                            
-                            with col_q1:
-                                q1 = st.radio(
-                                    "A meta foi percebida como realista e possível de atingir?",
-                                    ["Sim", "Não"],
-                                    key="q1"
-                                )
-                                
-                                q2 = st.radio(
-                                    "Os recursos disponíveis foram suficientes para a execução da meta?",
-                                    ["Sim", "Não"],
-                                    key="q2"
-                                )
-                                
-                                q3 = st.radio(
-                                    "Há sinais de engajamento ou motivação ao longo do período?",
-                                    ["Sim", "Não"],
-                                    key="q3"
-                                )
-                                
-                                q4 = st.radio(
-                                    "Houve sinais de cansaço excessivo ou sobrecarga?",
-                                    ["Sim", "Não"],
-                                    key="q4"
-                                )
-                            
-                            with col_q2:
-                                q5 = st.radio(
-                                    "O acompanhamento e o feedback foram oferecidos com regularidade?",
-                                    ["Sim", "Não"],
-                                    key="q5"
-                                )
-                                
-                                q6 = st.radio(
-                                    "As expectativas e objetivos da meta estavam claros desde o início?",
-                                    ["Sim", "Não"],
-                                    key="q6"
-                                )
-                                
-                                q7 = st.radio(
-                                    "Houve mudanças ou imprevistos no período da meta?",
-                                    ["Sim", "Não"],
-                                    key="q7"
-                                )
-                                
-                                q8 = st.radio(
-                                    "O funcionário participou da definição da meta?",
-                                    ["Sim", "Não"],
-                                    key="q8"
-                                )
-                            
-                            if st.form_submit_button("🔍 Gerar Diagnóstico Individual"):
-                                # Gerar diagnóstico baseado nas respostas
-                                diagnoses = []
-                                suggestions = []
-                                
-                                # Análise das respostas
-                                if q1 == 'Não':
-                                    diagnoses.append("Meta pode ser irrealista")
-                                    suggestions.append("Reavalie a meta junto ao funcionário para garantir que esteja adequada ao tempo e ao escopo.")
-                                
-                                if q2 == 'Não':
-                                    diagnoses.append("Falta de recursos")
-                                    suggestions.append("Verifique se há necessidade de suporte adicional, como ferramentas, tempo ou equipe.")
-                                
-                                if q3 == 'Não':
-                                    diagnoses.append("Baixa motivação")
-                                    suggestions.append("Agende uma conversa para entender o que pode estar afetando a motivação e como apoiar melhor.")
-                                
-                                if q4 == 'Sim':
-                                    diagnoses.append("Possível burnout")
-                                    suggestions.append("Considere redistribuir tarefas ou revisar prazos para evitar esgotamento.")
-                                
-                                if q5 == 'Não':
-                                    diagnoses.append("Falta de feedback")
-                                    suggestions.append("Estabeleça checkpoints periódicos para fortalecer o alinhamento e o suporte.")
-                                
-                                if q6 == 'Não':
-                                    diagnoses.append("Falta de clareza")
-                                    suggestions.append("Reforce os critérios de sucesso e prazos de forma objetiva com o funcionário.")
-                                
-                                if q7 == 'Sim':
-                                    diagnoses.append("Ocorreram imprevistos")
-                                    suggestions.append("Considere adaptar prazos ou prioridades diante de imprevistos relevantes.")
-                                
-                                if q8 == 'Não':
-                                    diagnoses.append("Meta imposta sem participação")
-                                    suggestions.append("Envolva o funcionário na construção das metas para aumentar clareza e comprometimento.")
-                                
-                                # Compilar diagnóstico final
-                                if diagnoses:
-                                    final_diagnosis = "DIAGNÓSTICO AUTOMÁTICO:\n• " + "\n• ".join(diagnoses)
-                                    final_suggestions = "SUGESTÕES AUTOMÁTICAS:\n• " + "\n• ".join(suggestions)
-                                else:
-                                    final_diagnosis = "DIAGNÓSTICO AUTOMÁTICO:\n• Nenhum problema crítico identificado. Meta apresenta boas condições de execução."
-                                    final_suggestions = "SUGESTÕES AUTOMÁTICAS:\n• Continue com a estratégia atual e mantenha o acompanhamento regular."
-                                
-                                # Salvar no banco de dados
-                                try:
-                                    gestor.update_meta(
-                                        meta_id,
-                                        diagnosis=final_diagnosis,
-                                        suggestions=final_suggestions
-                                    )
-                                    st.success("✅ Diagnóstico individual gerado e salvo com sucesso!")
-                                except Exception as e:
-                                    st.error(f"Erro ao salvar diagnóstico: {e}")
-                                
-                                # Exibir resultado do diagnóstico imediatamente
-                                st.markdown("---")
-                                st.markdown("### 📋 Resultado do Diagnóstico Individual")
-                                
-                                if diagnoses:
-                                    st.markdown("#### 🚨 Problemas Identificados:")
-                                    for i, diagnosis in enumerate(diagnoses):
-                                        if "irrealista" in diagnosis.lower():
-                                            st.error(f"🎯 {diagnosis}")
-                                        elif "falta de recursos" in diagnosis.lower():
-                                            st.warning(f"🔧 {diagnosis}")
-                                        elif "baixa motivação" in diagnosis.lower():
-                                            st.warning(f"😔 {diagnosis}")
-                                        elif "burnout" in diagnosis.lower():
-                                            st.error(f"😰 {diagnosis}")
-                                        elif "falta de feedback" in diagnosis.lower():
-                                            st.warning(f"📢 {diagnosis}")
-                                        elif "falta de clareza" in diagnosis.lower():
-                                            st.warning(f"❓ {diagnosis}")
-                                        elif "imprevistos" in diagnosis.lower():
-                                            st.info(f"⚡ {diagnosis}")
-                                        elif "imposta" in diagnosis.lower():
-                                            st.warning(f"🤝 {diagnosis}")
-                                        else:
-                                            st.info(f"📌 {diagnosis}")
-                                    
-                                    st.markdown("#### 💡 Ações Recomendadas:")
-                                    for i, suggestion in enumerate(suggestions):
-                                        st.markdown(f"**{i+1}.** {suggestion}")
-                                    
-                                    # Score de risco
-                                    risk_score = len(diagnoses)
-                                    total_questions = 8
-                                    risk_percentage = (risk_score / total_questions) * 100
-                                    
-                                    st.markdown("#### 📊 Nível de Risco da Meta")
-                                    if risk_percentage == 0:
-                                        st.success(f"🟢 **Baixo Risco** - {risk_score}/8 problemas identificados")
-                                        st.info("Meta apresenta condições favoráveis para o sucesso.")
-                                    elif risk_percentage <= 25:
-                                        st.info(f"🟡 **Risco Moderado** - {risk_score}/8 problemas identificados")
-                                        st.warning("Alguns pontos de atenção identificados.")
-                                    elif risk_percentage <= 50:
-                                        st.warning(f"🟠 **Risco Alto** - {risk_score}/8 problemas identificados")
-                                        st.error("Vários fatores podem comprometer o sucesso da meta.")
-                                    else:
-                                        st.error(f"🔴 **Risco Crítico** - {risk_score}/8 problemas identificados")
-                                        st.error("Meta em situação crítica. Intervenção urgente necessária.")
-                                        
-                                else:
-                                    st.success("🌟 **Excelente!** Nenhum problema crítico identificado.")
-                                    st.info("A meta apresenta boas condições de execução. Continue com a estratégia atual.")
+                    if delete_submitted:
+                        try:
+                            gestor.delete_meta(meta_id)
+                            st.success("Meta excluída com sucesso!")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Erro ao excluir meta: {e}")
+        else:
+            st.info("Nenhuma meta encontrada para atualizar.")
+            
+    except Exception as e:
+        st.error(f"Erro ao carregar metas: {e}")
 
-            else:
-                st.info("Nenhuma meta encontrada para diagnóstico.")
+@medir_view("analise_geral")
+def analise_geral(gestor):
+    # Agregações feitas pelo motor analítico (METAS_ANALITICO), sem trazer todas as metas
+    visao = gestor.analitico.visao_geral()
+
+    # Análise geral (código existente)
+    st.markdown("### 📊 Análise Geral")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # Distribuição por status
+        st.markdown("**Distribuição por Status:**")
+        for status, count in visao['status'].items():
+            percentage = (count / visao['total']) * 100
+            st.write(f"• {status}: {count} ({percentage:.1f}%)")
+    
+    with col2:
+        # Distribuição por departamento
+        st.markdown("**Distribuição por Departamento:**")
+        for dept, count in visao['department'].items():
+            percentage = (count / visao['total']) * 100
+            st.write(f"• {dept}: {count} ({percentage:.1f}%)")
+    
+    with col3:
+        # Estatísticas de progresso
+        avg_progress = visao['progresso_medio']
+        min_progress = visao['progresso_min']
+        max_progress = visao['progresso_max']
+        
+        st.markdown("**Estatísticas de Progresso:**")
+        st.write(f"• Média: {avg_progress:.1f}%")
+        st.write(f"• Mínimo: {min_progress}%")
+        st.write(f"• Máximo: {max_progress}%")
+    
+    st.markdown("---")
+    
+    # Metas críticas
+    st.markdown("### ⚠️ Metas que Precisam de Atenção")
+    
+    metas_criticas = gestor.analitico.metas_criticas()
+    
+    if not metas_criticas.empty:
+        for _, meta in metas_criticas.iterrows():
+            with st.expander(f"🔴 {meta['employee_name']} - {meta['goal_description'][:50]}..."):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write(f"**Funcionário:** {meta['employee_name']}")
+                    st.write(f"**Departamento:** {meta['department']}")
+                    st.write(f"**Status:** {meta['status']}")
+                with col2:
+                    st.write(f"**Progresso:** {meta['progress']}%")
+                    st.write(f"**Data Início:** {meta['start_date']:%Y-%m-%d}")
+                    st.write(f"**Data Fim:** {meta['end_date']:%Y-%m-%d}")
                 
-        except Exception as e:
-            st.error(f"Erro ao gerar diagnóstico: {e}")
+                # Diagnóstico automático
+                nivel, mensagem = ALERTAS_CRITICOS[meta['alerta']]
+                getattr(st, nivel)(mensagem)
+    else:
+        st.success("✅ Todas as metas estão com progresso satisfatório!")
+    
+    # Metas de destaque
+    st.markdown("### 🌟 Metas de Destaque")
+    metas_destaque = gestor.analitico.metas_destaque()
+    
+    if not metas_destaque.empty:
+        for _, meta in metas_destaque.iterrows():
+            st.success(f"🎯 {meta['employee_name']} - {meta['goal_description'][:50]}... ({meta['progress']}%)")
+    else:
+        st.info("Nenhuma meta com progresso acima de 80% encontrada.")
+    
+    # Problemas apontados nos diagnósticos individuais
+    st.markdown("### 🧭 Diagnósticos Individuais por Departamento")
+    contagem_diagnosticos = gestor.contagem_diagnosticos_por_departamento()
+    
+    if not contagem_diagnosticos.empty:
+        st.dataframe(contagem_diagnosticos, use_container_width=True)
+    else:
+        st.info("Nenhum diagnóstico individual registrado.")
+
+@medir_view("diagnostico_interativo")
+def diagnostico_interativo(gestor):
+    st.markdown("### 🔍 Diagnóstico Interativo")
+    st.markdown("Responda às perguntas abaixo para obter um diagnóstico personalizado das metas:")
+    
+    with st.form("diagnostic_form"):
+        department_avaliado = st.selectbox("Departamento avaliado:", DEPARTAMENTOS)
 
-    with tab5:
-        st.subheader("Relatórios")
+        st.markdown("#### 1. Contexto Organizacional")
         
-        try:
-            df = gestor.get_all_metas()
+        col1, col2 = st.columns(2)
+        with col1:
+            recursos_adequados = pergunta_organizacional("recursos_adequados")
             
-            if not df.empty:
-                # Seleção do tipo de relatório
-                report_type = st.selectbox(
-                    "Tipo de Relatório:",
-                    ["Relatório Geral", "Por Departamento", "Por Status", "Por Funcionário"]
-                )
+            comunicacao_clara = pergunta_organizacional("comunicacao_clara")
+            
+            prazo_realista = pergunta_organizacional("prazo_realista")
+        
+        with col2:
+            apoio_gestao = pergunta_organizacional("apoio_gestao")
+            
+            treinamento = pergunta_organizacional("treinamento")
+            
+            motivacao_equipe = pergunta_organizacional("motivacao_equipe")
+        
+        st.markdown("#### 2. Obstáculos e Desafios")
+        
+        col3, col4 = st.columns(2)
+        with col3:
+            principais_obstaculos = st.multiselect("Quais são os principais obstáculos?", OBSTACULOS)
+            
+            frequencia_revisao = pergunta_organizacional("frequencia_revisao")
+        
+        with col4:
+            feedback_regular = pergunta_organizacional("feedback_regular")
+            
+            ferramentas_adequadas = pergunta_organizacional("ferramentas_adequadas")
+        
+        st.markdown("#### 3. Expectativas e Melhorias")
+        
+        areas_melhoria = st.multiselect("Que áreas precisam de melhoria?", AREAS_MELHORIA)
+        
+        comentarios_adicionais = st.text_area(
+            "Comentários ou observações adicionais:",
+            placeholder="Descreva qualquer situação específica ou sugestão..."
+        )
+        
+        submit_diagnostic = st.form_submit_button("🔍 Gerar Diagnóstico")
+        
+        if submit_diagnostic:
+            # Registrar as respostas; os resumos do painel são atualizados na mesma transação
+            respostas = codificar_questionario({
+                "recursos_adequados": recursos_adequados, "comunicacao_clara": comunicacao_clara,
+                "prazo_realista": prazo_realista, "apoio_gestao": apoio_gestao,
+                "treinamento": treinamento, "motivacao_equipe": motivacao_equipe,
+                "frequencia_revisao": frequencia_revisao, "feedback_regular": feedback_regular,
+                "ferramentas_adequadas": ferramentas_adequadas,
+            })
+            gestor.add_questionario(
+                department_avaliado, respostas,
+                codificar_selecao(principais_obstaculos, OBSTACULOS),
+                codificar_selecao(areas_melhoria, AREAS_MELHORIA),
+                comentarios_adicionais or None,
+            )
+
+            # Gerar diagnóstico baseado nas respostas
+            st.markdown("---")
+            st.markdown("## 📋 Resultado do Diagnóstico")
+            
+            # Análise de recursos
+            if recursos_adequados in ["Não, faltam recursos", "Parcialmente"]:
+                st.warning("⚠️ **Recursos:** Identificada deficiência de recursos que pode impactar o cumprimento das metas.")
+                st.markdown("**Recomendação:** Revisar e alocar recursos adicionais ou redistribuir cargas de trabalho.")
+            
+            # Análise de comunicação
+            if comunicacao_clara in ["Pouco clara", "Confusa"]:
+                st.error("🚨 **Comunicação:** Problemas na clareza da comunicação das metas.")
+                st.markdown("**Recomendação:** Reorganizar reuniões de alinhamento e documentar metas de forma mais clara.")
+            
+            # Análise de prazos
+            if prazo_realista in ["Muito apertados", "Impossíveis"]:
+                st.error("🚨 **Prazos:** Prazos inadequados podem levar ao fracasso das metas.")
+                st.markdown("**Recomendação:** Revisar cronograma e ajustar prazos de forma realista.")
+            
+            # Análise de apoio
+            if apoio_gestao in ["Pouco apoio", "Sem apoio"]:
+                st.error("🚨 **Gestão:** Falta de apoio da gestão é crítica para o sucesso.")
+                st.markdown("**Recomendação:** Engajar liderança e estabelecer canais de suporte.")
+            
+            # Análise de motivação
+            if motivacao_equipe in ["Baixa", "Muito baixa"]:
+                st.warning("⚠️ **Motivação:** Baixa motivação da equipe pode comprometer resultados.")
+                st.markdown("**Recomendação:** Implementar programas de motivação e reconhecimento.")
+            
+            # Análise de obstáculos
+            if principais_obstaculos:
+                st.info(f"📌 **Obstáculos Identificados:** {', '.join(principais_obstaculos)}")
+                st.markdown("**Recomendação:** Criar plano de ação específico para cada obstáculo identificado.")
+            
+            # Análise de frequência de revisão
+            if frequencia_revisao in ["Raramente"]:
+                st.warning("⚠️ **Acompanhamento:** Baixa frequência de revisão pode levar à perda de controle.")
+                st.markdown("**Recomendação:** Estabelecer ciclos regulares de revisão (pelo menos mensais).")
+            
+            # Score geral
+            score_pontos = pontos_questionario(respostas)
+            total_pontos = TOTAL_PONTOS
+            
+            score_percentual = (score_pontos / total_pontos) * 100
+            
+            st.markdown("### 🎯 Score de Saúde das Metas")
+            st.progress(score_percentual / 100)
+            st.write(f"**Score:** {score_percentual:.0f}% ({score_pontos}/{total_pontos} pontos)")
+            
+            if score_percentual >= 80:
+                st.success("🌟 **Excelente!** Ambiente muito favorável ao cumprimento das metas.")
+            elif score_percentual >= 60:
+                st.info("👍 **Bom!** Algumas melhorias podem otimizar os resultados.")
+            elif score_percentual >= 40:
+                st.warning("⚠️ **Atenção!** Várias áreas precisam de melhoria urgente.")
+            else:
+                st.error("🚨 **Crítico!** Ambiente desfavorável. Revisão completa necessária.")
+            
+            if comentarios_adicionais:
+                st.markdown("### 💬 Observações Registradas")
+                st.info(comentarios_adicionais)
+
+@st.fragment
+@medir_view("painel_questionarios")
+def painel_questionarios(gestor):
+    """Resultados acumulados dos questionários, lidos dos resumos por departamento e mês."""
+    st.markdown("### 📈 Resultados dos Questionários")
+    resumo = gestor.resumo_questionarios()
+    if resumo.empty:
+        st.info("Nenhum questionário registrado.")
+        return
+
+    col_dep, col_periodo = st.columns(2)
+    with col_dep:
+        department = st.selectbox("Departamento", ["Todos"] + DEPARTAMENTOS, key="questionarios_department")
+    with col_periodo:
+        periodo = st.selectbox("Mês", ["Todos"] + sorted(resumo["periodo"].unique(), reverse=True),
+                               key="questionarios_periodo")
+    department = None if department == "Todos" else department
+    periodo = None if periodo == "Todos" else periodo
+
+    filtrado = resumo[resumo["department"] == department] if department else resumo
+    respostas = filtrado[filtrado["periodo"] == periodo] if periodo else filtrado
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Respostas", f"{respostas['respostas'].sum():,}".replace(",", "."))
+    with col2:
+        media = (respostas["score_medio"] * respostas["respostas"]).sum() / max(respostas["respostas"].sum(), 1)
+        st.metric("Score Médio", f"{media:.0f}%")
+
+    st.markdown("#### Score médio por mês")
+    st.line_chart(filtrado.pivot(index="periodo", columns="department", values="score_medio"))
+
+    distribuicao = gestor.distribuicao_questionarios(department, periodo)
+    st.markdown("#### Obstáculos mais frequentes")
+    obstaculos = distribuicao[distribuicao["grupo"] == "obstaculos"].nlargest(5, "total")
+    st.bar_chart(obstaculos.set_index("opcao")["percentual"], horizontal=True)
+
+    st.markdown("#### Distribuição das respostas")
+    for chave, (pergunta, _opcoes, _pontuam) in QUESTOES_ORGANIZACIONAIS.items():
+        with st.expander(pergunta):
+            opcoes = distribuicao[distribuicao["grupo"] == chave]
+            st.dataframe(opcoes[["opcao", "total", "percentual"]].round(1), hide_index=True, use_container_width=True)
+
+@st.fragment
+@medir_view("analise_individual")
+def analise_individual(gestor):
+    """Análise de uma meta escolhida pela busca; a busca reexecuta só esta seção."""
+    st.markdown("### 🎯 Análise Individual de Meta")
+    
+    # Seleção da meta
+    meta_id = seletor_meta(gestor, "Selecione a meta para análise detalhada:", "analise")
+    
+    if meta_id is not None:
+        meta_data = gestor.get_meta(meta_id)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 📊 Informações da Meta")
+            st.write(f"**Funcionário:** {meta_data['employee_name']}")
+            st.write(f"**Departamento:** {meta_data['department']}")
+            st.write(f"**Descrição:** {meta_data['goal_description']}")
+            st.write(f"**Status:** {meta_data['status']}")
+            st.write(f"**Progresso:** {meta_data['progress']}%")
+        
+        with col2:
+            st.markdown("#### 📅 Cronograma")
+            st.write(f"**Data Início:** {meta_data['start_date']}")
+            st.write(f"**Data Fim:** {meta_data['end_date']}")
+            
+            # Calcular dias restantes
+            diagnostico = diagnosticar(pd.DataFrame([meta_data])).iloc[0]
+            days_remaining = diagnostico['dias_restantes']
+            
+            if pd.isna(days_remaining):
+                st.write("**Dias Restantes:** Não calculado")
+            elif days_remaining > 0:
+                st.write(f"**Dias Restantes:** {days_remaining}")
+            elif days_remaining == 0:
+                st.write("**Prazo:** Hoje!")
+            else:
+                st.write(f"**Atrasada:** {abs(days_remaining)} dias")
+        
+        # Análise específica da meta
+        st.markdown("#### 🔍 Análise Detalhada")
+        
+        if diagnostico['avaliacao']:
+            nivel, mensagem = AVALIACOES[diagnostico['avaliacao']]
+            getattr(st, nivel)(mensagem.format(progress=meta_data['progress']))
+        if diagnostico['intervencao_urgente']:
+            nivel, mensagem = ALERTA_ATRASADA
+            getattr(st, nivel)(mensagem)
+        
+        # Recomendações específicas
+        st.markdown("#### 💡 Recomendações")
+        st.markdown(RECOMENDACOES[diagnostico['recomendacao']][1])
+        
+        # Formulário para adicionar observações
+        with st.form("individual_observations"):
+            st.markdown("#### 📝 Diagnóstico Individual da Meta")
+            st.markdown("Responda às perguntas abaixo para gerar um diagnóstico específico desta meta:")
+            
+            col_q1, col_q2 = st.columns(2)
+            metade = len(QUESTOES_INDIVIDUAIS) // 2
+            respostas = []
+            
+            for i, questao in enumerate(QUESTOES_INDIVIDUAIS):
+                with col_q1 if i < metade else col_q2:
+                    respostas.append(st.radio(
+                        questao[0],
+                        ["Sim", "Não"],
+                        key=f"q{i + 1}"
+                    ))
+            
+            if st.form_submit_button("🔍 Gerar Diagnóstico Individual"):
+                codigo_respostas = codificar_respostas(respostas)
+                diagnoses = problemas_identificados(problemas_das_respostas(codigo_respostas))
                 
-                if report_type == "Relatório Geral":
-                    st.markdown("### 📋 Relatório Geral de Metas")
+                # Salvar as respostas; diagnóstico e sugestões são gerados na leitura
+                try:
+                    gestor.salvar_diagnostico_individual(meta_id, codigo_respostas)
+                    st.success("✅ Diagnóstico individual gerado e salvo com sucesso!")
+                except Exception as e:
+                    st.error(f"Erro ao salvar diagnóstico: {e}")
+                
+                # Exibir resultado do diagnóstico imediatamente
+                st.markdown("---")
+                st.markdown("### 📋 Resultado do Diagnóstico Individual")
+                
+                if diagnoses:
+                    st.markdown("#### 🚨 Problemas Identificados:")
+                    for _pergunta, _resposta, diagnosis, _sugestao, icone, nivel in diagnoses:
+                        getattr(st, nivel)(f"{icone} {diagnosis}")
                     
-                    col1, col2 = st.columns(2)
+                    st.markdown("#### 💡 Ações Recomendadas:")
+                    for i, questao in enumerate(diagnoses):
+                        st.markdown(f"**{i+1}.** {questao[3]}")
                     
-                    with col1:
-                        st.markdown("**Resumo Executivo:**")
-                        total_metas = len(df)
-                        concluidas = len(df[df['status'] == 'Concluída'])
-                        em_andamento = len(df[df['status'] == 'Em Andamento'])
-                        atrasadas = len(df[df['status'] == 'Atrasada'])
-                        nao_concluidas = len(df[df['status'] == 'Não Concluída'])
-                        
-                        st.write(f"• **Total de Metas:** {total_metas}")
-                        st.write(f"• **Concluídas:** {concluidas} ({(concluidas/total_metas*100):.1f}%)")
-                        st.write(f"• **Em Andamento:** {em_andamento} ({(em_andamento/total_metas*100):.1f}%)")
-                        st.write(f"• **Atrasadas:** {atrasadas} ({(atrasadas/total_metas*100):.1f}%)")
-                        st.write(f"• **Não Concluídas:** {nao_concluidas} ({(nao_concluidas/total_metas*100):.1f}%)")
+                    # Score de risco
+                    risk_score = len(diagnoses)
+                    total_questions = len(QUESTOES_INDIVIDUAIS)
+                    risk_percentage = (risk_score / total_questions) * 100
                     
-                    with col2:
-                        st.markdown("**Indicadores de Performance:**")
-                        avg_progress = df['progress'].mean()
-                        success_rate = (concluidas / total_metas) * 100
-                        
-                        st.write(f"• **Progresso Médio:** {avg_progress:.1f}%")
-                        st.write(f"• **Taxa de Sucesso:** {success_rate:.1f}%")
-                        
-                        # Departamento com melhor performance
-                        dept_performance = df.groupby('department')['progress'].mean()
-                        best_dept = dept_performance.idxmax()
-                        best_score = dept_performance.max()
+                    st.markdown("#### 📊 Nível de Risco da Meta")
+                    if risk_percentage == 0:
+                        st.success(f"🟢 **Baixo Risco** - {risk_score}/8 problemas identificados")
+                        st.info("Meta apresenta condições favoráveis para o sucesso.")
+                    elif risk_percentage <= 25:
+                        st.info(f"🟡 **Risco Moderado** - {risk_score}/8 problemas identificados")
+                        st.warning("Alguns pontos de atenção identificados.")
+                    elif risk_percentage <= 50:
+                        st.warning(f"🟠 **Risco Alto** - {risk_score}/8 problemas identificados")
+                        st.error("Vários fatores podem comprometer o sucesso da meta.")
+                    else:
+                        st.error(f"🔴 **Risco Crítico** - {risk_score}/8 problemas identificados")
+                        st.error("Meta em situação crítica. Intervenção urgente necessária.")
                         
-                        st.write(f"• **Melhor Departamento:** {best_dept} ({best_score:.1f}%)")
+                else:
+                    st.success("🌟 **Excelente!** Nenhum problema crítico identificado.")
+                    st.info("A meta apresenta boas condições de execução. Continue com a estratégia atual.")
+
+@medir_view("diagnostico")
+def pagina_diagnostico():
+    gestor = get_gestor()
+    st.subheader("Diagnóstico de Metas")
+    
+    # Seleção do tipo de diagnóstico
+    diagnostic_type = st.selectbox(
+        "Tipo de Diagnóstico:",
+        ["Análise Geral", "Diagnóstico Interativo", "Análise Individual de Meta"]
+    )
+    
+    try:
+        if gestor.resumo_metas()["total"] > 0:
+            if diagnostic_type == "Análise Geral":
+                relatorios = get_gestor_relatorios()
+                aviso_snapshot(relatorios)
+                analise_geral(relatorios)
+            elif diagnostic_type == "Diagnóstico Interativo":
+                diagnostico_interativo(gestor)
+                painel_questionarios(gestor)
+            elif diagnostic_type == "Análise Individual de Meta":
+                analise_individual(gestor)
+        else:
+            st.info("Nenhuma meta encontrada para diagnóstico.")
+            
+    except Exception as e:
+        st.error(f"Erro ao gerar diagnóstico: {e}")
+
+@st.fragment
+@medir_view("download_dados")
+def download_dados(gestor, incluir_arquivo=False):
+    """Filtros e botão de exportação; alterar os filtros reexecuta só esta seção."""
+    col_dep, col_status, col_formato = st.columns(3)
+    with col_dep:
+        export_department = st.selectbox("Departamento", ["Todos"] + DEPARTAMENTOS, key="export_department")
+    with col_status:
+        export_status = st.selectbox("Status", ["Todos"] + STATUS, key="export_status")
+    with col_formato:
+        export_formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO), key="export_formato")
+    
+    filtros_exportacao = {
+        "department": None if export_department == "Todos" else export_department,
+        "status": None if export_status == "Todos" else export_status,
+    }
+    
+    def gerar_exportacao():
+        # Gerada em blocos para um arquivo temporário, mas o Streamlit guarda o
+        # download inteiro na memória; a linha de comando (metas.exportacao)
+        # é o caminho com memória limitada para exportações grandes
+        with exportar_para_temporario(gestor, export_formato, incluir_arquivo=incluir_arquivo,
+                                      **filtros_exportacao) as arquivo:
+            return arquivo.read()
+
+    # A exportação só é gerada no clique
+    st.download_button(
+        label=f"📥 Baixar Dados ({export_formato.upper()})",
+        data=gerar_exportacao,
+        file_name=f"metas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_formato}",
+        mime=FORMATOS_EXPORTACAO[export_formato]
+    )
+
+@medir_view("relatorios")
+def pagina_relatorios():
+    # Relatórios leem o snapshot, sem disputar o banco com as escritas
+    gestor = get_gestor_relatorios()
+    st.subheader("Relatórios")
+    aviso_snapshot(gestor)
+    
+    try:
+        # Metas de ciclos encerrados ficam fora da tabela viva (metas.arquivamento)
+        arquivadas = gestor.total_arquivadas()
+        incluir_arquivo = arquivadas > 0 and st.checkbox(
+            f"Incluir metas arquivadas ({arquivadas})",
+            help="Soma aos relatórios e ao download as metas de ciclos encerrados movidas para o arquivo."
+        )
+        
+        # Resumos materializados: custo proporcional ao número de grupos
+        status_stats = gestor.resumo_por_dimensao('status', incluir_arquivo)
+        total_metas = int(status_stats['total'].sum())
+        
+        if total_metas > 0:
+            # Seleção do tipo de relatório
+            report_type = st.selectbox(
+                "Tipo de Relatório:",
+                ["Relatório Geral", "Por Departamento", "Por Status", "Por Funcionário", "Evolução por Departamento"]
+            )
+            
+            if report_type == "Relatório Geral":
+                st.markdown("### 📋 Relatório Geral de Metas")
                 
-                elif report_type == "Por Departamento":
-                    st.markdown("### 🏢 Relatório por Departamento")
-                    
-                    dept_stats = df.groupby('department').agg({
-                        'id': 'count',
-                        'progress': ['mean', 'min', 'max'],
-                        'status': lambda x: (x == 'Concluída').sum()
-                    }).round(1)
-                    
-                    dept_stats.columns = ['Total Metas', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx', 'Concluídas']
-                    dept_stats['Taxa Sucesso %'] = (dept_stats['Concluídas'] / dept_stats['Total Metas'] * 100).round(1)
-                    
-                    st.dataframe(dept_stats, use_container_width=True)
+                col1, col2 = st.columns(2)
+                contagem_status = status_stats['total'].reindex(STATUS, fill_value=0)
                 
-                elif report_type == "Por Status":
-                    st.markdown("### 📊 Relatório por Status")
-                    
-                    status_stats = df.groupby('status').agg({
-                        'id': 'count',
-                        'progress': ['mean', 'min', 'max']
-                    }).round(1)
-                    
-                    status_stats.columns = ['Quantidade', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx']
-                    status_stats['Percentual %'] = (status_stats['Quantidade'] / len(df) * 100).round(1)
+                with col1:
+                    st.markdown("**Resumo Executivo:**")
+                    concluidas = contagem_status['Concluída']
+                    em_andamento = contagem_status['Em Andamento']
+                    atrasadas = contagem_status['Atrasada']
+                    nao_concluidas = contagem_status['Não Concluída']
                     
-                    st.dataframe(status_stats, use_container_width=True)
+                    st.write(f"• **Total de Metas:** {total_metas}")
+                    st.write(f"• **Concluídas:** {concluidas} ({(concluidas/total_metas*100):.1f}%)")
+                    st.write(f"• **Em Andamento:** {em_andamento} ({(em_andamento/total_metas*100):.1f}%)")
+                    st.write(f"• **Atrasadas:** {atrasadas} ({(atrasadas/total_metas*100):.1f}%)")
+                    st.write(f"• **Não Concluídas:** {nao_concluidas} ({(nao_concluidas/total_metas*100):.1f}%)")
                 
-                elif report_type == "Por Funcionário":
-                    st.markdown("### 👤 Relatório por Funcionário")
+                with col2:
+                    st.markdown("**Indicadores de Performance:**")
+                    avg_progress = (status_stats['progresso_medio'] * status_stats['total']).sum() / total_metas
+                    success_rate = (concluidas / total_metas) * 100
                     
-                    employee_stats = df.groupby('employee_name').agg({
-                        'id': 'count',
-                        'progress': ['mean', 'min', 'max'],
-                        'status': lambda x: (x == 'Concluída').sum()
-                    }).round(1)
+                    st.write(f"• **Progresso Médio:** {avg_progress:.1f}%")
+                    st.write(f"• **Taxa de Sucesso:** {success_rate:.1f}%")
                     
-                    employee_stats.columns = ['Total Metas', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx', 'Concluídas']
-                    employee_stats['Taxa Sucesso %'] = (employee_stats['Concluídas'] / employee_stats['Total Metas'] * 100).round(1)
+                    # Departamento com melhor performance
+                    dept_performance = gestor.resumo_por_dimensao('department', incluir_arquivo)['progresso_medio']
+                    best_dept = dept_performance.idxmax()
+                    best_score = dept_performance.max()
                     
-                    st.dataframe(employee_stats, use_container_width=True)
+                    st.write(f"• **Melhor Departamento:** {best_dept} ({best_score:.1f}%)")
                 
-                # Opção de download
-                st.markdown("---")
-                st.markdown("### 💾 Download de Dados")
+                st.markdown("**Metas por Mês de Vencimento:**")
+                st.bar_chart(gestor.analitico.prazos_por_mes(incluir_arquivo))
+            
+            elif report_type == "Por Departamento":
+                st.markdown("### 🏢 Relatório por Departamento")
                 
-                if st.button("📥 Baixar Dados Completos (CSV)"):
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="Clique aqui para download",
-                        data=csv,
-                        file_name=f"metas_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv"
-                    )
-                    
-            else:
-                st.info("Nenhuma meta encontrada para gerar relatórios.")
+                dept_stats = gestor.resumo_por_dimensao('department', incluir_arquivo).round(1)
                 
-        except Exception as e:
-            st.error(f"Erro ao gerar relatório: {e}")
+                dept_stats.columns = ['Total Metas', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx', 'Concluídas']
+                dept_stats['Taxa Sucesso %'] = (dept_stats['Concluídas'] / dept_stats['Total Metas'] * 100).round(1)
+                dept_stats = dept_stats.join(colunas_percentis(gestor, 'department', incluir_arquivo))
+                
+                st.dataframe(dept_stats, use_container_width=True)
+            
+            elif report_type == "Por Status":
+                st.markdown("### 📊 Relatório por Status")
+                
+                status_stats = status_stats.drop(columns='concluidas').round(1)
+                
+                status_stats.columns = ['Quantidade', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx']
+                status_stats['Percentual %'] = (status_stats['Quantidade'] / total_metas * 100).round(1)
+                status_stats = status_stats.join(colunas_percentis(gestor, 'status', incluir_arquivo))
+                
+                st.dataframe(status_stats, use_container_width=True)
+            
+            elif report_type == "Por Funcionário":
+                st.markdown("### 👤 Relatório por Funcionário")
+                
+                employee_stats = gestor.resumo_por_dimensao('employee', incluir_arquivo).round(1)
+                
+                employee_stats.columns = ['Total Metas', 'Progresso Médio', 'Progresso Mín', 'Progresso Máx', 'Concluídas']
+                employee_stats['Taxa Sucesso %'] = (employee_stats['Concluídas'] / employee_stats['Total Metas'] * 100).round(1)
+                
+                st.dataframe(employee_stats, use_container_width=True)
+            
+            elif report_type == "Evolução por Departamento":
+                st.markdown("### 📉 Evolução do Progresso por Departamento")
+                
+                col_inicio, col_fim, col_freq = st.columns(3)
+                with col_inicio:
+                    inicio = st.date_input("De", value=datetime.now().date() - timedelta(days=90))
+                with col_fim:
+                    fim = st.date_input("Até", value=datetime.now().date())
+                with col_freq:
+                    frequencia = st.selectbox("Frequência", list(FREQUENCIAS_HISTORICO), index=1)
+                
+                # Montada a partir do histórico de alterações, sem ler a tabela de metas
+                if inicio <= fim:
+                    tendencia = tendencia_departamentos(gestor, inicio, fim, FREQUENCIAS_HISTORICO[frequencia])
+                    st.line_chart(tendencia)
+                    st.caption("Progresso médio (%) das metas de cada departamento em cada data.")
+                else:
+                    st.warning("A data inicial deve ser anterior à final.")
+            
+            # Opção de download
+            st.markdown("---")
+            st.markdown("### 💾 Download de Dados")
+            download_dados(gestor, incluir_arquivo)
+                
+        else:
+            st.info("Nenhuma meta encontrada para gerar relatórios.")
+            
+    except Exception as e:
+        st.error(f"Erro ao gerar relatório: {e}")
+
+@medir_view("admin")
+def pagina_admin():
+    gestor = get_gestor()
+    registro = registrar_estado(gestor)
+    st.subheader("Diagnóstico do Sistema")
+    st.caption("Métricas deste processo desde a inicialização (ou desde a última vez que foram zeradas).")
+
+    st.markdown("### ⏱️ Páginas e Seções")
+    views = registro.resumo("metas_view_segundos")
+    if views.empty:
+        st.info("Nenhuma página medida ainda.")
+    else:
+        st.dataframe(views.sort_values("total_s", ascending=False).round(2), hide_index=True, use_container_width=True)
+
+    st.markdown("### 🗄️ Consultas do Banco")
+    consultas = registro.resumo("metas_consulta_segundos")
+    if consultas.empty:
+        st.info("Nenhuma consulta medida ainda.")
+    else:
+        linhas = {dict(rotulos)["operacao"]: valor
+                  for rotulos, valor in registro.contadores("metas_consulta_linhas_total").items()}
+        consultas["linhas_media"] = consultas["operacao"].map(linhas) / consultas["chamadas"]
+        st.dataframe(consultas.sort_values("total_s", ascending=False).round(2), hide_index=True, use_container_width=True)
+
+    st.markdown("### 🔎 Planos de Execução (amostrados)")
+    for operacao, plano in registro.planos().items():
+        with st.expander(f"{operacao} ({plano['segundos'] * 1000:.1f} ms)"):
+            st.code(plano["sql"], language="sql")
+            st.code(plano["plano"], language="text")
+
+    if INTERVALO_ATRASO > 0:
+        agendador = get_agendador()
+        if agendador.ultima_execucao:
+            st.caption(
+                f"⏰ Marcação de atrasadas: última execução em {agendador.ultima_execucao:%d/%m/%Y %H:%M}, "
+                f"{agendador.ultimas_marcadas} metas marcadas; repete a cada {INTERVALO_ATRASO // 60} min."
+            )
+
+    st.markdown("### 🔌 Pool de Conexões, Cache e Fila de Escrita")
+    col_pool, col_cache, col_fila = st.columns(3)
+    with col_pool:
+        st.json(gestor.estatisticas_pool())
+    with col_cache:
+        st.json(gestor.estatisticas_cache())
+    with col_fila:
+        if hasattr(gestor, "fila"):
+            st.json(gestor.fila.estatisticas())
+
+    st.markdown("### 🧮 Motor Analítico")
+    motor = get_gestor_relatorios().analitico
+    st.caption(f"Relatórios e Análise Geral usam o motor `{motor.nome}` (METAS_ANALITICO).")
+    if hasattr(motor, "copia"):
+        st.json(motor.copia.estatisticas())
+
+    st.markdown("### 📤 Exportação Prometheus")
+    col_baixar, col_gravar, col_zerar = st.columns(3)
+    with col_baixar:
+        st.download_button("📥 Baixar Métricas", data=registro.exportar_prometheus(),
+                           file_name="metricas.prom", mime="text/plain")
+    with col_gravar:
+        if st.button(f"💾 Gravar em {METRICAS_PATH_PADRAO}"):
+            st.success(f"Métricas gravadas em {registro.salvar_prometheus()}")
+    with col_zerar:
+        st.button("🧹 Zerar Métricas", on_click=registro.zerar)
+
+def main():
+    if INTERVALO_ATRASO > 0:
+        get_agendador()
+
+    # Só a página selecionada é executada a cada interação
+    pagina = st.navigation([
+        st.Page(pagina_adicionar, title="Adicionar Meta", icon="📝", url_path="adicionar", default=True),
+        st.Page(pagina_visualizar, title="Visualizar Metas", icon="📊", url_path="visualizar"),
+        st.Page(pagina_atualizar, title="Atualizar Meta", icon="🔄", url_path="atualizar"),
+        st.Page(pagina_diagnostico, title="Diagnóstico", icon="🔍", url_path="diagnostico"),
+        st.Page(pagina_relatorios, title="Relatórios", icon="📈", url_path="relatorios"),
+        st.Page(pagina_admin, title="Diagnóstico do Sistema", icon="🛠️", url_path="admin"),
+    ], position="top")
+    pagina.run()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+"""Camada de dados do Sistema de Gestão de Metas."""
+from .banco import PoolConexoes, PoolSnapshot, get_pool
+from .gestor import DEPARTAMENTOS, STATUS, GestorMetas
+
+__all__ = ["DEPARTAMENTOS", "STATUS", "GestorMetas", "PoolConexoes", "PoolSnapshot", "get_pool"]
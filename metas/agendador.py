@@ -0,0 +1,103 @@
+"""Marcação periódica das metas vencidas como "Atrasada".
+
+Roda dentro do processo da interface ou da API (``AgendadorAtrasos``, que
+a cada ciclo também cria o checkpoint do histórico quando necessário) ou
+pela linha de comando, para agendamento externo com cron::
+
+    python -m metas.agendador --db metas.db
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+
+from .gestor import GestorMetas
+from .historico import checkpoint_se_necessario
+from .metricas import get_registro
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre execuções no processo, em segundos; 0 desativa (METAS_INTERVALO_ATRASO)
+INTERVALO_PADRAO = int(os.environ.get("METAS_INTERVALO_ATRASO", "3600"))
+
+
+def marcar_atrasadas(gestor, hoje=None):
+    """Executa uma marcação, registra o resultado no log e nas métricas e retorna os IDs alterados."""
+    inicio = time.perf_counter()
+    marcadas = gestor.marcar_atrasadas(hoje)
+    segundos = time.perf_counter() - inicio
+    get_registro().incrementar("metas_marcadas_atrasadas_total", len(marcadas))
+    logger.info("%d metas marcadas como Atrasada em %.3fs", len(marcadas), segundos)
+    if marcadas:
+        logger.debug("Metas marcadas como Atrasada: %s", marcadas)
+    return marcadas
+
+
+class AgendadorAtrasos:
+    """Thread em segundo plano que executa ``marcar_atrasadas`` a cada ``intervalo`` segundos.
+
+    Depois de cada marcação, cria um checkpoint do histórico se já houver
+    eventos suficientes desde o último.
+    """
+
+    def __init__(self, gestor, intervalo=INTERVALO_PADRAO):
+        self.gestor = gestor
+        self.intervalo = intervalo
+        self.ultima_execucao = None
+        self.ultimas_marcadas = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name="agendador-atrasos", daemon=True)
+            self._thread.start()
+        return self
+
+    def _executar(self):
+        while True:
+            try:
+                self.ultimas_marcadas = len(marcar_atrasadas(self.gestor))
+                self.ultima_execucao = datetime.now()
+                checkpoint = checkpoint_se_necessario(self.gestor)
+                if checkpoint is not None:
+                    logger.info("Checkpoint %d do histórico criado", checkpoint)
+            except Exception:
+                logger.exception("Falha ao marcar metas atrasadas")
+            if self._parar.wait(self.intervalo):
+                return
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Marca como "Atrasada" as metas em andamento com prazo vencido.')
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--hoje", type=date.fromisoformat, default=None,
+                        help="data de referência AAAA-MM-DD, na execução única (padrão: hoje)")
+    parser.add_argument("--intervalo", type=int, default=0,
+                        help="repete a cada N segundos em vez de executar uma vez (padrão: 0)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    gestor = GestorMetas(args.db)
+    if not args.intervalo:
+        marcar_atrasadas(gestor, args.hoje)
+        return 0
+    agendador = AgendadorAtrasos(gestor, args.intervalo).iniciar()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        agendador.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
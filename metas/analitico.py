@@ -0,0 +1,510 @@
+"""Motores analíticos dos relatórios e da Análise Geral.
+
+O SQLite continua sendo o banco transacional; os agrupamentos, percentis e
+tendências sobre todas as metas passam pelo motor escolhido em
+``METAS_ANALITICO``:
+
+- ``sqlite`` (padrão): as metas são carregadas do SQLite para o pandas e
+  agregadas lá; os percentis vêm do histograma de ``resumo_progresso``;
+- ``arrow``: uma cópia colunar (Parquet) das metas, consultada com
+  ``pyarrow.compute``;
+- ``duckdb``: a mesma cópia, consultada com SQL pelo DuckDB.
+
+A cópia fica ao lado do banco (``<banco>.analitico.parquet``). Quando fica
+mais velha que ``METAS_ANALITICO_SEGUNDOS`` e os dados mudaram, uma nova é
+gerada em segundo plano; até lá as consultas continuam lendo a anterior.
+
+Uso pela linha de comando (gera a cópia agora, por exemplo pelo cron)::
+
+    python -m metas.analitico --db metas.db
+"""
+import argparse
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .banco import DB_PATH_PADRAO
+from .diagnostico import PROGRESSO_CRITICO, PROGRESSO_DESTAQUE, PROGRESSO_MUITO_BAIXO, STATUS_ATIVOS
+from .gestor import STATUS, GestorMetas
+from .metricas import instrumentar
+
+BACKEND_PADRAO = os.environ.get("METAS_ANALITICO", "sqlite")
+# Idade mínima da cópia colunar, em segundos, antes de ser regenerada
+INTERVALO_COPIA_PADRAO = int(os.environ.get("METAS_ANALITICO_SEGUNDOS", "300"))
+PERCENTIS = (0.25, 0.5, 0.75, 0.9)
+TAMANHO_BLOCO_COPIA = 200_000
+
+COLUNAS_CRITICAS = ["id", "employee_name", "department", "goal_description", "status", "progress",
+                    "start_date", "end_date", "alerta"]
+COLUNAS_DESTAQUE = ["id", "employee_name", "goal_description", "progress"]
+
+_copias = {}
+_lock_copias = threading.Lock()
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Os motores analíticos 'arrow' e 'duckdb' requerem o pacote 'pyarrow'.") from e
+    return pa, pc, pq
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("O motor analítico 'duckdb' requer o pacote 'duckdb'.") from e
+    return duckdb
+
+
+class CopiaColunar:
+    """Cópia colunar das metas de um banco, em Parquet, servida como tabela Arrow em memória.
+
+    Departamento e status são colunas de dicionário e as datas, ``date32``,
+    convertidos direto dos códigos gravados no SQLite. A versão dos dados
+    copiada fica nos metadados do arquivo, que é reaproveitado por outros
+    processos enquanto continuar atual.
+    """
+
+    def __init__(self, db_path, intervalo=INTERVALO_COPIA_PADRAO):
+        self.db_path = db_path
+        self.caminho = f"{db_path}.analitico.parquet"
+        self.intervalo = intervalo
+        self.versao = None
+        self.gerada_em = None
+        self.segundos_geracao = None
+        self._verificada_em = 0.0
+        self._tabela = None
+        self._geracao = None
+        self._lock = threading.Lock()
+
+    def tabela(self, pool):
+        """Retorna ``(tabela, versao)``; a primeira chamada carrega ou gera a cópia."""
+        with self._lock:
+            if self._tabela is None:
+                self._carregar(pool)
+            elif (time.time() - self._verificada_em >= self.intervalo
+                  and not (self._geracao and self._geracao.is_alive())):
+                self._verificada_em = time.time()
+                if _versao_dados(pool) != self.versao:
+                    self._geracao = threading.Thread(target=self.atualizar, args=(pool,),
+                                                     name="copia-analitica", daemon=True)
+                    self._geracao.start()
+            return self._tabela, self.versao
+
+    def _carregar(self, pool):
+        _pa, _pc, pq = _pyarrow()
+        if os.path.exists(self.caminho):
+            metadados = pq.read_schema(self.caminho).metadata or {}
+            if metadados.get(b"versao_dados") == str(_versao_dados(pool)).encode():
+                self._tabela = pq.read_table(self.caminho, memory_map=True)
+                self.versao = int(metadados[b"versao_dados"])
+                self.gerada_em = self._verificada_em = os.path.getmtime(self.caminho)
+                return
+        self._publicar(*self._gerar(pool))
+
+    def atualizar(self, pool):
+        """Gera a cópia a partir do banco agora e retorna a versão dos dados copiada."""
+        versao, tabela, segundos = self._gerar(pool)
+        with self._lock:
+            self._publicar(versao, tabela, segundos)
+        return versao
+
+    def _publicar(self, versao, tabela, segundos):
+        self._tabela, self.versao, self.segundos_geracao = tabela, versao, segundos
+        self.gerada_em = self._verificada_em = time.time()
+
+    def _gerar(self, pool):
+        pa, _pc, pq = _pyarrow()
+        inicio = time.perf_counter()
+        blocos = []
+        with pool.conexao() as conn:
+            # Versão e linhas lidas na mesma transação de leitura
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            versao = conn.execute('SELECT versao FROM versao_dados WHERE id = 1').fetchone()[0]
+            dominios = {tabela: pd.read_sql_query(f'SELECT id, nome FROM {tabela} ORDER BY id', conn)
+                        for tabela in ("departamentos", "status_metas")}
+            for bloco in pd.read_sql_query(
+                'SELECT id, employee_name, department_id, goal_description, start_day, end_day, status_id, '
+                'progress, completion_day FROM metas ORDER BY id', conn, chunksize=TAMANHO_BLOCO_COPIA,
+            ):
+                blocos.append(_bloco_arrow(pa, bloco, dominios))
+        if blocos:
+            tabela = pa.concat_tables(blocos)
+        else:
+            tabela = _bloco_arrow(pa, pd.DataFrame(columns=[
+                "id", "employee_name", "department_id", "goal_description", "start_day", "end_day",
+                "status_id", "progress", "completion_day"]), dominios)
+        tabela = tabela.replace_schema_metadata({"versao_dados": str(versao)})
+
+        # Gravação atômica: outros processos nunca leem um arquivo pela metade
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.caminho)),
+                                                 suffix=".parquet.tmp")
+        os.close(descritor)
+        try:
+            pq.write_table(tabela, temporario)
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return versao, tabela, time.perf_counter() - inicio
+
+    def idade(self):
+        """Segundos desde a geração da cópia servida (None antes da primeira)."""
+        return None if self.gerada_em is None else time.time() - self.gerada_em
+
+    def estatisticas(self):
+        """Versão, idade, linhas, tamanho em disco e tempo da última geração da cópia."""
+        with self._lock:
+            return {
+                "caminho": self.caminho,
+                "versao_dados": self.versao,
+                "idade": self.idade(),
+                "linhas": None if self._tabela is None else self._tabela.num_rows,
+                "bytes": os.path.getsize(self.caminho) if os.path.exists(self.caminho) else None,
+                "segundos_geracao": self.segundos_geracao,
+                "gerando": bool(self._geracao and self._geracao.is_alive()),
+            }
+
+
+def _versao_dados(pool):
+    with pool.conexao() as conn:
+        return conn.execute('SELECT versao FROM versao_dados WHERE id = 1').fetchone()[0]
+
+
+def _bloco_arrow(pa, bloco, dominios):
+    """Converte um bloco lido do SQLite (ids e números de dia) em tabela Arrow."""
+    def dicionario(codigos, dominio):
+        indices = pd.Index(dominio["id"]).get_indexer(codigos.astype("int64"))
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(dominio["nome"], pa.string()))
+
+    def datas(dias):
+        return pa.array(dias.astype("Int32"), pa.int32(), from_pandas=True).cast(pa.date32())
+
+    return pa.table({
+        "id": pa.array(bloco["id"], pa.int64()),
+        "employee_name": pa.array(bloco["employee_name"], pa.string()),
+        "department": dicionario(bloco["department_id"], dominios["departamentos"]),
+        "goal_description": pa.array(bloco["goal_description"], pa.string()),
+        "start_date": datas(bloco["start_day"]),
+        "end_date": datas(bloco["end_day"]),
+        "status": dicionario(bloco["status_id"], dominios["status_metas"]),
+        "progress": pa.array(bloco["progress"], pa.int64()),
+        "completion_date": datas(bloco["completion_day"]),
+    })
+
+
+def get_copia(db_path=None, intervalo=INTERVALO_COPIA_PADRAO):
+    """Retorna a cópia colunar compartilhada do banco ``db_path``."""
+    db_path = os.path.abspath(db_path or DB_PATH_PADRAO)
+    with _lock_copias:
+        if db_path not in _copias:
+            _copias[db_path] = CopiaColunar(db_path, intervalo)
+        return _copias[db_path]
+
+
+def _percentis(histograma, dimensao, percentis=PERCENTIS):
+    """Total, média e percentis (interpolação linear) de cada grupo a partir do histograma de progresso.
+
+    ``histograma`` tem as colunas ``chave``, ``progress`` e ``total``; como o
+    progresso é um inteiro de 0 a 100, o resultado é exato com poucas linhas.
+    """
+    linhas = {}
+    for chave, grupo in histograma.sort_values(["chave", "progress"]).groupby("chave", sort=True):
+        valores = grupo["progress"].to_numpy(dtype=float)
+        acumulado = grupo["total"].to_numpy().cumsum()
+        total = int(acumulado[-1])
+        linha = {"total": total, "media": float((valores * grupo["total"].to_numpy()).sum() / total)}
+        for p in percentis:
+            posicao = p * (total - 1)
+            baixo, alto = (valores[np.searchsorted(acumulado, k, side="right")]
+                           for k in (math.floor(posicao), math.ceil(posicao)))
+            linha[f"p{round(p * 100)}"] = baixo + (alto - baixo) * (posicao - math.floor(posicao))
+        linhas[chave] = linha
+    colunas = ["total", "media", *(f"p{round(p * 100)}" for p in percentis)]
+    return pd.DataFrame.from_dict(linhas, orient="index", columns=colunas).rename_axis(dimensao)
+
+
+class MotorAnalitico:
+    """Consultas analíticas sobre todas as metas; cada subclasse é um motor de ``METAS_ANALITICO``.
+
+    Os resultados ficam no cache de snapshots do gestor, como as demais
+    consultas.
+    """
+
+    nome = None
+
+    def __init__(self, gestor):
+        self.gestor = gestor
+        self.pool = gestor.pool
+
+    def _dados(self):
+        """Dados lidos pelo motor e a sua versão, somada à chave do cache."""
+        return None, None
+
+    def _snapshot(self, chave, carregar):
+        # Os dados são obtidos uma vez por consulta: a versão da chave é a dos dados passados a carregar
+        dados, versao = self._dados()
+        return self.gestor._snapshot((f"analitico_{self.nome}", versao) + chave, lambda: carregar(dados))
+
+    @instrumentar
+    def visao_geral(self):
+        """``total``, contagens ``status`` e ``department`` (maiores primeiro) e progresso médio, mínimo e máximo."""
+        return self._snapshot(("visao_geral",), self._visao_geral)
+
+    @instrumentar
+    def metas_criticas(self):
+        """Metas ativas com progresso abaixo de ``PROGRESSO_CRITICO``, com o código do alerta (``COLUNAS_CRITICAS``)."""
+        return self._snapshot(("metas_criticas",), self._metas_criticas)
+
+    @instrumentar
+    def metas_destaque(self):
+        """Metas com progresso a partir de ``PROGRESSO_DESTAQUE`` (``COLUNAS_DESTAQUE``)."""
+        return self._snapshot(("metas_destaque",), self._metas_destaque)
+
+    @instrumentar
+    def percentis_progresso(self, dimensao, incluir_arquivo=False):
+        """Total, média e percentis de progresso por ``department`` ou ``status``.
+
+        Com ``incluir_arquivo``, o histograma das metas arquivadas é somado ao
+        das metas da tabela viva.
+        """
+        if dimensao not in ("department", "status"):
+            raise ValueError(f"Dimensão de percentis inválida: {dimensao}")
+
+        def carregar(dados):
+            histograma = self._histograma_progresso(dados, dimensao)
+            if incluir_arquivo:
+                arquivo = self.gestor.histograma_arquivo(dimensao)[["chave", "progress", "total"]]
+                histograma = pd.concat([histograma, arquivo], ignore_index=True)
+            return _percentis(histograma, dimensao)
+        return self._snapshot(("percentis_progresso", dimensao, incluir_arquivo), carregar)
+
+    @instrumentar
+    def prazos_por_mes(self, incluir_arquivo=False):
+        """Metas por mês de vencimento (linhas, primeiro dia do mês) e status (colunas).
+
+        Com ``incluir_arquivo``, soma as metas arquivadas de cada mês.
+        """
+        def carregar(dados):
+            prazos = self._prazos_por_mes(dados).reindex(columns=STATUS, fill_value=0)
+            if incluir_arquivo:
+                prazos = prazos.add(self.gestor.prazos_arquivo().reindex(columns=STATUS, fill_value=0), fill_value=0)
+            return prazos.astype("int64").rename_axis(index="mes", columns="status")
+        return self._snapshot(("prazos_por_mes", incluir_arquivo), carregar)
+
+    @staticmethod
+    def _contagens(serie):
+        contagens = serie[serie > 0].sort_values(ascending=False, kind="stable")
+        return {str(chave): int(total) for chave, total in contagens.items()}
+
+
+class MotorSQLite(MotorAnalitico):
+    """Agrega no pandas as metas lidas do SQLite (``get_all_metas``)."""
+
+    nome = "sqlite"
+
+    def _visao_geral(self, _dados):
+        df = self.gestor.get_all_metas()
+        return {
+            "total": len(df),
+            "status": self._contagens(df["status"].value_counts()),
+            "department": self._contagens(df["department"].value_counts()),
+            "progresso_medio": float(df["progress"].mean()) if len(df) else 0.0,
+            "progresso_min": int(df["progress"].min()) if len(df) else 0,
+            "progresso_max": int(df["progress"].max()) if len(df) else 0,
+        }
+
+    def _metas_criticas(self, _dados):
+        df = self.gestor.get_all_metas()
+        criticas = df[df["status"].isin(STATUS_ATIVOS) & (df["progress"] < PROGRESSO_CRITICO)].copy()
+        criticas["alerta"] = np.where(criticas["progress"] < PROGRESSO_MUITO_BAIXO, "muito_baixo", "acelerar")
+        return criticas[COLUNAS_CRITICAS].reset_index(drop=True)
+
+    def _metas_destaque(self, _dados):
+        df = self.gestor.get_all_metas()
+        return df.loc[df["progress"] >= PROGRESSO_DESTAQUE, COLUNAS_DESTAQUE].reset_index(drop=True)
+
+    def _histograma_progresso(self, _dados, dimensao):
+        # O histograma já é mantido pelos triggers em resumo_progresso
+        with self.pool.conexao() as conn:
+            return pd.read_sql_query('''
+                SELECT chave, progress, SUM(total) AS total FROM resumo_progresso
+                WHERE dimensao = ? AND total > 0 GROUP BY chave, progress
+            ''', conn, params=(dimensao,))
+
+    def _prazos_por_mes(self, _dados):
+        df = self.gestor.get_all_metas()
+        mes = df["end_date"].dt.to_period("M").dt.to_timestamp()
+        return df.groupby([mes, "status"], observed=False).size().unstack(fill_value=0)
+
+
+class MotorColunar(MotorAnalitico):
+    """Base dos motores que leem a cópia colunar compartilhada."""
+
+    def __init__(self, gestor, copia=None):
+        super().__init__(gestor)
+        self.copia = copia or get_copia(gestor.db_path)
+
+    def _dados(self):
+        return self.copia.tabela(self.pool)
+
+
+class MotorArrow(MotorColunar):
+    """Consulta a cópia colunar com ``pyarrow.compute``."""
+
+    nome = "arrow"
+
+    def _visao_geral(self, tabela):
+        _pa, pc, _pq = _pyarrow()
+        contagens = {}
+        for coluna in ("status", "department"):
+            agrupado = tabela.group_by(coluna).aggregate([("id", "count")]).to_pandas()
+            contagens[coluna] = self._contagens(agrupado.set_index(agrupado[coluna].astype(str))["id_count"])
+        progresso = tabela["progress"]
+        minimo_maximo = pc.min_max(progresso).as_py()
+        return {
+            "total": tabela.num_rows,
+            **contagens,
+            "progresso_medio": pc.mean(progresso).as_py() or 0.0,
+            "progresso_min": minimo_maximo["min"] or 0,
+            "progresso_max": minimo_maximo["max"] or 0,
+        }
+
+    def _metas_criticas(self, tabela):
+        pa, pc, _pq = _pyarrow()
+        status = pc.cast(tabela["status"], pa.string())
+        mascara = pc.and_(pc.is_in(status, value_set=pa.array(STATUS_ATIVOS)),
+                          pc.less(tabela["progress"], PROGRESSO_CRITICO))
+        criticas = tabela.filter(mascara).select(COLUNAS_CRITICAS[:-1]).to_pandas(date_as_object=False)
+        criticas["alerta"] = np.where(criticas["progress"] < PROGRESSO_MUITO_BAIXO, "muito_baixo", "acelerar")
+        return criticas
+
+    def _metas_destaque(self, tabela):
+        _pa, pc, _pq = _pyarrow()
+        return tabela.filter(pc.greater_equal(tabela["progress"], PROGRESSO_DESTAQUE)).select(COLUNAS_DESTAQUE).to_pandas()
+
+    def _histograma_progresso(self, tabela, dimensao):
+        agrupado = tabela.group_by([dimensao, "progress"]).aggregate([("id", "count")]).to_pandas()
+        return pd.DataFrame({"chave": agrupado[dimensao].astype(str), "progress": agrupado["progress"],
+                             "total": agrupado["id_count"]})
+
+    def _prazos_por_mes(self, tabela):
+        pa, pc, _pq = _pyarrow()
+        meses = pa.table({"mes": pc.floor_temporal(tabela["end_date"], unit="month"), "status": tabela["status"],
+                          "id": tabela["id"]})
+        agrupado = meses.group_by(["mes", "status"]).aggregate([("id", "count")]).to_pandas(date_as_object=False)
+        return agrupado.pivot_table(index="mes", columns="status", values="id_count", fill_value=0,
+                                    observed=False).sort_index()
+
+
+class MotorDuckDB(MotorColunar):
+    """Consulta a cópia colunar com SQL pelo DuckDB (a tabela Arrow é lida sem cópia)."""
+
+    nome = "duckdb"
+
+    def _consultar(self, tabela, sql, params=None):
+        duckdb = _duckdb()
+        # Uma conexão em memória por consulta: as conexões do DuckDB não são compartilháveis entre threads
+        with duckdb.connect() as conn:
+            conn.register("metas", tabela)
+            return conn.execute(sql, params or []).df()
+
+    def _visao_geral(self, tabela):
+        contagens = {
+            coluna: self._contagens(self._consultar(tabela,
+                f'SELECT CAST({coluna} AS VARCHAR) AS chave, COUNT(*) AS total FROM metas GROUP BY 1'
+            ).set_index("chave")["total"])
+            for coluna in ("status", "department")
+        }
+        total, media, minimo, maximo = self._consultar(tabela,
+            'SELECT COUNT(*), AVG(progress), MIN(progress), MAX(progress) FROM metas'
+        ).iloc[0]
+        return {
+            "total": int(total),
+            **contagens,
+            "progresso_medio": 0.0 if pd.isna(media) else float(media),
+            "progresso_min": 0 if pd.isna(minimo) else int(minimo),
+            "progresso_max": 0 if pd.isna(maximo) else int(maximo),
+        }
+
+    def _metas_criticas(self, tabela):
+        marcadores = ", ".join("?" for _ in STATUS_ATIVOS)
+        return self._consultar(tabela, f'''
+            SELECT id, employee_name, department, goal_description, status, progress,
+                   CAST(start_date AS TIMESTAMP) AS start_date, CAST(end_date AS TIMESTAMP) AS end_date,
+                   CASE WHEN progress < ? THEN 'muito_baixo' ELSE 'acelerar' END AS alerta
+            FROM metas WHERE CAST(status AS VARCHAR) IN ({marcadores}) AND progress < ?
+            ORDER BY id
+        ''', [PROGRESSO_MUITO_BAIXO, *STATUS_ATIVOS, PROGRESSO_CRITICO])
+
+    def _metas_destaque(self, tabela):
+        return self._consultar(tabela,
+            'SELECT id, employee_name, goal_description, progress FROM metas WHERE progress >= ? ORDER BY id',
+            [PROGRESSO_DESTAQUE],
+        )
+
+    def _histograma_progresso(self, tabela, dimensao):
+        return self._consultar(tabela,
+            f'SELECT CAST({dimensao} AS VARCHAR) AS chave, progress, COUNT(*) AS total FROM metas GROUP BY 1, 2'
+        )
+
+    def _prazos_por_mes(self, tabela):
+        agrupado = self._consultar(tabela, '''
+            SELECT CAST(date_trunc('month', end_date) AS TIMESTAMP) AS mes, CAST(status AS VARCHAR) AS status,
+                   COUNT(*) AS total
+            FROM metas GROUP BY 1, 2
+        ''')
+        return agrupado.pivot_table(index="mes", columns="status", values="total", fill_value=0).sort_index()
+
+
+MOTORES = {"sqlite": MotorSQLite, "arrow": MotorArrow, "duckdb": MotorDuckDB}
+
+
+def criar_motor(gestor, backend=None):
+    """Cria o motor analítico ``backend`` (padrão: ``METAS_ANALITICO``) para o gestor."""
+    backend = backend or BACKEND_PADRAO
+    if backend not in MOTORES:
+        raise ValueError(f"Motor analítico inválido: {backend} (use {', '.join(MOTORES)})")
+    return MOTORES[backend](gestor)
+
+
+def disponiveis():
+    """Motores cujas dependências estão instaladas."""
+    motores = ["sqlite"]
+    for backend, requisitos in (("arrow", (_pyarrow,)), ("duckdb", (_pyarrow, _duckdb))):
+        try:
+            for requisito in requisitos:
+                requisito()
+        except RuntimeError:
+            continue
+        motores.append(backend)
+    return motores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera a cópia colunar das metas usada pelos motores analíticos.")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    args = parser.parse_args(argv)
+
+    gestor = GestorMetas(args.db)
+    copia = get_copia(gestor.db_path)
+    copia.atualizar(gestor.pool)
+    estatisticas = copia.estatisticas()
+    print(f"Cópia de {estatisticas['linhas']} metas (versão {estatisticas['versao_dados']}) gravada em "
+          f"{estatisticas['caminho']} em {estatisticas['segundos_geracao']:.1f}s "
+          f"({estatisticas['bytes'] / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
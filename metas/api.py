@@ -0,0 +1,372 @@
+"""API HTTP/JSON local sobre o ``GestorMetas`` para integrações.
+
+Servidor asyncio da biblioteca padrão, com conexões keep-alive. O acesso ao
+SQLite roda em um pool de threads do tamanho do pool de conexões, então cada
+requisição reaproveita uma conexão aberta e o laço de eventos não bloqueia.
+As leituras passam pelo cache de snapshots do gestor; os endpoints de lote
+gravam muitas metas em uma única transação.
+
+Endpoints (corpo e respostas em JSON):
+
+- ``GET /saude``: versão dos dados e estatísticas do pool e do cache
+- ``GET /metas``: página de metas; filtros ``department``, ``status``,
+  ``employee``, ``end_date_from``, ``end_date_to`` e paginação por
+  ``after_id``/``limit`` (a resposta traz ``proximo`` para a página seguinte)
+- ``GET /metas/{id}``: meta completa, com diagnóstico e sugestões
+- ``POST /metas``: cria uma meta e retorna o ``id``
+- ``PATCH /metas/{id}`` e ``DELETE /metas/{id}``
+- ``POST /metas/lote``: cria várias metas (lista de objetos)
+- ``PATCH /metas/lote``: atualiza várias metas (lista de objetos com ``id``)
+- ``GET /busca?q=``: busca por funcionário, descrição ou ID
+- ``GET /resumo``: contagens e progresso médio, com os filtros de ``/metas``
+- ``GET /relatorios/{department|status|employee}``: resumo por dimensão;
+  ``incluir_arquivo=1`` soma as metas arquivadas
+- ``GET /diagnosticos/departamentos``: problemas do diagnóstico individual por departamento
+
+Uso pela linha de comando::
+
+    python -m metas.api --host 127.0.0.1 --porta 8765 --db metas.db
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from .agendador import INTERVALO_PADRAO as INTERVALO_ATRASO, AgendadorAtrasos
+from .fila_escrita import GestorComFila
+from .gestor import DEPARTAMENTOS, STATUS, TAMANHO_PAGINA_PADRAO
+from .importacao import validar_bloco
+
+logger = logging.getLogger(__name__)
+
+PORTA_PADRAO = 8765
+MAX_CORPO_BYTES = 16 * 1024 * 1024
+MAX_PAGINA = 1000
+MAX_LOTE = 10_000
+FILTROS = ("department", "status", "employee", "end_date_from", "end_date_to")
+CAMPOS_ATUALIZAVEIS = ("employee_name", "department", "goal_description", "start_date",
+                       "end_date", "status", "progress", "completion_date")
+
+
+class ErroHTTP(Exception):
+    """Erro com o código HTTP a ser devolvido ao cliente."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _registros(df, indice=None):
+    """Converte um DataFrame em lista de dicionários serializáveis (NaN vira null)."""
+    if indice is not None:
+        df = df.reset_index(names=indice)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _filtros(params):
+    return {nome: params[nome] for nome in FILTROS if params.get(nome)}
+
+
+def _inteiro(valor, nome, minimo=0, maximo=None):
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ErroHTTP(400, f"'{nome}' deve ser um número inteiro") from None
+    if numero < minimo or (maximo is not None and numero > maximo):
+        raise ErroHTTP(400, f"'{nome}' fora do intervalo permitido")
+    return numero
+
+
+def _validar_atualizacao(campos):
+    """Valida os campos de uma atualização parcial contra os vocabulários de ``GestorMetas``."""
+    if not isinstance(campos, dict) or not campos:
+        raise ErroHTTP(400, "Informe ao menos um campo para atualizar")
+    desconhecidos = sorted(set(campos) - set(CAMPOS_ATUALIZAVEIS))
+    if desconhecidos:
+        raise ErroHTTP(400, f"Campos não atualizáveis: {', '.join(desconhecidos)}")
+    for campo in ("employee_name", "goal_description"):
+        if campo in campos and not (isinstance(campos[campo], str) and campos[campo].strip()):
+            raise ErroHTTP(400, f"'{campo}' não pode ser vazio")
+    if "department" in campos and campos["department"] not in DEPARTAMENTOS:
+        raise ErroHTTP(400, "departamento inválido")
+    if "status" in campos and campos["status"] not in STATUS:
+        raise ErroHTTP(400, "status inválido")
+    if "progress" in campos:
+        if isinstance(campos["progress"], bool):
+            raise ErroHTTP(400, "progresso inválido")
+        campos["progress"] = _inteiro(campos["progress"], "progress", 0, 100)
+    for campo in ("start_date", "end_date", "completion_date"):
+        if campo in campos and not (campo == "completion_date" and campos[campo] is None):
+            try:
+                campos[campo] = date.fromisoformat(str(campos[campo])).isoformat()
+            except ValueError:
+                raise ErroHTTP(400, f"data inválida em '{campo}'") from None
+    return campos
+
+
+def _lista(corpo, nome):
+    if not isinstance(corpo, list) or not corpo:
+        raise ErroHTTP(400, f"O corpo deve ser uma lista não vazia de {nome}")
+    if len(corpo) > MAX_LOTE:
+        raise ErroHTTP(413, f"Lote maior que o limite de {MAX_LOTE} itens")
+    return corpo
+
+
+# Handlers: (gestor, parâmetros da URL, corpo JSON, grupos da rota) -> (status, resposta)
+
+def _saude(gestor, params, corpo):
+    return 200, {
+        "versao_dados": gestor.versao_dados(),
+        "pool": gestor.estatisticas_pool(),
+        "cache": gestor.estatisticas_cache(),
+        **({"fila_escrita": gestor.fila.estatisticas()} if hasattr(gestor, "fila") else {}),
+    }
+
+
+def _listar_metas(gestor, params, corpo):
+    after_id = _inteiro(params.get("after_id", 0), "after_id")
+    limite = _inteiro(params.get("limit", TAMANHO_PAGINA_PADRAO), "limit", 1, MAX_PAGINA)
+    df, tem_proxima = gestor.pagina_metas(after_id, limite, **_filtros(params))
+    return 200, {
+        "metas": _registros(df),
+        "proximo": int(df["id"].iloc[-1]) if tem_proxima else None,
+    }
+
+
+def _obter_meta(gestor, params, corpo, meta_id):
+    meta = gestor.get_meta(int(meta_id))
+    if meta is None:
+        raise ErroHTTP(404, "Meta não encontrada")
+    meta.update(gestor.get_meta_detalhes(int(meta_id)))
+    return 200, meta
+
+
+def _criar_meta(gestor, params, corpo):
+    if not isinstance(corpo, dict):
+        raise ErroHTTP(400, "O corpo deve ser um objeto com os campos da meta")
+    validos, erros = validar_bloco(pd.DataFrame([corpo]))
+    if erros:
+        raise ErroHTTP(400, erros[0][1])
+    meta_id = gestor.add_meta(*next(validos.itertuples(index=False, name=None)))
+    return 201, {"id": meta_id}
+
+
+def _criar_metas_lote(gestor, params, corpo):
+    validos, erros = validar_bloco(pd.DataFrame(_lista(corpo, "metas")))
+    inseridas = gestor.add_metas_lote(validos.itertuples(index=False, name=None)) if not validos.empty else 0
+    return 200, {
+        "inseridas": inseridas,
+        "rejeitadas": len(erros),
+        "erros": [{"linha": linha, "motivo": motivo} for linha, motivo in erros],
+    }
+
+
+def _atualizar_meta(gestor, params, corpo, meta_id):
+    campos = _validar_atualizacao(corpo)
+    if hasattr(gestor, "fila"):
+        alteradas = gestor.fila.enviar("update_meta", (int(meta_id), campos)).result()
+    else:
+        alteradas = gestor.update_metas_lote([(int(meta_id), campos)])
+    if not alteradas:
+        raise ErroHTTP(404, "Meta não encontrada")
+    return 200, {"id": int(meta_id)}
+
+
+def _atualizar_metas_lote(gestor, params, corpo):
+    atualizacoes = []
+    for posicao, item in enumerate(_lista(corpo, "atualizações"), start=1):
+        if not isinstance(item, dict) or "id" not in item:
+            raise ErroHTTP(400, f"Item {posicao}: informe o 'id' da meta")
+        campos = dict(item)
+        meta_id = _inteiro(campos.pop("id"), "id", 1)
+        try:
+            atualizacoes.append((meta_id, _validar_atualizacao(campos)))
+        except ErroHTTP as e:
+            raise ErroHTTP(e.status, f"Item {posicao}: {e.mensagem}") from None
+    return 200, {"alteradas": gestor.update_metas_lote(atualizacoes)}
+
+
+def _excluir_meta(gestor, params, corpo, meta_id):
+    if gestor.get_meta_by_id(int(meta_id)) is None:
+        raise ErroHTTP(404, "Meta não encontrada")
+    gestor.delete_meta(int(meta_id))
+    return 200, {"id": int(meta_id)}
+
+
+def _buscar(gestor, params, corpo):
+    limite = _inteiro(params.get("limite", 20), "limite", 1, MAX_PAGINA)
+    return 200, {"metas": gestor.buscar_metas(params.get("q", ""), limite)}
+
+
+def _resumo(gestor, params, corpo):
+    return 200, gestor.resumo_metas(**_filtros(params))
+
+
+def _relatorio(gestor, params, corpo, dimensao):
+    try:
+        df = gestor.resumo_por_dimensao(dimensao, params.get("incluir_arquivo") in ("1", "true"))
+    except ValueError as e:
+        raise ErroHTTP(404, str(e)) from None
+    return 200, {"dimensao": dimensao, "grupos": _registros(df, indice="chave")}
+
+
+def _diagnosticos_departamentos(gestor, params, corpo):
+    return 200, {"departamentos": _registros(gestor.contagem_diagnosticos_por_departamento(), indice="department")}
+
+
+ROTAS = [
+    ("GET", r"/saude", _saude),
+    ("GET", r"/metas", _listar_metas),
+    ("POST", r"/metas", _criar_meta),
+    ("POST", r"/metas/lote", _criar_metas_lote),
+    ("PATCH", r"/metas/lote", _atualizar_metas_lote),
+    ("GET", r"/metas/(\d+)", _obter_meta),
+    ("PATCH", r"/metas/(\d+)", _atualizar_meta),
+    ("DELETE", r"/metas/(\d+)", _excluir_meta),
+    ("GET", r"/busca", _buscar),
+    ("GET", r"/resumo", _resumo),
+    ("GET", r"/relatorios/(\w+)", _relatorio),
+    ("GET", r"/diagnosticos/departamentos", _diagnosticos_departamentos),
+]
+_ROTAS = [(metodo, re.compile(padrao + r"/?"), handler) for metodo, padrao, handler in ROTAS]
+
+
+class ServidorAPI:
+    """Servidor HTTP/1.1 mínimo que despacha as rotas de ``ROTAS`` para o gestor."""
+
+    def __init__(self, gestor, max_threads=None):
+        self.gestor = gestor
+        # Uma thread por conexão ociosa do pool: as conexões são sempre reaproveitadas
+        self.executor = ThreadPoolExecutor(max_threads or gestor.pool.max_ociosas, thread_name_prefix="metas-api")
+
+    def despachar(self, metodo, alvo, corpo):
+        """Executa a rota de ``metodo``/``alvo`` e retorna ``(status, resposta)``."""
+        url = urlsplit(alvo)
+        params = dict(parse_qsl(url.query))
+        metodos_da_rota = []
+        for metodo_rota, padrao, handler in _ROTAS:
+            encontrado = padrao.fullmatch(url.path)
+            if not encontrado:
+                continue
+            if metodo_rota != metodo:
+                metodos_da_rota.append(metodo_rota)
+                continue
+            try:
+                dados = json.loads(corpo) if corpo else None
+                return handler(self.gestor, params, dados, *encontrado.groups())
+            except ErroHTTP as e:
+                return e.status, {"erro": e.mensagem}
+            except json.JSONDecodeError:
+                return 400, {"erro": "Corpo JSON inválido"}
+            except (ValueError, sqlite3.IntegrityError) as e:
+                return 400, {"erro": str(e)}
+            except Exception:
+                logger.exception("Erro ao processar %s %s", metodo, alvo)
+                return 500, {"erro": "Erro interno"}
+        if metodos_da_rota:
+            return 405, {"erro": f"Método não permitido; use {', '.join(metodos_da_rota)}"}
+        return 404, {"erro": "Rota não encontrada"}
+
+    async def tratar_conexao(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                requisicao = await self._ler_requisicao(reader)
+                if requisicao is None:
+                    break
+                metodo, alvo, corpo, manter = requisicao
+                status, resposta = await loop.run_in_executor(self.executor, self.despachar, metodo, alvo, corpo)
+                self._escrever_resposta(writer, status, resposta, manter)
+                await writer.drain()
+                if not manter:
+                    break
+        except ErroHTTP as e:
+            self._escrever_resposta(writer, e.status, {"erro": e.mensagem}, False)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _ler_requisicao(self, reader):
+        """Lê uma requisição; retorna ``(metodo, alvo, corpo, keep_alive)`` ou None no fim da conexão."""
+        linha = await reader.readline()
+        if not linha.strip():
+            return None
+        partes = linha.decode("latin-1").split()
+        if len(partes) != 3:
+            raise ErroHTTP(400, "Linha de requisição inválida")
+        metodo, alvo, versao = partes
+        cabecalhos = {}
+        while True:
+            linha = await reader.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        if "chunked" in cabecalhos.get("transfer-encoding", "").lower():
+            raise ErroHTTP(411, "Envie o corpo com Content-Length")
+        # Só dígitos ASCII: int() também aceitaria sinal, "_" e dígitos de outros alfabetos
+        comprimento = cabecalhos.get("content-length") or "0"
+        if not (comprimento.isascii() and comprimento.isdigit()):
+            raise ErroHTTP(400, "Content-Length inválido")
+        tamanho = int(comprimento)
+        if tamanho > MAX_CORPO_BYTES:
+            raise ErroHTTP(413, "Corpo maior que o limite permitido")
+        corpo = await reader.readexactly(tamanho) if tamanho else b""
+        conexao = cabecalhos.get("connection", "").lower()
+        manter = conexao == "keep-alive" if versao == "HTTP/1.0" else conexao != "close"
+        return metodo.upper(), alvo, corpo, manter
+
+    @staticmethod
+    def _escrever_resposta(writer, status, resposta, manter):
+        dados = json.dumps(resposta, ensure_ascii=False, default=str).encode("utf-8")
+        cabecalho = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(dados)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        )
+        writer.write(cabecalho.encode("latin-1") + dados)
+
+    async def servir(self, host="127.0.0.1", porta=PORTA_PADRAO):
+        servidor = await asyncio.start_server(self.tratar_conexao, host, porta)
+        enderecos = ", ".join(str(sock.getsockname()) for sock in servidor.sockets)
+        logger.info("API de metas escutando em %s", enderecos)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON local para integração com as metas.")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help=f"porta de escuta (padrão: {PORTA_PADRAO})")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads de acesso ao banco (padrão: tamanho do pool de conexões)")
+    parser.add_argument("--intervalo-atraso", type=int, default=INTERVALO_ATRASO,
+                        help=f"segundos entre as marcações de metas atrasadas; 0 desativa (padrão: {INTERVALO_ATRASO})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    gestor = GestorComFila(args.db)
+    if args.intervalo_atraso > 0:
+        AgendadorAtrasos(gestor, args.intervalo_atraso).iniciar()
+    servidor = ServidorAPI(gestor, args.threads)
+    try:
+        asyncio.run(servidor.servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
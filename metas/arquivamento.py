@@ -0,0 +1,86 @@
+"""Arquivamento das metas de ciclos encerrados.
+
+As metas "Concluída", "Não Concluída" e "Atrasada" com prazo anterior ao
+início do ciclo atual saem da tabela ``metas`` para ``metas_arquivo``, em
+lotes com uma transação cada (``GestorMetas.arquivar_metas``), e a tabela
+viva fica com o tamanho do ciclo corrente. As metas arquivadas continuam disponíveis
+nos relatórios e na exportação com a opção de incluir o arquivo. Roda pela
+linha de comando, uma vez (para agendamento externo com cron) ou a cada
+``--intervalo`` segundos::
+
+    python -m metas.arquivamento --db metas.db
+    python -m metas.arquivamento --antes 2025-01-01 --lote 10000
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import date
+
+from .gestor import TAMANHO_LOTE_ARQUIVO, GestorMetas
+from .metricas import get_registro
+
+logger = logging.getLogger(__name__)
+
+# Duração dos ciclos de metas em meses, contados a partir de janeiro (METAS_MESES_CICLO)
+MESES_CICLO_PADRAO = int(os.environ.get("METAS_MESES_CICLO", "12"))
+
+
+def inicio_ciclo(hoje=None, meses=MESES_CICLO_PADRAO):
+    """Primeiro dia do ciclo de ``meses`` meses que contém ``hoje``."""
+    if meses < 1 or 12 % meses:
+        raise ValueError(f"A duração do ciclo deve dividir o ano: {meses} meses")
+    hoje = hoje or date.today()
+    return date(hoje.year, (hoje.month - 1) // meses * meses + 1, 1)
+
+
+def arquivar(gestor, antes=None, tamanho_lote=TAMANHO_LOTE_ARQUIVO):
+    """Arquiva as metas de ciclos passados com prazo anterior a ``antes`` (padrão: início do ciclo atual).
+
+    Registra o resultado no log e nas métricas e retorna quantas metas
+    foram arquivadas.
+    """
+    corte = antes or inicio_ciclo()
+    inicio = time.perf_counter()
+    arquivadas = gestor.arquivar_metas(corte, tamanho_lote)
+    segundos = time.perf_counter() - inicio
+    get_registro().incrementar("metas_arquivadas_total", arquivadas)
+    logger.info("%d metas com prazo antes de %s arquivadas em %.3fs", arquivadas, corte, segundos)
+    return arquivadas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move as metas de ciclos encerrados para o arquivo.")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--antes", type=date.fromisoformat, default=None,
+                        help="data de corte AAAA-MM-DD, na execução única (padrão: início do ciclo atual)")
+    parser.add_argument("--meses-ciclo", type=int, default=MESES_CICLO_PADRAO,
+                        help=f"duração dos ciclos em meses (padrão: {MESES_CICLO_PADRAO})")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_ARQUIVO, help="metas por transação")
+    parser.add_argument("--intervalo", type=int, default=0,
+                        help="repete a cada N segundos em vez de executar uma vez (padrão: 0)")
+    args = parser.parse_args(argv)
+    try:
+        inicio_ciclo(meses=args.meses_ciclo)
+    except ValueError as erro:
+        parser.error(str(erro))
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    gestor = GestorMetas(args.db)
+    if not args.intervalo:
+        arquivar(gestor, args.antes or inicio_ciclo(meses=args.meses_ciclo), args.lote)
+        return 0
+    try:
+        while True:
+            try:
+                arquivar(gestor, inicio_ciclo(meses=args.meses_ciclo), args.lote)
+            except Exception:
+                logger.exception("Falha ao arquivar metas")
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
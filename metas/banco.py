@@ -0,0 +1,278 @@
+"""Pool de conexões SQLite compartilhado pelo processo."""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .metricas import captura_sql
+
+# Caminho padrão do banco; pode ser sobrescrito pela variável de ambiente METAS_DB_PATH
+DB_PATH_PADRAO = os.environ.get("METAS_DB_PATH", "metas.db")
+
+# Idade máxima do snapshot de leitura dos relatórios, em segundos (METAS_SNAPSHOT_SEGUNDOS)
+INTERVALO_SNAPSHOT_PADRAO = int(os.environ.get("METAS_SNAPSHOT_SEGUNDOS", "60"))
+
+# Pragmas aplicados uma única vez, quando a conexão é aberta
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+class PoolConexoes:
+    """Mantém conexões SQLite de longa duração para um arquivo de banco.
+
+    As conexões são emprestadas com ``conexao()`` e devolvidas ao final do
+    bloco ``with``. Como a conexão sobrevive entre chamadas, o cache de
+    statements preparados do módulo ``sqlite3`` é reaproveitado.
+    """
+
+    def __init__(self, db_path, max_ociosas=8, cached_statements=256, timeout=5.0):
+        self.db_path = db_path
+        self.max_ociosas = max_ociosas
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._ociosas = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.abertas = 0
+
+    def _abrir(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _emprestar(self):
+        with self._lock:
+            if self._ociosas:
+                self.hits += 1
+                return self._ociosas.pop()
+            self.misses += 1
+            self.abertas += 1
+        return self._abrir()
+
+    def _devolver(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append(conn)
+                return
+            self.abertas -= 1
+        conn.close()
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool pelo tempo do bloco ``with``.
+
+        Se a thread está com captura de SQL ativa (amostragem de planos do
+        ``metricas.instrumentar``), os statements executados são anotados.
+        """
+        conn = self._emprestar()
+        captura = captura_sql()
+        if captura is not None:
+            conn.set_trace_callback(captura.append)
+        try:
+            yield conn
+        finally:
+            if captura is not None:
+                conn.set_trace_callback(None)
+            self._devolver(conn)
+
+    @contextmanager
+    def transacao(self):
+        """Empresta uma conexão e executa o bloco dentro de uma transação."""
+        with self.conexao() as conn:
+            with conn:
+                yield conn
+
+    @contextmanager
+    def fixar(self):
+        """Bloco em que as leituras da thread devem ver um mesmo estado do banco.
+
+        No pool principal cada leitura já vê o estado mais recente; o
+        ``PoolSnapshot`` empresta a mesma conexão a todo o bloco.
+        """
+        yield
+
+    def estatisticas(self):
+        """Retorna os contadores de uso do pool."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "db_path": self.db_path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "abertas": self.abertas,
+                "ociosas": len(self._ociosas),
+            }
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas do pool."""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+            self.abertas -= len(ociosas)
+        for conn in ociosas:
+            conn.close()
+
+
+class PoolSnapshot(PoolConexoes):
+    """Pool somente leitura em que cada conexão mantém uma transação de leitura aberta.
+
+    No modo WAL, uma transação de leitura enxerga o banco como ele estava ao
+    começar, sem bloquear as escritas do pool principal nem ser bloqueada
+    por elas. As transações são renovadas quando o snapshot fica mais velho
+    que ``intervalo`` segundos ou quando ``atualizar()`` é chamado; até lá,
+    relatórios longos leem sempre o mesmo estado. Conexões ociosas de um
+    snapshot vencido têm a transação encerrada, para não impedir o
+    checkpoint do WAL enquanto ninguém lê.
+    """
+
+    def __init__(self, db_path, intervalo=INTERVALO_SNAPSHOT_PADRAO, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.intervalo = intervalo
+        self.atualizado_em = time.time()
+        # Conexão -> geração do snapshot em que a sua transação de leitura começou
+        self._geracoes = {}
+        self._fixadas = threading.local()
+        self._timer = None
+
+    def _abrir(self):
+        conn = super()._abrir()
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def atualizar(self):
+        """Faz as próximas leituras começarem um snapshot novo."""
+        with self._lock:
+            self.atualizado_em = time.time()
+            self._encerrar_vencidas()
+
+    def idade(self):
+        """Segundos desde o início do snapshot atual.
+
+        Cada conexão começa a sua transação no primeiro empréstimo da
+        geração, então nenhuma leitura vê dados mais antigos que isso.
+        """
+        return time.time() - self.atualizado_em
+
+    @contextmanager
+    def conexao(self):
+        fixada = getattr(self._fixadas, "conn", None)
+        if fixada is not None:
+            yield fixada
+            return
+        with super().conexao() as conn:
+            yield conn
+
+    @contextmanager
+    def fixar(self):
+        """Empresta uma conexão que atende todas as leituras da thread no bloco.
+
+        Sem isso, a versão dos dados e os dados lidos em seguida podem vir de
+        conexões que começaram o snapshot em momentos diferentes.
+        """
+        if getattr(self._fixadas, "conn", None) is not None:
+            yield
+            return
+        with self.conexao() as conn:
+            self._fixadas.conn = conn
+            try:
+                yield
+            finally:
+                self._fixadas.conn = None
+
+    def _vencida(self, conn):
+        return (self._geracoes.get(conn) != self.atualizado_em
+                or time.time() - self.atualizado_em >= self.intervalo)
+
+    def _encerrar_vencidas(self):
+        # Chamado com o lock: as conexões ociosas não estão em uso por ninguém
+        for conn in self._ociosas:
+            if conn in self._geracoes and self._vencida(conn):
+                conn.rollback()
+                del self._geracoes[conn]
+
+    def _expirar(self):
+        with self._lock:
+            self._timer = None
+            self._encerrar_vencidas()
+
+    def _agendar_expiracao(self):
+        # Chamado com o lock; um único timer por pool, no fim da geração atual
+        restante = self.atualizado_em + self.intervalo - time.time()
+        if self._timer is None and restante > 0:
+            self._timer = threading.Timer(restante, self._expirar)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _emprestar(self):
+        conn = super()._emprestar()
+        with self._lock:
+            if time.time() - self.atualizado_em >= self.intervalo:
+                self.atualizado_em = time.time()
+            geracao = self.atualizado_em
+        if self._geracoes.get(conn) != geracao:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("BEGIN")
+            # A transação de leitura só fixa o snapshot na primeira leitura
+            conn.execute("SELECT versao FROM versao_dados").fetchone()
+            self._geracoes[conn] = geracao
+        return conn
+
+    def _devolver(self, conn):
+        # A transação de leitura continua aberta enquanto a conexão está
+        # ociosa, até o snapshot vencer
+        with self._lock:
+            if len(self._ociosas) < self.max_ociosas:
+                if self._vencida(conn):
+                    conn.rollback()
+                    self._geracoes.pop(conn, None)
+                else:
+                    self._agendar_expiracao()
+                self._ociosas.append(conn)
+                return
+            self.abertas -= 1
+            self._geracoes.pop(conn, None)
+        conn.close()
+
+    def estatisticas(self):
+        estatisticas = super().estatisticas()
+        estatisticas["idade_snapshot"] = self.idade()
+        return estatisticas
+
+    def fechar(self):
+        super().fechar()
+        with self._lock:
+            self._geracoes.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    """Retorna o pool do processo para ``db_path``, criando-o se necessário."""
+    chave = os.path.abspath(db_path or DB_PATH_PADRAO)
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = _pools[chave] = PoolConexoes(chave)
+        return pool
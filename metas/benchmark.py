@@ -0,0 +1,230 @@
+"""Benchmarks dos caminhos de dados com bases sintéticas de vários tamanhos.
+
+Para cada tamanho o banco é preenchido por ``metas.sintetico`` (ou
+reaproveitado de ``--dir``) e cada operação é repetida com o cache de
+snapshots invalidado, medindo o caminho frio até o SQLite. Os resultados
+são comparados com a baseline em JSON e o comando termina com código 1 se
+alguma operação ficar mais lenta que o limiar.
+
+Uso pela linha de comando::
+
+    python -m metas.benchmark --tamanhos 1000 100000 1000000
+    python -m metas.benchmark --tamanhos 1000 --atualizar-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from .analitico import criar_motor, disponiveis, get_copia
+from .diagnostico import diagnosticar
+from .exportacao import exportar_metas
+from .gestor import GestorMetas
+from .historico import metas_em, tendencia_departamentos
+from .sintetico import popular_banco, popular_questionarios
+
+TAMANHOS_PADRAO = [1_000, 100_000, 1_000_000]
+BASELINE_PADRAO = os.path.join("benchmarks", "baseline.json")
+LIMIAR_REGRESSAO = 1.5
+# Operações abaixo deste tempo oscilam demais para serem comparadas
+TEMPO_MINIMO_COMPARACAO = 0.005
+SEMENTE = 42
+# Questionários organizacionais gerados em cada base (no máximo um por meta)
+QUESTIONARIOS = 50_000
+REFERENCIA = date(2025, 6, 30)
+
+
+def _operacoes(gestor, total, diretorio):
+    """Operações medidas: nome -> função sem argumentos."""
+    csv = os.path.join(diretorio, "exportacao.csv")
+    lote = [(meta_id, {"progress": 50}) for meta_id in range(1, min(total, 1000) + 1)]
+    return {
+        **_operacoes_analiticas(gestor),
+        "get_all_metas": gestor.get_all_metas,
+        "pagina_metas": lambda: gestor.pagina_metas(0, 50),
+        "pagina_metas_profunda": lambda: gestor.pagina_metas(total * 9 // 10, 50),
+        "pagina_metas_departamento_status": lambda: gestor.pagina_metas(0, 50, department="Vendas", status="Atrasada"),
+        "pagina_metas_funcionario": lambda: gestor.pagina_metas(0, 50, employee="Ana"),
+        "resumo_metas": gestor.resumo_metas,
+        "resumo_metas_departamento": lambda: gestor.resumo_metas(department="TI"),
+        "resumo_metas_vencimento": lambda: gestor.resumo_metas(end_date_from="2025-01-01", end_date_to="2025-03-31"),
+        "relatorio_department": lambda: gestor.resumo_por_dimensao("department"),
+        "relatorio_status": lambda: gestor.resumo_por_dimensao("status"),
+        "relatorio_employee": lambda: gestor.resumo_por_dimensao("employee"),
+        "get_meta": lambda: gestor.get_meta(total // 2),
+        "buscar_metas_recentes": lambda: gestor.buscar_metas(""),
+        "buscar_metas_termo": lambda: gestor.buscar_metas("contratos"),
+        "contagem_diagnosticos": gestor.contagem_diagnosticos_por_departamento,
+        "diagnosticar": lambda: diagnosticar(gestor.get_all_metas(), REFERENCIA),
+        "exportar_csv": lambda: exportar_metas(gestor, csv, "csv"),
+        "resumo_questionarios": gestor.resumo_questionarios,
+        "distribuicao_questionarios": lambda: gestor.distribuicao_questionarios(department="TI"),
+        "historico_metas_em": lambda: metas_em(gestor, date.today()),
+        "historico_tendencia_90_dias": lambda: tendencia_departamentos(
+            gestor, date.today() - timedelta(days=90), date.today()),
+        "update_meta": lambda: gestor.update_meta(total // 2, progress=75),
+        "update_metas_lote_1000": lambda: gestor.update_metas_lote(lote),
+    }
+
+
+def _operacoes_analiticas(gestor):
+    """Consultas da Análise Geral e dos relatórios em cada motor analítico instalado.
+
+    A cópia colunar é gerada antes (``analitico_copia``); os motores que a
+    leem medem só as consultas, como entre duas renovações da cópia.
+    """
+    operacoes = {}
+    motores = disponiveis()
+    if len(motores) > 1:
+        copia = get_copia(gestor.db_path)
+        operacoes["analitico_copia"] = lambda: copia.atualizar(gestor.pool)
+    for nome in motores:
+        motor = criar_motor(gestor, nome)
+        operacoes.update({
+            f"analitico_{nome}_visao_geral": motor.visao_geral,
+            f"analitico_{nome}_metas_criticas": motor.metas_criticas,
+            f"analitico_{nome}_percentis_department": lambda motor=motor: motor.percentis_progresso("department"),
+            f"analitico_{nome}_prazos_por_mes": motor.prazos_por_mes,
+        })
+    return operacoes
+
+
+def _cronometrar(funcao, repeticoes, antes=None):
+    """Executa ``funcao`` ``repeticoes`` vezes e retorna mediana e mínimo em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {"mediana": statistics.median(tempos), "minimo": min(tempos)}
+
+
+def _preparar_banco(caminho, total):
+    """Abre o banco sintético de ``total`` metas e questionários, gerando-o se necessário."""
+    gestor = GestorMetas(caminho)
+    existentes = gestor.resumo_metas()["total"]
+    populacao = None
+    if existentes != total:
+        if existentes:
+            raise RuntimeError(f"{caminho} já tem {existentes} metas; esperado {total}")
+        inicio = time.perf_counter()
+        popular_banco(gestor, total, SEMENTE, REFERENCIA)
+        segundos = time.perf_counter() - inicio
+        populacao = {"segundos": segundos, "metas_por_segundo": total / segundos}
+    if gestor.resumo_questionarios().empty:
+        popular_questionarios(gestor, min(total, QUESTIONARIOS), SEMENTE, REFERENCIA)
+    return gestor, populacao
+
+
+def medir_tamanho(total, diretorio, repeticoes=3):
+    """Mede todas as operações em uma base com ``total`` metas."""
+    gestor, populacao = _preparar_banco(os.path.join(diretorio, f"metas_{total}.db"), total)
+    invalidar = lambda: gestor.cache.invalidar((gestor.db_path,))  # noqa: E731
+
+    operacoes = {}
+    for nome, funcao in _operacoes(gestor, total, diretorio).items():
+        operacoes[nome] = _cronometrar(funcao, repeticoes, invalidar)
+    gestor.get_all_metas()
+    operacoes["get_all_metas_cache"] = _cronometrar(gestor.get_all_metas, repeticoes)
+
+    resultado = {
+        "operacoes": operacoes,
+        "tamanho_banco_bytes": sum(
+            os.path.getsize(caminho) for caminho in (gestor.db_path, f"{gestor.db_path}-wal") if os.path.exists(caminho)
+        ),
+        "memoria_get_all_metas_bytes": int(gestor.get_all_metas().memory_usage(deep=True).sum()),
+    }
+    if populacao:
+        resultado["populacao"] = populacao
+    return resultado
+
+
+def ambiente():
+    """Versões e máquina em que os benchmarks rodaram."""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def comparar(atual, baseline, limiar=LIMIAR_REGRESSAO):
+    """Lista as operações mais lentas que ``limiar`` vezes a baseline.
+
+    Retorna tuplas ``(tamanho, operacao, antes, depois, razao)`` usando a
+    mediana; tamanhos e operações ausentes da baseline são ignorados.
+    """
+    regressoes = []
+    for tamanho, medidas in atual["tamanhos"].items():
+        anteriores = baseline.get("tamanhos", {}).get(tamanho, {}).get("operacoes", {})
+        for operacao, tempos in medidas["operacoes"].items():
+            if operacao not in anteriores:
+                continue
+            antes = max(anteriores[operacao]["mediana"], TEMPO_MINIMO_COMPARACAO)
+            razao = tempos["mediana"] / antes
+            if razao > limiar:
+                regressoes.append((tamanho, operacao, anteriores[operacao]["mediana"], tempos["mediana"], razao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede os caminhos de dados com bases sintéticas.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="números de metas")
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções de cada operação (padrão: 3)")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help=f"arquivo JSON da baseline (padrão: {BASELINE_PADRAO})")
+    parser.add_argument("--atualizar-baseline", action="store_true", help="substitui a baseline pelos resultados desta execução")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_REGRESSAO, help="razão que conta como regressão")
+    parser.add_argument("--dir", default=None, help="diretório para reaproveitar os bancos gerados")
+    args = parser.parse_args(argv)
+
+    resultado = {"ambiente": ambiente(), "tamanhos": {}}
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio = args.dir or temporario
+        os.makedirs(diretorio, exist_ok=True)
+        for total in args.tamanhos:
+            medidas = medir_tamanho(total, diretorio, args.repeticoes)
+            resultado["tamanhos"][str(total)] = medidas
+            print(f"\n{total} metas ({medidas['tamanho_banco_bytes'] / 1e6:.1f} MB)")
+            if "populacao" in medidas:
+                print(f"  {'populacao':<34} {medidas['populacao']['metas_por_segundo']:>10.0f} metas/s")
+            for operacao, tempos in medidas["operacoes"].items():
+                print(f"  {operacao:<34} {tempos['mediana'] * 1000:>10.2f} ms")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+
+    if args.atualizar_baseline:
+        # A baseline inteira é substituída: medidas de execuções anteriores,
+        # feitas com outra versão do código, não são misturadas às novas
+        baseline = resultado
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(baseline, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"\nBaseline atualizada em {args.baseline}")
+        return 0
+
+    regressoes = comparar(resultado, baseline, args.limiar)
+    for tamanho, operacao, antes, depois, razao in regressoes:
+        print(f"REGRESSÃO {tamanho} {operacao}: {antes * 1000:.2f} ms -> {depois * 1000:.2f} ms ({razao:.1f}x)")
+    if not baseline:
+        print(f"\nSem baseline em {args.baseline}; use --atualizar-baseline para gravar uma.")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+"""Cache de snapshots de consultas, invalidado pela versão dos dados."""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Limite de memória do cache; pode ser ajustado pela variável METAS_CACHE_MAX_MB
+MAX_BYTES_PADRAO = int(os.environ.get("METAS_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+def tamanho_em_bytes(valor):
+    """Estima o tamanho em memória de um valor armazenado no cache."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(valor)
+
+
+class CacheSnapshots:
+    """Cache LRU compartilhado entre sessões com limite de memória.
+
+    As chaves devem incluir a versão dos dados: quando uma escrita incrementa
+    a versão, as entradas antigas deixam de ser encontradas e acabam
+    descartadas pela política LRU.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES_PADRAO):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def obter(self, chave, carregar):
+        """Retorna o valor de ``chave``, chamando ``carregar()`` em caso de miss."""
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return self._entradas[chave][0]
+            self.misses += 1
+
+        valor = carregar()
+        tamanho = tamanho_em_bytes(valor)
+        if tamanho > self.max_bytes:
+            return valor
+
+        with self._lock:
+            if chave not in self._entradas:
+                self._entradas[chave] = (valor, tamanho)
+                self._bytes += tamanho
+                self._descartar_excesso()
+        return valor
+
+    def _descartar_excesso(self):
+        while self._bytes > self.max_bytes and self._entradas:
+            _, (_, tamanho) = self._entradas.popitem(last=False)
+            self._bytes -= tamanho
+            self.evictions += 1
+
+    def invalidar(self, prefixo=None):
+        """Remove as entradas cuja chave começa com ``prefixo`` (ou todas)."""
+        with self._lock:
+            for chave in list(self._entradas):
+                if prefixo is None or chave[:len(prefixo)] == prefixo:
+                    _, tamanho = self._entradas.pop(chave)
+                    self._bytes -= tamanho
+
+    def estatisticas(self):
+        """Retorna as métricas de uso do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Retorna o cache de snapshots do processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheSnapshots()
+        return _cache
@@ -0,0 +1,309 @@
+"""Teste de carga da interface com várias sessões Streamlit simultâneas.
+
+Cada usuário simulado roda em um processo próprio com uma sessão
+``AppTest`` de ``app.py`` (o ``AppTest`` troca o runtime global do
+Streamlit a cada execução e não pode ser usado por várias threads do mesmo
+processo). Até o fim da duração, cada usuário repete fluxos sorteados
+pelos pesos de ``ACOES``: adicionar uma meta, filtrar a tabela, atualizar o
+progresso de uma meta, salvar um diagnóstico individual e abrir um
+relatório. Todos os processos usam o mesmo banco, preenchido por
+``metas.sintetico`` se estiver vazio. Ao final são mostradas a vazão, as
+latências p50/p95/p99 de cada ação e a taxa de erros de banco travado.
+
+Uso pela linha de comando::
+
+    python -m metas.carga carga.db --usuarios 20 --duracao 60 --metas 100000
+    python -m metas.carga carga.db --usuarios 50 --pausa 0 --acoes atualizar=1 --limite-travamentos 0.01
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .gestor import DEPARTAMENTOS, STATUS, GestorMetas
+from .questionario import QUESTOES_INDIVIDUAIS
+from .sintetico import popular_banco
+
+APP_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+# Peso de cada fluxo no sorteio; o padrão imita o último dia de um ciclo, com muitas atualizações
+ACOES = {"adicionar": 1, "filtrar": 3, "atualizar": 4, "diagnosticar": 1, "relatorio": 1}
+USUARIOS_PADRAO = 10
+DURACAO_PADRAO = 60
+# Média, em segundos, da pausa entre duas ações de um usuário (distribuição exponencial)
+PAUSA_PADRAO = 1.0
+METAS_PADRAO = 10_000
+# Limite de cada execução do script; ao estourar, a ação conta como erro
+TIMEOUT_EXECUCAO = 120
+# Tempo máximo de espera pelos demais usuários antes de começar a carga
+TIMEOUT_INICIO = 600
+PERCENTIS = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+TIPOS_RELATORIO = ["Relatório Geral", "Por Departamento", "Por Status", "Por Funcionário"]
+# As mensagens de falha da interface começam assim; outros st.error fazem parte do diagnóstico
+PREFIXO_ERRO = "Erro"
+# Atributos internos do AppTest usados para trocar de página (testados no Streamlit 1.65,
+# a versão máxima de requirements.txt)
+ATRIBUTOS_APPTEST = ("_registered_pages", "_page_hash")
+# Mensagens do SQLite quando o bloqueio não é obtido dentro do busy_timeout
+MENSAGENS_TRAVAMENTO = ("database is locked", "database table is locked")
+
+_barreira = None
+_ids_metas = None
+
+
+class UsuarioSimulado:
+    """Sessão ``AppTest`` de ``app`` que executa os fluxos da interface.
+
+    Cada método público é um fluxo completo, da abertura da página à última
+    interação; uma exceção ou mensagem de falha (``PREFIXO_ERRO``) na página
+    interrompe o fluxo com ``RuntimeError``.
+    """
+
+    def __init__(self, app, indice, ids_metas, semente=0):
+        from streamlit.testing.v1 import AppTest
+
+        self.indice = indice
+        # Ids existentes no início da carga: metas excluídas ou arquivadas deixam buracos na sequência
+        self.ids_metas = ids_metas
+        self.rng = random.Random(semente)
+        self.at = AppTest.from_file(app, default_timeout=TIMEOUT_EXECUCAO)
+        # O AppTest só troca páginas de arquivo; as de st.navigation são escolhidas
+        # pelos atributos internos, que podem mudar em outras versões do Streamlit
+        ausentes = [atributo for atributo in ATRIBUTOS_APPTEST if not hasattr(self.at, atributo)]
+        if ausentes:
+            import streamlit
+            raise RuntimeError(f"AppTest do Streamlit {streamlit.__version__} sem {', '.join(ausentes)}; "
+                               "instale uma versão dentro da faixa de requirements.txt")
+        self._rodar()
+        self.paginas = {info["page_name"]: pagina for pagina, info in self.at._registered_pages.items()}
+        if not self.paginas:
+            raise RuntimeError(f"Nenhuma página de st.navigation registrada pelo AppTest em {app}")
+
+    def _rodar(self):
+        self.at.run()
+        mensagens = [e.value for e in self.at.exception]
+        mensagens += [e.value for e in self.at.error if e.value.startswith(PREFIXO_ERRO)]
+        if mensagens:
+            raise RuntimeError(mensagens[0])
+
+    def _ir(self, pagina):
+        self.at._page_hash = self.paginas[pagina]
+        self._rodar()
+
+    def _widget(self, tipo, rotulo):
+        widget = next((w for w in getattr(self.at, tipo) if w.label == rotulo), None)
+        if widget is None:
+            raise RuntimeError(f"Widget não encontrado: {rotulo}")
+        return widget
+
+    def _meta_aleatoria(self):
+        return str(self.rng.choice(self.ids_metas))
+
+    def adicionar(self):
+        self._ir("Adicionar Meta")
+        self._widget("text_input", "Nome do Funcionário").input(f"Usuário de Carga {self.indice}")
+        self._widget("selectbox", "Área/Departamento").select(self.rng.choice(DEPARTAMENTOS))
+        self._widget("text_area", "Descrição da Meta").input(f"Meta criada pelo teste de carga {self.indice}")
+        self._widget("selectbox", "Status").select(self.rng.choice(STATUS))
+        self._widget("slider", "Progresso (%)").set_value(self.rng.randint(0, 100))
+        self._widget("button", "Adicionar Meta").click()
+        self._rodar()
+
+    def filtrar(self):
+        self._ir("Visualizar Metas")
+        self._widget("selectbox", "Filtrar por Departamento").select(self.rng.choice(["Todos"] + DEPARTAMENTOS))
+        self._widget("selectbox", "Filtrar por Status").select(self.rng.choice(["Todos"] + STATUS))
+        self._rodar()
+
+    def atualizar(self):
+        self._ir("Atualizar Meta")
+        self.at.text_input(key="busca_atualizar").input(self._meta_aleatoria())
+        self._rodar()
+        self._widget("slider", "Progresso (%)").set_value(self.rng.randint(0, 100))
+        self._widget("button", "Atualizar Meta").click()
+        self._rodar()
+
+    def diagnosticar(self):
+        self._ir("Diagnóstico")
+        self._widget("selectbox", "Tipo de Diagnóstico:").select("Análise Individual de Meta")
+        self._rodar()
+        self.at.text_input(key="busca_analise").input(self._meta_aleatoria())
+        self._rodar()
+        for i in range(len(QUESTOES_INDIVIDUAIS)):
+            self.at.radio(key=f"q{i + 1}").set_value(self.rng.choice(["Sim", "Não"]))
+        self._widget("button", "🔍 Gerar Diagnóstico Individual").click()
+        self._rodar()
+
+    def relatorio(self):
+        self._ir("Relatórios")
+        self._widget("selectbox", "Tipo de Relatório:").select(self.rng.choice(TIPOS_RELATORIO))
+        self._rodar()
+
+
+def _iniciar(barreira, ids_metas):
+    global _barreira, _ids_metas
+    _barreira = barreira
+    _ids_metas = ids_metas
+
+
+def _usuario(app, indice, acoes, duracao, pausa, semente):
+    """Executa um usuário simulado por ``duracao`` segundos; retorna uma tupla por ação.
+
+    A contagem começa quando todos os usuários abriram a sessão. Cada tupla
+    tem ``usuario``, ``acao``, ``inicio`` (segundos desde o começo),
+    ``segundos`` e ``erro`` (vazio quando a ação terminou sem erro).
+    """
+    try:
+        usuario = UsuarioSimulado(app, indice, _ids_metas, semente)
+    except Exception:
+        _barreira.abort()
+        raise
+    _barreira.wait(TIMEOUT_INICIO)
+
+    rng = usuario.rng
+    nomes, pesos = list(acoes), list(acoes.values())
+    registros = []
+    comeco = time.perf_counter()
+    while time.perf_counter() - comeco < duracao:
+        acao = rng.choices(nomes, pesos)[0]
+        inicio = time.perf_counter()
+        try:
+            getattr(usuario, acao)()
+            erro = ""
+        except Exception as e:
+            erro = str(e) or type(e).__name__
+        registros.append((indice, acao, inicio - comeco, time.perf_counter() - inicio, erro))
+        if pausa > 0:
+            time.sleep(rng.expovariate(1 / pausa))
+    return registros
+
+
+def executar_carga(db_path, usuarios=USUARIOS_PADRAO, duracao=DURACAO_PADRAO, pausa=PAUSA_PADRAO,
+                   acoes=None, app=APP_PADRAO, metas=METAS_PADRAO, semente=0):
+    """Roda ``usuarios`` sessões simultâneas de ``app`` contra ``db_path``.
+
+    Se o banco não tiver metas, é preenchido com ``metas`` metas sintéticas.
+    Cada usuário é um processo iniciado com ``METAS_DB_PATH`` apontando para
+    ``db_path`` e sorteia as metas que atualiza e diagnostica entre os ids
+    existentes no início. Retorna um DataFrame com um registro por ação executada
+    (veja ``_usuario``).
+    """
+    acoes = dict(acoes or ACOES)
+    invalidas = set(acoes) - set(ACOES)
+    if invalidas:
+        raise ValueError(f"Ações não suportadas: {', '.join(sorted(invalidas))}")
+    db_path = os.path.abspath(db_path)
+
+    gestor = GestorMetas(db_path)
+    if gestor.resumo_metas()["total"] == 0:
+        popular_banco(gestor, metas, semente)
+    with gestor.pool.conexao() as conn:
+        ids_metas = [meta_id for (meta_id,) in conn.execute('SELECT id FROM metas')]
+
+    # Os processos leem METAS_DB_PATH ao importar o pacote, como a interface;
+    # o ambiente do processo que chama é restaurado ao final
+    anterior = os.environ.get("METAS_DB_PATH")
+    os.environ["METAS_DB_PATH"] = db_path
+    try:
+        contexto = multiprocessing.get_context("spawn")
+        barreira = contexto.Barrier(usuarios)
+        with ProcessPoolExecutor(max_workers=usuarios, mp_context=contexto,
+                                 initializer=_iniciar, initargs=(barreira, ids_metas)) as executor:
+            futuros = [executor.submit(_usuario, app, indice, acoes, duracao, pausa, semente + indice)
+                       for indice in range(usuarios)]
+            registros = [registro for futuro in futuros for registro in futuro.result()]
+    finally:
+        if anterior is None:
+            os.environ.pop("METAS_DB_PATH", None)
+        else:
+            os.environ["METAS_DB_PATH"] = anterior
+    colunas = ["usuario", "acao", "inicio", "segundos", "erro"]
+    return pd.DataFrame(registros, columns=colunas)
+
+
+def resumir(registros):
+    """Vazão, latências e erros por ação e no total, a partir dos registros de ``executar_carga``.
+
+    A vazão é calculada sobre o tempo entre o começo da carga e o fim da
+    última ação; as latências estão em milissegundos.
+    """
+    travada = registros["erro"].str.contains("|".join(MENSAGENS_TRAVAMENTO), case=False, regex=True)
+    registros = registros.assign(falhou=registros["erro"] != "", travada=travada)
+    duracao = (registros["inicio"] + registros["segundos"]).max()
+
+    def estatisticas(grupo):
+        latencias = grupo["segundos"] * 1000
+        return pd.Series({
+            "acoes": len(grupo),
+            "por_segundo": len(grupo) / duracao,
+            **{f"{nome}_ms": latencias.quantile(q) for nome, q in PERCENTIS.items()},
+            "max_ms": latencias.max(),
+            "erros": grupo["falhou"].sum(),
+            "travamentos": grupo["travada"].sum(),
+            "taxa_travamentos": grupo["travada"].mean(),
+        })
+
+    resumo = registros.groupby("acao").apply(estatisticas, include_groups=False)
+    resumo.loc["total"] = estatisticas(registros)
+    return resumo.astype({"acoes": int, "erros": int, "travamentos": int})
+
+
+def _peso(valor):
+    acao, _, peso = valor.partition("=")
+    if acao not in ACOES:
+        raise argparse.ArgumentTypeError(f"ação inválida: {acao} (use {', '.join(ACOES)})")
+    try:
+        return acao, float(peso or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"peso inválido: {valor}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula usuários simultâneos da interface Streamlit.")
+    parser.add_argument("db", help="banco SQLite usado pela carga (preenchido com metas sintéticas se vazio)")
+    parser.add_argument("--usuarios", type=int, default=USUARIOS_PADRAO,
+                        help=f"sessões simultâneas (padrão: {USUARIOS_PADRAO})")
+    parser.add_argument("--duracao", type=float, default=DURACAO_PADRAO,
+                        help=f"segundos de carga (padrão: {DURACAO_PADRAO})")
+    parser.add_argument("--pausa", type=float, default=PAUSA_PADRAO,
+                        help=f"pausa média entre ações de um usuário, em segundos (padrão: {PAUSA_PADRAO})")
+    parser.add_argument("--acoes", type=_peso, nargs="+", default=None, metavar="ACAO=PESO",
+                        help="ações sorteadas e seus pesos (padrão: "
+                             + " ".join(f"{acao}={peso}" for acao, peso in ACOES.items()) + ")")
+    parser.add_argument("--metas", type=int, default=METAS_PADRAO,
+                        help=f"metas geradas se o banco estiver vazio (padrão: {METAS_PADRAO})")
+    parser.add_argument("--semente", type=int, default=0, help="semente dos sorteios (padrão: 0)")
+    parser.add_argument("--app", default=APP_PADRAO, help="script Streamlit testado (padrão: app.py)")
+    parser.add_argument("--registros", default=None, help="arquivo CSV com o tempo de cada ação")
+    parser.add_argument("--limite-travamentos", type=float, default=None,
+                        help="termina com código 1 se a taxa de travamentos passar deste valor")
+    args = parser.parse_args(argv)
+
+    registros = executar_carga(args.db, args.usuarios, args.duracao, args.pausa,
+                               dict(args.acoes) if args.acoes else None, args.app, args.metas, args.semente)
+    if args.registros:
+        registros.to_csv(args.registros, index=False)
+    if registros.empty:
+        print("Nenhuma ação executada.")
+        return 1
+
+    resumo = resumir(registros)
+    total = resumo.loc["total"]
+    print(f"{args.usuarios} usuários, {int(total['acoes'])} ações ({total['por_segundo']:.1f}/s), "
+          f"{int(total['erros'])} erros, {int(total['travamentos'])} travamentos "
+          f"({total['taxa_travamentos']:.2%})")
+    print(resumo.round({"por_segundo": 2, "p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "max_ms": 1,
+                        "taxa_travamentos": 4}).to_string())
+    for erro, quantidade in registros.loc[registros["erro"] != "", "erro"].value_counts().head(5).items():
+        print(f"  {quantidade}x {erro}")
+
+    if args.limite_travamentos is not None and total["taxa_travamentos"] > args.limite_travamentos:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Motor de diagnóstico vetorizado das metas.
+
+As regras de "Análise Individual de Meta" e de "Metas que Precisam de
+Atenção" são avaliadas para todas as linhas de uma vez, com NumPy/pandas,
+o que permite pontuar a base inteira em lote.
+
+Uso pela linha de comando (relatório noturno)::
+
+    python -m metas.diagnostico diagnostico.csv --db metas.db
+"""
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .exportacao import iterar_blocos
+from .gestor import GestorMetas
+
+STATUS_ATIVOS = ["Em Andamento", "Atrasada"]
+# Limites de progresso das metas críticas, do alerta "muito baixo" e das metas de destaque
+PROGRESSO_CRITICO = 50
+PROGRESSO_MUITO_BAIXO = 25
+PROGRESSO_DESTAQUE = 80
+
+# Avaliação da situação da meta: código -> (nível do alerta, mensagem)
+AVALIACOES = {
+    "concluida": ("success", "🎉 **Meta Concluída!** Parabéns pelo sucesso!"),
+    "nao_concluida": ("error", "❌ **Meta Não Concluída** - Necessária análise para próximas ações."),
+    "atrasada": ("error", "⏰ **Meta Atrasada** - Progresso atual: {progress}%"),
+    "excelente": ("success", "🚀 **Excelente progresso!** {progress}% - Meta no caminho certo."),
+    "bom": ("info", "👍 **Bom progresso!** {progress}% - Manter o ritmo."),
+    "moderado": ("warning", "⚠️ **Progresso moderado** {progress}% - Pode precisar de aceleração."),
+    "baixo": ("error", "🚨 **Progresso baixo** {progress}% - Revisão urgente necessária."),
+}
+ALERTA_ATRASADA = ("warning", "🚨 Progresso baixo para meta atrasada. Intervenção urgente necessária.")
+
+# Alerta das metas críticas (ativas com progresso abaixo de 50%)
+ALERTAS_CRITICOS = {
+    "muito_baixo": ("warning", "🚨 **Diagnóstico:** Meta com progresso muito baixo. Recomenda-se revisão urgente."),
+    "acelerar": ("info", "⚡ **Diagnóstico:** Meta precisando de aceleração para atingir objetivo."),
+}
+
+# Recomendações por faixa de progresso: código -> (ação sugerida, lista em markdown)
+RECOMENDACOES = {
+    "revisar": ("Revisar estratégia", """
+- 🔄 **Revisar estratégia** - A abordagem atual pode não estar funcionando
+- 🤝 **Buscar suporte** - Solicitar ajuda da gestão ou colegas
+- 📚 **Capacitação** - Considerar treinamento adicional
+- ⏰ **Reagendamento** - Avaliar se o prazo é realista
+"""),
+    "acelerar": ("Acelerar ritmo", """
+- ⚡ **Acelerar ritmo** - Intensificar esforços nas atividades principais
+- 🎯 **Focar prioridades** - Concentrar em tarefas de maior impacto
+- 📞 **Comunicação** - Manter gestão informada sobre desafios
+- 🔧 **Otimizar processos** - Buscar eficiências operacionais
+"""),
+    "manter": ("Manter progresso", """
+- 📈 **Manter progresso** - Continuar com a estratégia atual
+- 🔍 **Monitorar de perto** - Acompanhar indicadores regularmente
+- 🚀 **Últimos 20%** - Preparar para o sprint final
+"""),
+    "finalizar": ("Finalizar com qualidade", """
+- 🎯 **Finalizar com qualidade** - Foco na entrega final
+- 📝 **Documentar aprendizados** - Registrar boas práticas
+- 🏆 **Celebrar conquista** - Reconhecer o bom trabalho
+"""),
+}
+
+# Classes de risco, da menor para a maior gravidade
+RISCOS = ["encerrada", "baixo", "moderado", "alto", "critico"]
+
+
+def diagnosticar(df, hoje=None):
+    """Diagnostica todas as metas de ``df`` em uma única passada vetorizada.
+
+    ``df`` precisa das colunas ``status``, ``progress`` e ``end_date``. O
+    resultado tem o mesmo índice e as colunas:
+
+    - ``dias_restantes``: dias até ``end_date`` (negativo se vencida; nulo se a data for inválida)
+    - ``avaliacao``: código de ``AVALIACOES``
+    - ``recomendacao`` e ``acao``: código de ``RECOMENDACOES`` e a ação sugerida
+    - ``critica`` e ``alerta``: meta ativa com progresso < 50% e o código de ``ALERTAS_CRITICOS``
+    - ``intervencao_urgente``: meta atrasada com progresso < 50%
+    - ``destaque``: progresso >= 80%
+    - ``risco``: classe de ``RISCOS``; encerrada para metas concluídas ou não
+      concluídas, crítico para ativas abaixo de 25% ou atrasadas abaixo de
+      50%, alto para as demais críticas, para as atrasadas e para metas em
+      andamento com prazo vencido, moderado para metas em andamento abaixo de 80%
+    """
+    hoje = pd.Timestamp(hoje or date.today()).normalize()
+    status = df["status"].to_numpy(dtype=object)
+    progress = df["progress"].to_numpy(dtype=float)
+    fim = pd.to_datetime(df["end_date"], errors="coerce", format="ISO8601")
+    dias = (fim - hoje).dt.days
+    vencida = (dias < 0).to_numpy()
+
+    em_andamento = status == "Em Andamento"
+    atrasada = status == "Atrasada"
+    ativa = np.isin(status, STATUS_ATIVOS)
+    critica = ativa & (progress < PROGRESSO_CRITICO)
+
+    avaliacao = np.select(
+        [status == "Concluída", status == "Não Concluída", atrasada,
+         em_andamento & (progress >= 80), em_andamento & (progress >= 60),
+         em_andamento & (progress >= 40), em_andamento],
+        ["concluida", "nao_concluida", "atrasada", "excelente", "bom", "moderado", "baixo"],
+        default="",
+    )
+    recomendacao = np.select(
+        [progress < 25, progress < 50, progress < 80],
+        ["revisar", "acelerar", "manter"],
+        default="finalizar",
+    )
+    alerta = np.select([critica & (progress < PROGRESSO_MUITO_BAIXO), critica], ["muito_baixo", "acelerar"], default="")
+    intervencao_urgente = atrasada & (progress < 50)
+    risco = np.select(
+        [~ativa, (ativa & (progress < 25)) | intervencao_urgente,
+         critica | atrasada | (em_andamento & vencida), em_andamento & (progress < 80)],
+        ["encerrada", "critico", "alto", "moderado"],
+        default="baixo",
+    )
+    acoes = {codigo: acao for codigo, (acao, _lista) in RECOMENDACOES.items()}
+
+    return pd.DataFrame({
+        "dias_restantes": dias.astype("Int64"),
+        "avaliacao": avaliacao,
+        "recomendacao": recomendacao,
+        "acao": pd.Series(recomendacao, index=df.index).map(acoes),
+        "critica": critica,
+        "alerta": alerta,
+        "intervencao_urgente": intervencao_urgente,
+        "destaque": progress >= PROGRESSO_DESTAQUE,
+        "risco": pd.Categorical(risco, categories=RISCOS, ordered=True),
+    }, index=df.index)
+
+
+def diagnosticar_base(gestor, destino, hoje=None, tamanho_bloco=100_000):
+    """Diagnostica todas as metas em blocos e grava o resultado em CSV.
+
+    Retorna o número de metas diagnosticadas e o tempo gasto em segundos.
+    """
+    inicio = time.perf_counter()
+    total = 0
+    colunas = ["id", "employee_name", "department", "status", "progress", "end_date"]
+    with open(destino, "w", encoding="utf-8", newline="") as arquivo:
+        for bloco in iterar_blocos(gestor, tamanho_bloco):
+            resultado = bloco[colunas].join(
+                diagnosticar(bloco, hoje)[["dias_restantes", "risco", "avaliacao", "acao", "critica"]]
+            )
+            resultado.to_csv(arquivo, index=False, header=total == 0)
+            total += len(bloco)
+    return total, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnostica todas as metas e grava o resultado em CSV.")
+    parser.add_argument("saida", help="arquivo CSV de saída")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--hoje", default=None, help="data de referência (AAAA-MM-DD); padrão: hoje")
+    parser.add_argument("--bloco", type=int, default=100_000, help="metas processadas por bloco")
+    args = parser.parse_args(argv)
+
+    total, segundos = diagnosticar_base(GestorMetas(args.db), args.saida, args.hoje, args.bloco)
+    taxa = total / segundos if segundos > 0 else 0.0
+    print(f"{total} metas diagnosticadas em {segundos:.2f}s ({taxa:.0f} metas/s) -> {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""Exportação de metas em blocos para CSV, JSONL ou Parquet.
+
+As linhas são lidas do cursor do SQLite com ``fetchmany`` e escritas bloco a
+bloco, então o uso de memória depende do tamanho do bloco e não do número
+de metas exportadas. Com ``incluir_arquivo``, as metas arquivadas
+(``metas.arquivamento``) vêm depois das metas da tabela viva.
+
+Uso pela linha de comando::
+
+    python -m metas.exportacao metas.csv --department Vendas --status Concluída
+    python -m metas.exportacao historico.parquet --incluir-arquivo
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from .gestor import (
+    COLUNAS_METAS, DEPARTAMENTOS, SELECT_METAS, SELECT_METAS_ARQUIVADAS, STATUS, GestorMetas, montar_filtros,
+)
+
+FORMATOS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+TAMANHO_BLOCO_PADRAO = 10_000
+
+
+def iterar_blocos(gestor, tamanho_bloco=TAMANHO_BLOCO_PADRAO, incluir_arquivo=False, **filtros):
+    """Gera DataFrames de até ``tamanho_bloco`` metas que atendem aos filtros."""
+    where, params = montar_filtros(**filtros)
+    consultas = [SELECT_METAS, SELECT_METAS_ARQUIVADAS] if incluir_arquivo else [SELECT_METAS]
+    with gestor.pool.conexao() as conn:
+        for consulta in consultas:
+            cursor = conn.execute(f'{consulta} {where} ORDER BY id', params)
+            colunas = [col[0] for col in cursor.description]
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    break
+                yield pd.DataFrame.from_records(linhas, columns=colunas)
+
+
+def exportar_metas(gestor, destino, formato="csv", tamanho_bloco=TAMANHO_BLOCO_PADRAO, incluir_arquivo=False,
+                   **filtros):
+    """Escreve as metas filtradas em ``destino`` (caminho ou arquivo binário).
+
+    Retorna o número de metas exportadas.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação não suportado: {formato}")
+
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "wb") as arquivo:
+            return exportar_metas(gestor, arquivo, formato, tamanho_bloco, incluir_arquivo, **filtros)
+
+    total = 0
+    escritor = None
+    try:
+        for bloco in iterar_blocos(gestor, tamanho_bloco, incluir_arquivo, **filtros):
+            if formato == "csv":
+                destino.write(bloco.to_csv(index=False, header=total == 0).encode("utf-8"))
+            elif formato == "jsonl":
+                destino.write(bloco.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8"))
+            else:
+                escritor = escritor or _abrir_parquet(destino)
+                _escrever_parquet(escritor, bloco)
+            total += len(bloco)
+        if total == 0:
+            if formato == "csv":
+                colunas = [nome for nome, _tipo in COLUNAS_METAS]
+                destino.write(pd.DataFrame(columns=colunas).to_csv(index=False).encode("utf-8"))
+            elif formato == "parquet":
+                escritor = _abrir_parquet(destino)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
+
+
+def _abrir_parquet(destino):
+    """Abre o escritor Parquet com o schema derivado dos tipos declarados das colunas de metas."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("A exportação em Parquet requer o pacote 'pyarrow'.") from e
+    tipos = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    schema = pa.schema([(nome, tipos.get(tipo, pa.string())) for nome, tipo in COLUNAS_METAS])
+    return pq.ParquetWriter(destino, schema)
+
+
+def _escrever_parquet(escritor, bloco):
+    import pyarrow as pa
+    escritor.write_table(pa.Table.from_pandas(bloco, schema=escritor.schema, preserve_index=False))
+
+
+def exportar_para_temporario(gestor, formato="csv", tamanho_bloco=TAMANHO_BLOCO_PADRAO, incluir_arquivo=False,
+                             **filtros):
+    """Exporta para um arquivo temporário em disco e o retorna aberto no início; quem chama o fecha."""
+    arquivo = tempfile.TemporaryFile()
+    exportar_metas(gestor, arquivo, formato, tamanho_bloco, incluir_arquivo, **filtros)
+    arquivo.seek(0)
+    return arquivo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta metas em blocos para CSV, JSONL ou Parquet.")
+    parser.add_argument("saida", help="arquivo de saída")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default=None,
+                        help="formato de saída (padrão: extensão do arquivo)")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_PADRAO, help="linhas lidas por bloco")
+    parser.add_argument("--department", choices=DEPARTAMENTOS)
+    parser.add_argument("--status", choices=STATUS)
+    parser.add_argument("--employee", help="prefixo do nome do funcionário")
+    parser.add_argument("--end-date-from", help="data de fim mínima (AAAA-MM-DD)")
+    parser.add_argument("--end-date-to", help="data de fim máxima (AAAA-MM-DD)")
+    parser.add_argument("--incluir-arquivo", action="store_true", help="inclui as metas arquivadas")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or os.path.splitext(args.saida)[1].lstrip(".").lower()
+    total = exportar_metas(
+        GestorMetas(args.db), args.saida, formato, args.bloco, args.incluir_arquivo,
+        department=args.department, status=args.status, employee=args.employee,
+        end_date_from=args.end_date_from, end_date_to=args.end_date_to,
+    )
+    print(f"{total} metas exportadas para {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""Fila de escrita com commits em grupo.
+
+O SQLite aceita um único escritor por vez: com muitas sessões salvando ao
+mesmo tempo, cada ``add_meta``/``update_meta`` disputa o lock de escrita e
+faz o seu próprio commit. Aqui as escritas entram em uma fila e uma thread
+dedicada as aplica em lote, em uma transação por lote (``aplicar_escritas``);
+quanto mais escritas chegam durante um commit, maior o lote seguinte. Cada
+escrita recebe um ``Future`` resolvido quando o seu lote é confirmado.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .gestor import GestorMetas
+from .metricas import get_registro, instrumentar
+
+# Máximo de escritas por commit; pode ser ajustado por METAS_FILA_MAX_LOTE
+MAX_LOTE_PADRAO = int(os.environ.get("METAS_FILA_MAX_LOTE", "500"))
+
+
+class FilaEscrita:
+    """Fila de inclusões e atualizações de metas consumida por uma thread escritora.
+
+    ``espera`` é quanto a thread aguarda por mais escritas depois da
+    primeira; com 0, o lote é o que se acumulou durante o commit anterior e
+    uma escrita isolada não espera nada.
+    """
+
+    def __init__(self, gestor, max_lote=MAX_LOTE_PADRAO, espera=0.0):
+        self.gestor = gestor
+        self.max_lote = max_lote
+        self.espera = espera
+        self.lotes = 0
+        self.escritas = 0
+        self.maior_lote = 0
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name="fila-escrita", daemon=True)
+        self._thread.start()
+
+    def enviar(self, operacao, argumentos):
+        """Enfileira uma escrita (``"add_meta"`` ou ``"update_meta"``) e retorna o seu Future."""
+        futuro = Future()
+        self._fila.put((operacao, argumentos, futuro))
+        get_registro().definir("metas_fila_escrita_profundidade", self._fila.qsize())
+        return futuro
+
+    def _proximo_lote(self):
+        """Bloqueia até a primeira escrita e junta as que já estão na fila; None encerra."""
+        primeira = self._fila.get()
+        if primeira is None:
+            return None
+        lote = [primeira]
+        while len(lote) < self.max_lote:
+            try:
+                item = self._fila.get(timeout=self.espera) if self.espera else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Reenfileira o aviso de parada para depois deste lote
+                self._fila.put(None)
+                break
+            lote.append(item)
+        return lote
+
+    def _executar(self):
+        registro = get_registro()
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+            lote = [item for item in lote if item[2].set_running_or_notify_cancel()]
+            if not lote:
+                continue
+            inicio = time.perf_counter()
+            try:
+                resultados = self.gestor.aplicar_escritas([(operacao, argumentos) for operacao, argumentos, _ in lote])
+            except Exception as erro:
+                resultados = [erro] * len(lote)
+            for (_operacao, _argumentos, futuro), resultado in zip(lote, resultados):
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+            self.lotes += 1
+            self.escritas += len(lote)
+            self.maior_lote = max(self.maior_lote, len(lote))
+            registro.observar("metas_fila_escrita_commit_segundos", time.perf_counter() - inicio)
+            registro.observar("metas_fila_escrita_lote", len(lote))
+            registro.incrementar("metas_fila_escrita_total", len(lote))
+            registro.definir("metas_fila_escrita_profundidade", self._fila.qsize())
+
+    def estatisticas(self):
+        """Retorna a profundidade atual da fila e o tamanho dos lotes confirmados."""
+        return {
+            "profundidade": self._fila.qsize(),
+            "lotes": self.lotes,
+            "escritas": self.escritas,
+            "media_lote": self.escritas / self.lotes if self.lotes else 0.0,
+            "maior_lote": self.maior_lote,
+        }
+
+    def parar(self):
+        """Processa as escritas já enfileiradas e encerra a thread escritora."""
+        self._fila.put(None)
+        self._thread.join()
+
+
+class GestorComFila(GestorMetas):
+    """GestorMetas cujo ``add_meta`` e ``update_meta`` passam pela fila de escrita.
+
+    As chamadas continuam síncronas para quem chama: retornam depois do
+    commit do lote em que a escrita entrou. Para não esperar, use
+    ``fila.enviar`` e o Future retornado.
+    """
+
+    def __init__(self, db_path=None, pool=None, max_lote=MAX_LOTE_PADRAO, espera=0.0):
+        super().__init__(db_path, pool)
+        self.fila = FilaEscrita(self, max_lote, espera)
+
+    @instrumentar
+    def add_meta(self, employee_name, department, goal_description, start_date, end_date, status, progress):
+        """Adiciona uma nova meta pela fila de escrita e retorna o ID criado."""
+        argumentos = (employee_name, department, goal_description, start_date, end_date, status, progress)
+        return self.fila.enviar("add_meta", argumentos).result()
+
+    @instrumentar
+    def update_meta(self, meta_id, **kwargs):
+        """Atualiza uma meta pela fila de escrita."""
+        self.fila.enviar("update_meta", (meta_id, kwargs)).result()
+        return True
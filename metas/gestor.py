@@ -0,0 +1,746 @@
+"""Operações de acesso às metas armazenadas no SQLite."""
+import itertools
+import re
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from .banco import INTERVALO_SNAPSHOT_PADRAO, PoolSnapshot, get_pool
+from .cache import get_cache
+from .metricas import instrumentar
+from .questionario import (
+    QUESTOES_INDIVIDUAIS, QUESTOES_ORGANIZACIONAIS, SELECOES_ORGANIZACIONAIS, TOTAL_PONTOS,
+    pontos_questionario, problemas_das_respostas, textos_diagnostico_individual,
+)
+from .migracoes import (
+    DIMENSOES_RESUMO, garantir_schema, sql_data, sql_dia, sql_id, sql_nome, sql_problemas, sql_textos_diagnostico,
+)
+
+DEPARTAMENTOS = ["Vendas", "Marketing", "RH", "Financeiro", "TI",
+                 "Operações", "Administrativo", "Produção", "Logística"]
+STATUS = ["Em Andamento", "Concluída", "Não Concluída", "Atrasada"]
+
+TAMANHO_PAGINA_PADRAO = 50
+TAMANHO_RESUMO_DESCRICAO = 80
+# Status das metas que saem da tabela metas para metas_arquivo quando o ciclo delas
+# termina; "Atrasada" entra para que metas vencidas de ciclos passados não fiquem
+# para sempre na tabela viva ("Em Andamento" vencidas viram "Atrasada" pelo agendador)
+STATUS_ARQUIVAVEIS = ["Concluída", "Não Concluída", "Atrasada"]
+TAMANHO_LOTE_ARQUIVO = 5_000
+
+# Colunas de metas expostas pela API, com o tipo declarado. Departamento e
+# status são gravados como ids das tabelas de domínio e as datas como
+# número do dia; as consultas devolvem os nomes e as datas ISO.
+COLUNAS_METAS = [
+    ("id", "INTEGER"), ("employee_name", "TEXT"), ("department", "TEXT"), ("goal_description", "TEXT"),
+    ("start_date", "TEXT"), ("end_date", "TEXT"), ("status", "TEXT"), ("progress", "INTEGER"),
+    ("completion_date", "TEXT"), ("diagnosis", "TEXT"), ("suggestions", "TEXT"),
+]
+
+
+def _select_colunas_metas(problemas):
+    # diagnosis e suggestions são gerados do diagnóstico individual registrado, se houver
+    diagnosis, suggestions = sql_textos_diagnostico(problemas)
+    return f'''
+        SELECT id, employee_name, {sql_nome("departamentos", "department_id")} AS department, goal_description,
+               {sql_data("start_day")} AS start_date, {sql_data("end_day")} AS end_date,
+               {sql_nome("status_metas", "status_id")} AS status, progress,
+               {sql_data("completion_day")} AS completion_date,
+               {diagnosis} AS diagnosis, {suggestions} AS suggestions
+    '''
+
+
+SELECT_METAS = (f"{_select_colunas_metas('d.problemas')} FROM metas "
+                "LEFT JOIN diagnosticos_individuais d ON d.meta_id = metas.id")
+# As metas arquivadas têm as mesmas colunas gravadas e aceitam os mesmos filtros;
+# as respostas do diagnóstico individual vão junto para o arquivo
+SELECT_METAS_ARQUIVADAS = f"{_select_colunas_metas(sql_problemas('diagnostico_respostas'))} FROM metas_arquivo"
+_COLUNAS_GRAVADAS = ("id", "employee_name", "department_id", "goal_description", "start_day", "end_day",
+                     "status_id", "progress", "completion_day", "diagnosis", "suggestions")
+
+# Coluna da API -> (coluna gravada em metas, expressão SQL que codifica o valor)
+CODIFICACAO_COLUNAS = {
+    "department": ("department_id", sql_id("departamentos")),
+    "status": ("status_id", sql_id("status_metas")),
+    "start_date": ("start_day", sql_dia()),
+    "end_date": ("end_day", sql_dia()),
+    "completion_date": ("completion_day", sql_dia()),
+}
+_INSERT_META = f'''
+    INSERT INTO metas (employee_name, department_id, goal_description, start_day, end_day, status_id, progress)
+    VALUES (?, {sql_id("departamentos")}, ?, {sql_dia()}, {sql_dia()}, {sql_id("status_metas")}, ?)
+'''
+_INSERT_QUESTIONARIO = f'''
+    INSERT INTO questionarios_organizacionais
+        (department_id, dia, respostas, obstaculos, areas_melhoria, pontos, comentario)
+    VALUES ({sql_id("departamentos")}, {sql_dia()}, ?, ?, ?, ?, ?)
+'''
+
+
+def montar_filtros(department=None, status=None, employee=None, end_date_from=None, end_date_to=None):
+    """Monta a cláusula WHERE e os parâmetros dos filtros de metas.
+
+    ``employee`` filtra por prefixo do nome, como intervalo, para que o
+    índice de ``employee_name`` continue sendo usado.
+    """
+    clausulas, params = [], []
+    if department:
+        clausulas.append(f"department_id = {sql_id('departamentos')}")
+        params.append(department)
+    if status:
+        clausulas.append(f"status_id = {sql_id('status_metas')}")
+        params.append(status)
+    if employee:
+        clausulas.append("employee_name >= ? AND employee_name < ?")
+        params.extend([employee, employee + "\U0010ffff"])
+    if end_date_from:
+        clausulas.append(f"end_day >= {sql_dia()}")
+        params.append(str(end_date_from))
+    if end_date_to:
+        clausulas.append(f"end_day <= {sql_dia()}")
+        params.append(str(end_date_to))
+    where = f"WHERE {' AND '.join(clausulas)}" if clausulas else ""
+    return where, params
+
+
+def _clausula_set(campos):
+    """Monta o SET de um UPDATE a partir dos nomes de coluna da API, codificando os valores."""
+    colunas = [CODIFICACAO_COLUNAS.get(campo, (campo, "?")) for campo in campos]
+    return ', '.join(f"{coluna} = {valor}" for coluna, valor in colunas)
+
+
+def _categorica(codigos, dominio):
+    """Converte ids de uma tabela de domínio (``id``, ``nome``) em categórica com todos os nomes."""
+    posicoes = pd.Index(dominio["id"]).get_indexer(codigos)
+    return pd.Categorical.from_codes(posicoes, categories=dominio["nome"])
+
+
+def _resumo_histograma(histograma, dimensao):
+    """Resumo no formato de ``resumo_por_dimensao`` a partir de um histograma como o de ``resumo_progresso``."""
+    grupos = histograma.assign(soma=histograma["progress"] * histograma["total"]).groupby("chave", sort=True)
+    total = grupos["total"].sum()
+    return pd.DataFrame({
+        "total": total,
+        "progresso_medio": grupos["soma"].sum() / total,
+        "progresso_min": grupos["progress"].min(),
+        "progresso_max": grupos["progress"].max(),
+        "concluidas": grupos["concluidas"].sum(),
+    }).rename_axis(DIMENSOES_RESUMO[dimensao])
+
+
+def _parametros_questionario(department, respostas, obstaculos=0, areas_melhoria=0, comentario=None, data=None):
+    """Parâmetros de ``_INSERT_QUESTIONARIO``, com os pontos calculados das respostas."""
+    return (department, str(data or date.today()), respostas, obstaculos, areas_melhoria,
+            pontos_questionario(respostas), comentario)
+
+
+class GestorMetas:
+    def __init__(self, db_path=None, pool=None, analitico=None):
+        self.pool = pool or get_pool(db_path)
+        self.db_path = self.pool.db_path
+        self.cache = get_cache()
+        self.backend_analitico = analitico
+        self._analitico = None
+        self.init_database()
+
+    def leitura(self, intervalo=INTERVALO_SNAPSHOT_PADRAO):
+        """Retorna um GestorMetas somente leitura sobre um snapshot deste banco.
+
+        O snapshot é renovado a cada ``intervalo`` segundos (``PoolSnapshot``);
+        relatórios longos lidos por ele não disputam o banco com as escritas
+        feitas por este gestor.
+        """
+        return GestorMetas(pool=PoolSnapshot(self.db_path, intervalo), analitico=self.backend_analitico)
+
+    @property
+    def analitico(self):
+        """Motor das consultas analíticas (``metas.analitico``), escolhido por ``METAS_ANALITICO``."""
+        if self._analitico is None:
+            # Importado aqui: o módulo analítico depende de metas.diagnostico, que importa este
+            from .analitico import criar_motor
+            self._analitico = criar_motor(self, self.backend_analitico)
+        return self._analitico
+
+    def init_database(self):
+        """Garante que o schema do banco esteja na versão atual."""
+        garantir_schema(self.pool)
+
+    def versao_dados(self):
+        """Retorna a versão atual dos dados, incrementada a cada escrita."""
+        with self.pool.conexao() as conn:
+            return conn.execute('SELECT versao FROM versao_dados WHERE id = 1').fetchone()[0]
+
+    def _registrar_escrita(self, conn):
+        """Incrementa a versão dos dados dentro da transação de escrita.
+
+        A versão faz parte das chaves do cache, então as entradas das versões
+        anteriores deixam de ser encontradas sem ser apagadas: os snapshots de
+        leitura (``leitura``) que ainda estão nelas continuam servidos pelo
+        cache, e a política LRU descarta as que não são mais lidas.
+        """
+        conn.execute('UPDATE versao_dados SET versao = versao + 1 WHERE id = 1')
+
+    def _snapshot(self, chave, carregar):
+        """Retorna o resultado de ``carregar`` em cache para a versão atual dos dados."""
+        # A versão e os dados vêm da mesma conexão (e do mesmo snapshot, no PoolSnapshot)
+        with self.pool.fixar():
+            valor = self.cache.obter((self.db_path, self.versao_dados()) + chave, carregar)
+        if isinstance(valor, pd.DataFrame):
+            # Cópia rasa: o snapshot é compartilhado entre abas e sessões
+            return valor.copy(deep=False)
+        return dict(valor)
+
+    def versao_arquivo(self):
+        """Retorna a versão do arquivo de metas: id e metas da última execução do arquivamento."""
+        with self.pool.conexao() as conn:
+            row = conn.execute('SELECT id, metas FROM execucoes_arquivamento ORDER BY id DESC LIMIT 1').fetchone()
+        return tuple(row or (0, 0))
+
+    def _snapshot_arquivo(self, chave, carregar):
+        """Como ``_snapshot``, mas renovado só quando um arquivamento altera ``metas_arquivo``."""
+        with self.pool.fixar():
+            valor = self.cache.obter(("arquivo", self.db_path, self.versao_arquivo()) + chave, carregar)
+        return valor.copy(deep=False) if isinstance(valor, pd.DataFrame) else valor
+
+    @instrumentar
+    def add_meta(self, employee_name, department, goal_description, start_date, end_date, status, progress):
+        """Adiciona uma nova meta ao banco de dados e retorna o ID criado."""
+        with self.pool.transacao() as conn:
+            cursor = conn.execute(_INSERT_META, (employee_name, department, goal_description,
+                                                 start_date, end_date, status, progress))
+            self._registrar_escrita(conn)
+        return cursor.lastrowid
+
+    @instrumentar(linhas=int)
+    def add_metas_lote(self, linhas):
+        """Insere várias metas em uma única transação e retorna quantas foram inseridas.
+
+        Cada linha é uma tupla na ordem dos parâmetros de ``add_meta``.
+        """
+        with self.pool.transacao() as conn:
+            cursor = conn.executemany(_INSERT_META, linhas)
+            inseridas = cursor.rowcount
+            self._registrar_escrita(conn)
+        return inseridas
+
+    @instrumentar
+    def get_all_metas(self):
+        """Retorna todas as metas do banco de dados.
+
+        ``department`` e ``status`` vêm como categóricas, na ordem das tabelas
+        de domínio, e as datas como datetime64, convertidas direto dos códigos
+        inteiros gravados, sem reinterpretar texto.
+        """
+        def carregar():
+            with self.pool.conexao() as conn:
+                df = pd.read_sql_query('''
+                    SELECT m.*, d.problemas FROM metas m LEFT JOIN diagnosticos_individuais d ON d.meta_id = m.id
+                ''', conn)
+                departamentos = pd.read_sql_query('SELECT id, nome FROM departamentos ORDER BY id', conn)
+                status = pd.read_sql_query('SELECT id, nome FROM status_metas ORDER BY id', conn)
+            df["department"] = _categorica(df["department_id"], departamentos)
+            df["status"] = _categorica(df["status_id"], status)
+            for coluna, gravada in (("start_date", "start_day"), ("end_date", "end_day"),
+                                    ("completion_date", "completion_day")):
+                df[coluna] = pd.to_datetime(df[gravada], unit="D")
+            # Textos do diagnóstico individual, gerados uma vez por bitmask distinto
+            diagnosticadas = df["problemas"].notna()
+            if diagnosticadas.any():
+                problemas = df.loc[diagnosticadas, "problemas"].astype(int)
+                textos = {codigo: textos_diagnostico_individual(codigo) for codigo in problemas.unique()}
+                df.loc[diagnosticadas, "diagnosis"] = problemas.map(lambda codigo: textos[codigo][0])
+                df.loc[diagnosticadas, "suggestions"] = problemas.map(lambda codigo: textos[codigo][1])
+            return df[[nome for nome, _tipo in COLUNAS_METAS]]
+        return self._snapshot(("metas",), carregar)
+
+    @instrumentar
+    def query_metas(self, department=None, status=None, employee=None, end_date_from=None,
+                    end_date_to=None, limit=None, offset=0):
+        """Retorna as metas que atendem aos filtros, paginadas por limit/offset."""
+        where, params = montar_filtros(department, status, employee, end_date_from, end_date_to)
+        sql = f'{SELECT_METAS} {where} ORDER BY id'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [int(limit), int(offset)]
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+        return self._snapshot(("query_metas", sql, tuple(params)), carregar)
+
+    @instrumentar
+    def pagina_metas(self, after_id=0, page_size=TAMANHO_PAGINA_PADRAO, **filtros):
+        """Retorna uma página de metas com id maior que ``after_id``.
+
+        A paginação é por chave (keyset): o custo não depende da posição da
+        página. As colunas de texto longo não são carregadas; a descrição vem
+        truncada e o restante fica em ``get_meta_detalhes``. Retorna o
+        DataFrame da página e se existe uma próxima página.
+        """
+        where, params = montar_filtros(**filtros)
+        where = f"{where} AND id > ?" if where else "WHERE id > ?"
+        params += [int(after_id), int(page_size) + 1]
+        sql = f'''
+            SELECT id, employee_name, {sql_nome("departamentos", "department_id")} AS department,
+                   substr(goal_description, 1, {TAMANHO_RESUMO_DESCRICAO}) AS goal_description,
+                   {sql_data("start_day")} AS start_date, {sql_data("end_day")} AS end_date,
+                   {sql_nome("status_metas", "status_id")} AS status, progress,
+                   {sql_data("completion_day")} AS completion_date
+            FROM metas {where}
+            ORDER BY id
+            LIMIT ?
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+        df = self._snapshot(("pagina_metas", sql, tuple(params)), carregar)
+        return df.iloc[:page_size], len(df) > page_size
+
+    @instrumentar
+    def get_meta_detalhes(self, meta_id):
+        """Retorna as colunas de texto longo de uma meta.
+
+        Se a meta tem diagnóstico individual registrado, ``diagnosis`` e
+        ``suggestions`` são gerados a partir das respostas armazenadas.
+        """
+        with self.pool.conexao() as conn:
+            row = conn.execute('''
+                SELECT m.goal_description, m.diagnosis, m.suggestions, d.problemas
+                FROM metas m LEFT JOIN diagnosticos_individuais d ON d.meta_id = m.id
+                WHERE m.id = ?
+            ''', (meta_id,)).fetchone()
+        if row is None:
+            return None
+        goal_description, diagnosis, suggestions, problemas = row
+        if problemas is not None:
+            diagnosis, suggestions = textos_diagnostico_individual(problemas)
+        return {"goal_description": goal_description, "diagnosis": diagnosis, "suggestions": suggestions}
+
+    @instrumentar
+    def resumo_metas(self, **filtros):
+        """Retorna contagens e progresso médio das metas filtradas, calculados no SQL."""
+        where, params = montar_filtros(**filtros)
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                total, concluidas, em_andamento, progresso_medio = conn.execute(f'''
+                    SELECT COUNT(*),
+                           COALESCE(SUM(status_id = {sql_id("status_metas", "'Concluída'")}), 0),
+                           COALESCE(SUM(status_id = {sql_id("status_metas", "'Em Andamento'")}), 0),
+                           AVG(progress)
+                    FROM metas {where}
+                ''', params).fetchone()
+            return {
+                "total": total,
+                "concluidas": concluidas,
+                "em_andamento": em_andamento,
+                "progresso_medio": progresso_medio or 0.0,
+            }
+        return self._snapshot(("resumo_metas", where, tuple(params)), carregar)
+
+    @instrumentar
+    def resumo_por_dimensao(self, dimensao, incluir_arquivo=False):
+        """Retorna o resumo materializado de uma dimensão ('department', 'status' ou 'employee').
+
+        Lê a tabela ``resumo_progresso``, mantida pelos triggers de ``metas``,
+        então o custo é proporcional ao número de grupos e não ao de metas.
+        Com ``incluir_arquivo``, soma o histograma das metas arquivadas
+        (``histograma_arquivo``).
+        """
+        if dimensao not in DIMENSOES_RESUMO:
+            raise ValueError(f"Dimensão de resumo inválida: {dimensao}")
+        if incluir_arquivo:
+            def carregar_com_arquivo():
+                with self.pool.conexao() as conn:
+                    vivas = pd.read_sql_query(
+                        'SELECT chave, progress, total, concluidas FROM resumo_progresso '
+                        'WHERE dimensao = ? AND total > 0', conn, params=(dimensao,))
+                return _resumo_histograma(pd.concat([vivas, self.histograma_arquivo(dimensao)]), dimensao)
+            return self._snapshot(("resumo_por_dimensao", dimensao, "arquivo"), carregar_com_arquivo)
+        sql = '''
+            SELECT chave,
+                   SUM(total) AS total,
+                   SUM(progress * total) * 1.0 / SUM(total) AS progresso_medio,
+                   MIN(progress) AS progresso_min,
+                   MAX(progress) AS progresso_max,
+                   SUM(concluidas) AS concluidas
+            FROM resumo_progresso
+            WHERE dimensao = ? AND total > 0
+            GROUP BY chave
+            ORDER BY chave
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                df = pd.read_sql_query(sql, conn, params=(dimensao,))
+            return df.set_index("chave").rename_axis(DIMENSOES_RESUMO[dimensao])
+        return self._snapshot(("resumo_por_dimensao", dimensao), carregar)
+
+    @instrumentar
+    def histograma_arquivo(self, dimensao):
+        """Histograma de progresso das metas arquivadas por grupo da dimensão.
+
+        Mesmas colunas de ``resumo_progresso`` (``chave``, ``progress``,
+        ``total`` e ``concluidas``); calculado sobre ``metas_arquivo`` uma vez
+        por execução do arquivamento.
+        """
+        if dimensao not in DIMENSOES_RESUMO:
+            raise ValueError(f"Dimensão de resumo inválida: {dimensao}")
+        chave = {
+            "department": sql_nome("departamentos", "department_id"),
+            "status": sql_nome("status_metas", "status_id"),
+            "employee": "employee_name",
+        }[dimensao]
+        sql = f'''
+            SELECT {chave} AS chave, progress, COUNT(*) AS total,
+                   SUM(status_id = {sql_id("status_metas", "'Concluída'")}) AS concluidas
+            FROM metas_arquivo GROUP BY 1, 2
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                return pd.read_sql_query(sql, conn)
+        return self._snapshot_arquivo(("histograma", dimensao), carregar)
+
+    @instrumentar
+    def prazos_arquivo(self):
+        """Metas arquivadas por mês de vencimento (linhas, primeiro dia do mês) e status (colunas)."""
+        sql = f'''
+            SELECT date({sql_data("end_day")}, 'start of month') AS mes,
+                   {sql_nome("status_metas", "status_id")} AS status, COUNT(*) AS total
+            FROM metas_arquivo GROUP BY 1, status_id
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                df = pd.read_sql_query(sql, conn, parse_dates=["mes"])
+            return df.pivot_table(index="mes", columns="status", values="total", fill_value=0).sort_index()
+        return self._snapshot_arquivo(("prazos",), carregar)
+
+    @instrumentar
+    def total_arquivadas(self):
+        """Retorna o número de metas em ``metas_arquivo``."""
+        def carregar():
+            with self.pool.conexao() as conn:
+                return conn.execute('SELECT COUNT(*) FROM metas_arquivo').fetchone()[0]
+        return self._snapshot_arquivo(("total",), carregar)
+
+    @instrumentar
+    def salvar_diagnostico_individual(self, meta_id, respostas):
+        """Registra as respostas do diagnóstico individual (bit i = "Sim") e retorna o bitmask de problemas."""
+        problemas = problemas_das_respostas(respostas)
+        with self.pool.transacao() as conn:
+            conn.execute('''
+                INSERT INTO diagnosticos_individuais (meta_id, respostas, problemas) VALUES (?, ?, ?)
+                ON CONFLICT (meta_id) DO UPDATE
+                SET respostas = excluded.respostas, problemas = excluded.problemas,
+                    atualizado_em = CURRENT_TIMESTAMP
+            ''', (meta_id, respostas, problemas))
+            self._registrar_escrita(conn)
+        return problemas
+
+    @instrumentar
+    def get_diagnostico_individual(self, meta_id):
+        """Retorna ``respostas``, ``problemas`` e ``atualizado_em`` do diagnóstico da meta, ou None."""
+        with self.pool.conexao() as conn:
+            row = conn.execute(
+                'SELECT respostas, problemas, atualizado_em FROM diagnosticos_individuais WHERE meta_id = ?',
+                (meta_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("respostas", "problemas", "atualizado_em"), row))
+
+    @instrumentar
+    def contagem_diagnosticos_por_departamento(self):
+        """Conta quantas metas de cada departamento apresentam cada problema do diagnóstico individual.
+
+        Uma única passada sobre ``diagnosticos_individuais``, com a meta
+        obtida pela chave primária. As colunas são ``avaliadas`` e o
+        diagnóstico de cada pergunta de ``QUESTOES_INDIVIDUAIS``.
+        """
+        contagens = ", ".join(
+            f'SUM(d.problemas >> {i} & 1) AS "{questao[2]}"' for i, questao in enumerate(QUESTOES_INDIVIDUAIS)
+        )
+        sql = f'''
+            SELECT {sql_nome("departamentos", "m.department_id")} AS department,
+                   COUNT(*) AS avaliadas, {contagens}
+            FROM diagnosticos_individuais d JOIN metas m ON m.id = d.meta_id
+            GROUP BY m.department_id
+            ORDER BY department
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                return pd.read_sql_query(sql, conn).set_index("department")
+        return self._snapshot(("contagem_diagnosticos_por_departamento",), carregar)
+
+    @instrumentar
+    def add_questionario(self, department, respostas, obstaculos=0, areas_melhoria=0, comentario=None, data=None):
+        """Registra um questionário organizacional e retorna o ID criado.
+
+        ``respostas`` vem de ``codificar_questionario`` e ``obstaculos`` e
+        ``areas_melhoria`` de ``codificar_selecao``; ``data`` (padrão: hoje)
+        define o mês em que a resposta é resumida.
+        """
+        with self.pool.transacao() as conn:
+            cursor = conn.execute(_INSERT_QUESTIONARIO, _parametros_questionario(
+                department, respostas, obstaculos, areas_melhoria, comentario, data))
+            self._registrar_escrita(conn)
+        return cursor.lastrowid
+
+    @instrumentar(linhas=int)
+    def add_questionarios_lote(self, linhas):
+        """Registra vários questionários em uma única transação e retorna quantos foram inseridos.
+
+        Cada linha é uma tupla na ordem dos parâmetros de ``add_questionario``.
+        """
+        with self.pool.transacao() as conn:
+            cursor = conn.executemany(_INSERT_QUESTIONARIO, (_parametros_questionario(*linha) for linha in linhas))
+            inseridos = cursor.rowcount
+            self._registrar_escrita(conn)
+        return inseridos
+
+    @instrumentar
+    def resumo_questionarios(self, department=None):
+        """Respostas e score médio (%) dos questionários organizacionais por departamento e mês.
+
+        Lê ``resumo_questionarios``, mantida pelos triggers: o custo depende
+        do número de departamentos e meses, não do de respostas.
+        """
+        where, params = ("WHERE r.department_id = " + sql_id("departamentos"), (department,)) if department else ("", ())
+        sql = f'''
+            SELECT {sql_nome("departamentos", "r.department_id")} AS department, r.periodo, r.respostas,
+                   r.pontos * 100.0 / (r.respostas * {TOTAL_PONTOS}) AS score_medio
+            FROM resumo_questionarios r {where}
+            ORDER BY r.periodo, department
+        '''
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+        return self._snapshot(("resumo_questionarios", department), carregar)
+
+    @instrumentar
+    def distribuicao_questionarios(self, department=None, periodo=None):
+        """Quantas vezes cada opção foi escolhida nos questionários organizacionais.
+
+        Retorna ``grupo`` (chave da pergunta, ``obstaculos`` ou
+        ``areas_melhoria``), ``opcao``, ``total`` e ``percentual`` das
+        respostas do filtro que escolheram a opção; nas seleções múltiplas
+        os percentuais somam mais de 100.
+        """
+        condicoes, params = [], []
+        if department:
+            condicoes.append("department_id = " + sql_id("departamentos"))
+            params.append(department)
+        if periodo:
+            condicoes.append("periodo = ?")
+            params.append(periodo)
+        where = "WHERE " + " AND ".join(condicoes) if condicoes else ""
+
+        def carregar():
+            with self.pool.conexao() as conn:
+                df = pd.read_sql_query(f'''
+                    SELECT grupo, opcao, SUM(total) AS total FROM resumo_questionarios_opcoes {where}
+                    GROUP BY grupo, opcao
+                ''', conn, params=params)
+                respostas = conn.execute(
+                    f'SELECT COALESCE(SUM(respostas), 0) FROM resumo_questionarios {where}', params
+                ).fetchone()[0]
+            opcoes = {**{chave: questao[1] for chave, questao in QUESTOES_ORGANIZACIONAIS.items()},
+                      **SELECOES_ORGANIZACIONAIS}
+            # Grupos na ordem do questionário e opções na ordem em que aparecem
+            ordem = df["grupo"].map({grupo: i for i, grupo in enumerate(opcoes)})
+            df = df.iloc[pd.Series(list(zip(ordem, df["opcao"]))).argsort()]
+            df["opcao"] = [opcoes[grupo][opcao] for grupo, opcao in zip(df["grupo"], df["opcao"])]
+            df["percentual"] = df["total"] * 100.0 / respostas if respostas else 0.0
+            return df.reset_index(drop=True)
+        return self._snapshot(("distribuicao_questionarios", department, periodo), carregar)
+
+    @instrumentar
+    def update_meta(self, meta_id, **kwargs):
+        """Atualiza uma meta específica."""
+        set_clause = _clausula_set(kwargs)
+        values = list(kwargs.values()) + [meta_id]
+
+        with self.pool.transacao() as conn:
+            conn.execute(f'''
+                UPDATE metas SET {set_clause} WHERE id = ?
+            ''', values)
+            self._registrar_escrita(conn)
+        return True
+
+    @instrumentar(linhas=int)
+    def update_metas_lote(self, atualizacoes):
+        """Aplica várias atualizações em uma única transação e retorna quantas metas foram alteradas.
+
+        ``atualizacoes`` é uma sequência de pares ``(meta_id, campos)``, com
+        ``campos`` no formato dos argumentos de ``update_meta``. Atualizações
+        consecutivas com os mesmos campos são enviadas em um único
+        ``executemany``, sem alterar a ordem de aplicação.
+        """
+        alteradas = 0
+        with self.pool.transacao() as conn:
+            for chaves, grupo in itertools.groupby(atualizacoes, key=lambda item: tuple(item[1])):
+                cursor = conn.executemany(
+                    f'UPDATE metas SET {_clausula_set(chaves)} WHERE id = ?',
+                    [list(campos.values()) + [meta_id] for meta_id, campos in grupo],
+                )
+                alteradas += cursor.rowcount
+            self._registrar_escrita(conn)
+        return alteradas
+
+    @instrumentar(linhas=len)
+    def aplicar_escritas(self, escritas):
+        """Aplica inclusões e atualizações em uma única transação (commit em grupo).
+
+        ``escritas`` é uma sequência de ``("add_meta", argumentos)`` ou
+        ``("update_meta", (meta_id, campos))``. Uma escrita inválida falha
+        sozinha: o SQLite desfaz só aquele statement e as demais seguem na
+        transação. Retorna, na ordem, o ID criado, o número de metas
+        alteradas ou a exceção de cada escrita.
+        """
+        resultados = []
+        with self.pool.transacao() as conn:
+            for operacao, argumentos in escritas:
+                try:
+                    if operacao == "add_meta":
+                        resultados.append(conn.execute(_INSERT_META, argumentos).lastrowid)
+                    elif operacao == "update_meta":
+                        meta_id, campos = argumentos
+                        cursor = conn.execute(f'UPDATE metas SET {_clausula_set(campos)} WHERE id = ?',
+                                              [*campos.values(), meta_id])
+                        resultados.append(cursor.rowcount)
+                    else:
+                        raise ValueError(f"Escrita não suportada: {operacao}")
+                except (sqlite3.Error, ValueError) as erro:
+                    resultados.append(erro)
+            self._registrar_escrita(conn)
+        return resultados
+
+    @instrumentar(linhas=len)
+    def marcar_atrasadas(self, hoje=None):
+        """Marca como "Atrasada" as metas "Em Andamento" com prazo anterior a ``hoje``.
+
+        Um único UPDATE, com a busca feita pelo índice ``(status_id, end_day)``:
+        o custo é proporcional às metas que venceram desde a última execução,
+        não ao tamanho da tabela. Cada meta alterada é registrada em
+        ``marcacoes_atraso``. Retorna os IDs alterados.
+        """
+        with self.pool.transacao() as conn:
+            marcadas = conn.execute(f'''
+                UPDATE metas SET status_id = {sql_id("status_metas", "'Atrasada'")}
+                WHERE status_id = {sql_id("status_metas", "'Em Andamento'")} AND end_day < {sql_dia()}
+                RETURNING id, end_day
+            ''', (str(hoje or date.today()),)).fetchall()
+            if marcadas:
+                conn.executemany('INSERT INTO marcacoes_atraso (meta_id, end_day) VALUES (?, ?)', marcadas)
+                self._registrar_escrita(conn)
+        return [meta_id for meta_id, _end_day in marcadas]
+
+    @instrumentar(linhas=int)
+    def arquivar_metas(self, corte, tamanho_lote=TAMANHO_LOTE_ARQUIVO):
+        """Move para ``metas_arquivo`` as metas de ciclos passados: prazo anterior a ``corte``.
+
+        Só são arquivadas as metas com status em ``STATUS_ARQUIVAVEIS``
+        (inclusive as que ficaram "Atrasada"), buscadas
+        pelo índice ``(status_id, end_day)``. Cada lote de até
+        ``tamanho_lote`` metas é copiado e excluído de ``metas`` na mesma
+        transação curta, então as escritas da interface esperam no máximo um
+        lote. Os triggers de ``metas`` tiram as metas do resumo e da busca e
+        registram a saída no histórico; as respostas do diagnóstico
+        individual vão junto para o arquivo. A execução fica registrada em
+        ``execucoes_arquivamento``. Retorna quantas metas foram arquivadas.
+        """
+        arquivaveis = ", ".join(sql_id("status_metas", f"'{status}'") for status in STATUS_ARQUIVAVEIS)
+        with self.pool.transacao() as conn:
+            execucao = conn.execute(f'INSERT INTO execucoes_arquivamento (corte_day) VALUES ({sql_dia()})',
+                                    (str(corte),)).lastrowid
+        arquivadas = 0
+        while True:
+            with self.pool.transacao() as conn:
+                ids = conn.execute(f'''
+                    SELECT id FROM metas WHERE status_id IN ({arquivaveis}) AND end_day < {sql_dia()} LIMIT ?
+                ''', (str(corte), int(tamanho_lote))).fetchall()
+                if not ids:
+                    break
+                conn.executemany(f'''
+                    INSERT INTO metas_arquivo ({", ".join(_COLUNAS_GRAVADAS)}, diagnostico_respostas, execucao_id)
+                    SELECT {", ".join(f"m.{coluna}" for coluna in _COLUNAS_GRAVADAS)}, d.respostas, ?
+                    FROM metas m LEFT JOIN diagnosticos_individuais d ON d.meta_id = m.id
+                    WHERE m.id = ?
+                ''', [(execucao, meta_id) for (meta_id,) in ids])
+                conn.executemany('DELETE FROM metas WHERE id = ?', ids)
+                conn.execute('UPDATE execucoes_arquivamento SET metas = metas + ? WHERE id = ?', (len(ids), execucao))
+                self._registrar_escrita(conn)
+            arquivadas += len(ids)
+        self.cache.invalidar(("arquivo", self.db_path))
+        return arquivadas
+
+    @instrumentar
+    def delete_meta(self, meta_id):
+        """Remove uma meta do banco de dados."""
+        with self.pool.transacao() as conn:
+            conn.execute('DELETE FROM metas WHERE id = ?', (meta_id,))
+            self._registrar_escrita(conn)
+        return True
+
+    @instrumentar
+    def get_meta_by_id(self, meta_id):
+        """Retorna uma meta específica pelo ID."""
+        with self.pool.conexao() as conn:
+            return conn.execute(f'{SELECT_METAS} WHERE id = ?', (meta_id,)).fetchone()
+
+    @instrumentar
+    def get_meta(self, meta_id):
+        """Retorna uma meta específica pelo ID como dicionário coluna -> valor."""
+        with self.pool.conexao() as conn:
+            cursor = conn.execute(f'{SELECT_METAS} WHERE id = ?', (meta_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([col[0] for col in cursor.description], row))
+
+    @instrumentar
+    def buscar_metas(self, termo="", limite=20):
+        """Busca metas por prefixo no nome do funcionário ou na descrição.
+
+        Usa o índice FTS5 ``metas_fts`` e retorna até ``limite`` dicionários
+        com ``id``, ``employee_name`` e ``resumo``, do mais relevante ao menos
+        relevante. Sem termo, retorna as metas mais recentes; um termo numérico
+        também encontra a meta com aquele ID.
+        """
+        tokens = re.findall(r"\w+", termo or "")
+        colunas = f"m.id, m.employee_name, substr(m.goal_description, 1, {TAMANHO_RESUMO_DESCRICAO})"
+        with self.pool.conexao() as conn:
+            if not tokens:
+                rows = conn.execute(
+                    f'SELECT {colunas} FROM metas m ORDER BY m.id DESC LIMIT ?', (limite,)
+                ).fetchall()
+            else:
+                consulta = " ".join(f'"{token}"*' for token in tokens)
+                rows = conn.execute(f'''
+                    SELECT {colunas} FROM metas_fts f JOIN metas m ON m.id = f.rowid
+                    WHERE metas_fts MATCH ?
+                    ORDER BY f.rank
+                    LIMIT ?
+                ''', (consulta, limite)).fetchall()
+                # isdecimal, e não isdigit, que aceita sobrescritos como "²"; ids cabem em 64 bits
+                meta_id = int(termo) if termo.strip().isdecimal() else None
+                if meta_id is not None and 0 < meta_id < 2 ** 63:
+                    por_id = conn.execute(
+                        f'SELECT {colunas} FROM metas m WHERE m.id = ?', (meta_id,)
+                    ).fetchall()
+                    rows = por_id + [row for row in rows if row[0] != meta_id][:limite - len(por_id)]
+        return [dict(zip(("id", "employee_name", "resumo"), row)) for row in rows]
+
+    def estatisticas_pool(self):
+        """Retorna os contadores de hit/miss do pool de conexões."""
+        return self.pool.estatisticas()
+
+    def estatisticas_cache(self):
+        """Retorna as métricas de hit rate e memória do cache de snapshots."""
+        return self.cache.estatisticas()
@@ -0,0 +1,204 @@
+"""Consultas sobre o histórico append-only das metas.
+
+Os triggers de ``metas`` gravam em ``historico_metas`` um evento compacto
+(meta, momento, campo, novo valor) a cada inclusão, alteração de progresso,
+status ou departamento e exclusão. Checkpoints guardam o estado completo de
+tempos em tempos; o estado "na data X" parte do último checkpoint anterior a
+X e reaplica só os eventos entre os dois. Os momentos são segundos Unix em
+UTC.
+
+Uso pela linha de comando::
+
+    python -m metas.historico checkpoint --db metas.db
+    python -m metas.historico tendencia --inicio 2025-01-01 --fim 2025-06-30 --saida tendencia.csv
+"""
+import argparse
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from .gestor import GestorMetas
+from .metricas import instrumentar
+from .migracoes import CAMPO_EXCLUSAO, CAMPOS_HISTORICO
+
+# Mínimo de eventos desde o último checkpoint para criar outro
+MIN_EVENTOS_CHECKPOINT = 10_000
+FREQUENCIAS = {"Diária": "D", "Semanal": "W", "Mensal": "ME"}
+
+_COLUNAS_ESTADO = list(CAMPOS_HISTORICO)
+_NOMES_CAMPOS = {codigo: campo for campo, codigo in CAMPOS_HISTORICO.items()}
+
+
+def _momento(data):
+    """Segundos Unix (UTC) de ``data``; datas sem horário valem até o fim do dia."""
+    if isinstance(data, str) and len(data) == 10:
+        data = date.fromisoformat(data)
+    if isinstance(data, date) and not isinstance(data, datetime):
+        data = datetime.combine(data + timedelta(days=1), datetime.min.time()) - timedelta(seconds=1)
+    return int(pd.Timestamp(data).timestamp())
+
+
+def _ultimo_evento_ate(conn, momento):
+    row = conn.execute(
+        'SELECT id FROM historico_metas WHERE momento <= ? ORDER BY momento DESC, id DESC LIMIT 1', (momento,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _eventos(conn, desde, ate):
+    return pd.read_sql_query(
+        'SELECT meta_id, momento, campo, valor FROM historico_metas WHERE id > ? AND id <= ? ORDER BY id',
+        conn, params=(desde, ate),
+    )
+
+
+def _aplicar_eventos(estado, eventos):
+    """Aplica ``eventos`` (em ordem) ao ``estado`` indexado por meta; vale o último valor de cada campo."""
+    if eventos.empty:
+        return estado
+    ultimos = (eventos.drop_duplicates(["meta_id", "campo"], keep="last")
+               .pivot(index="meta_id", columns="campo", values="valor")
+               .reindex(columns=[*_NOMES_CAMPOS, CAMPO_EXCLUSAO]))
+    excluidas = ultimos.index[ultimos[CAMPO_EXCLUSAO].notna()]
+    ultimos = ultimos[list(_NOMES_CAMPOS)].rename(columns=_NOMES_CAMPOS)
+    # Metas anteriores ao primeiro checkpoint só têm eventos de alteração; sem
+    # o estado de partida, ficam de fora até o checkpoint que as contém
+    ultimos = ultimos[ultimos.index.isin(estado.index) | ultimos.notna().all(axis=1)]
+    estado = ultimos.combine_first(estado.astype("float64")).drop(excluidas, errors="ignore")
+    return estado[_COLUNAS_ESTADO].astype("int64")
+
+
+def _estado_em(conn, momento):
+    """Estado codificado (department_id, status_id, progress) de cada meta em ``momento``."""
+    checkpoint = conn.execute(
+        'SELECT id, ultimo_evento FROM checkpoints_historico WHERE momento <= ? ORDER BY id DESC LIMIT 1',
+        (momento,),
+    ).fetchone()
+    if checkpoint is None:
+        # Antes do primeiro checkpoint só existem as metas criadas depois da migração
+        estado, desde = pd.DataFrame(columns=_COLUNAS_ESTADO, dtype="int64"), 0
+    else:
+        estado = pd.read_sql_query(
+            f'SELECT meta_id, {", ".join(_COLUNAS_ESTADO)} FROM estado_checkpoint WHERE checkpoint_id = ?',
+            conn, params=(checkpoint[0],), index_col="meta_id",
+        )
+        desde = checkpoint[1]
+    return _aplicar_eventos(estado, _eventos(conn, desde, _ultimo_evento_ate(conn, momento)))
+
+
+def _dominio(conn, tabela):
+    return dict(conn.execute(f'SELECT id, nome FROM {tabela}').fetchall())
+
+
+@instrumentar
+def metas_em(gestor, data):
+    """Retorna ``id``, ``department``, ``status`` e ``progress`` de cada meta existente em ``data``."""
+    with gestor.pool.conexao() as conn:
+        estado = _estado_em(conn, _momento(data))
+        departamentos = _dominio(conn, "departamentos")
+        status = _dominio(conn, "status_metas")
+    return pd.DataFrame({
+        "id": estado.index,
+        "department": estado["department_id"].map(departamentos).to_numpy(),
+        "status": estado["status_id"].map(status).to_numpy(),
+        "progress": estado["progress"].to_numpy(),
+    })
+
+
+@instrumentar
+def tendencia_departamentos(gestor, inicio, fim, frequencia="W"):
+    """Progresso médio de cada departamento nas datas de ``inicio`` a ``fim``.
+
+    As datas seguem ``frequencia`` (alias do pandas; a última é sempre
+    ``fim``). O estado é montado uma vez, na primeira data, e depois só os
+    eventos de cada intervalo são aplicados. Retorna um DataFrame com uma
+    linha por data e uma coluna por departamento.
+    """
+    datas = pd.date_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq=frequencia)
+    if len(datas) == 0 or datas[-1] != pd.Timestamp(fim):
+        datas = datas.append(pd.DatetimeIndex([pd.Timestamp(fim)]))
+    momentos = [_momento(data.date()) for data in datas]
+
+    with gestor.pool.conexao() as conn:
+        estado = _estado_em(conn, momentos[0])
+        eventos = _eventos(conn, _ultimo_evento_ate(conn, momentos[0]), _ultimo_evento_ate(conn, momentos[-1]))
+        departamentos = _dominio(conn, "departamentos")
+        # O primeiro checkpoint traz as metas anteriores à migração, que não têm
+        # evento de inclusão; se ele cai dentro do período, o estado é remontado
+        primeiro = conn.execute('SELECT MIN(momento) FROM checkpoints_historico').fetchone()[0]
+        remontar = primeiro is not None and momentos[0] < primeiro <= momentos[-1]
+
+        # O relógio pode recuar; o máximo acumulado mantém os cortes em ordem
+        cortes = eventos["momento"].cummax().searchsorted(momentos, side="right")
+        linhas, aplicados = {}, 0
+        for data, momento, corte in zip(datas, momentos, cortes):
+            if remontar and momento >= primeiro:
+                estado, remontar = _estado_em(conn, momento), False
+            else:
+                estado = _aplicar_eventos(estado, eventos.iloc[aplicados:corte])
+            aplicados = corte
+            linhas[data] = estado.groupby("department_id")["progress"].mean()
+    tendencia = pd.DataFrame(linhas).T.rename(columns=departamentos)
+    return tendencia.rename_axis(index="data", columns="department").sort_index(axis=1)
+
+
+@instrumentar
+def criar_checkpoint(gestor):
+    """Grava o estado atual de todas as metas como checkpoint e retorna o seu ID."""
+    with gestor.pool.transacao() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ultimo = conn.execute('SELECT COALESCE(MAX(id), 0) FROM historico_metas').fetchone()[0]
+        checkpoint = conn.execute(
+            "INSERT INTO checkpoints_historico (momento, ultimo_evento) "
+            "VALUES (CAST(strftime('%s', 'now') AS INTEGER), ?)", (ultimo,),
+        ).lastrowid
+        conn.execute(
+            f'INSERT INTO estado_checkpoint SELECT ?, id, {", ".join(_COLUNAS_ESTADO)} FROM metas', (checkpoint,)
+        )
+    return checkpoint
+
+
+def checkpoint_se_necessario(gestor, min_eventos=MIN_EVENTOS_CHECKPOINT):
+    """Cria um checkpoint se os eventos desde o último passam de ``min_eventos`` e do número de metas.
+
+    Atrelar o intervalo ao número de metas mantém o espaço dos checkpoints
+    proporcional ao do próprio histórico. Retorna o ID criado ou None.
+    """
+    with gestor.pool.conexao() as conn:
+        pendentes, metas = conn.execute('''
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM historico_metas)
+                   - (SELECT COALESCE(MAX(ultimo_evento), 0) FROM checkpoints_historico),
+                   (SELECT COALESCE(SUM(total), 0) FROM resumo_progresso WHERE dimensao = 'status')
+        ''').fetchone()
+    if pendentes < max(min_eventos, metas):
+        return None
+    return criar_checkpoint(gestor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkpoints e tendências do histórico de metas.")
+    parser.add_argument("acao", choices=["checkpoint", "tendencia"])
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="primeira data da tendência (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=date.fromisoformat, default=date.today(), help="última data (padrão: hoje)")
+    parser.add_argument("--frequencia", default="W", help="alias de frequência do pandas (padrão: W)")
+    parser.add_argument("--saida", default=None, help="arquivo CSV da tendência (padrão: imprime na tela)")
+    args = parser.parse_args(argv)
+
+    gestor = GestorMetas(args.db)
+    if args.acao == "checkpoint":
+        print(f"Checkpoint {criar_checkpoint(gestor)} criado em {gestor.db_path}")
+        return 0
+
+    inicio = args.inicio or args.fim - timedelta(days=90)
+    tendencia = tendencia_departamentos(gestor, inicio, args.fim, args.frequencia).round(1)
+    if args.saida:
+        tendencia.to_csv(args.saida)
+        print(f"Tendência de {len(tendencia)} datas gravada em {args.saida}")
+    else:
+        print(tendencia.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+"""Importação em lote de metas a partir de arquivos CSV ou Parquet.
+
+Uso pela linha de comando::
+
+    python -m metas.importacao metas.csv --db metas.db --bloco 50000
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from .gestor import DEPARTAMENTOS, STATUS, GestorMetas
+
+COLUNAS_IMPORTACAO = ["employee_name", "department", "goal_description",
+                      "start_date", "end_date", "status", "progress"]
+TAMANHO_BLOCO_PADRAO = 50_000
+MAX_ERROS_REPORTADOS = 100
+
+
+def detectar_formato(nome):
+    """Deduz o formato ('csv' ou 'parquet') pela extensão do arquivo."""
+    extensao = os.path.splitext(str(nome))[1].lower()
+    if extensao in (".parquet", ".pq"):
+        return "parquet"
+    if extensao == ".csv":
+        return "csv"
+    raise ValueError(f"Formato de arquivo não suportado: {extensao or nome}")
+
+
+def ler_em_blocos(origem, formato, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Lê o arquivo em DataFrames de até ``tamanho_bloco`` linhas, sem carregá-lo inteiro."""
+    if formato == "csv":
+        yield from pd.read_csv(origem, dtype=str, keep_default_na=False, chunksize=tamanho_bloco)
+    elif formato == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("A importação de Parquet requer o pacote 'pyarrow'.") from e
+        arquivo = pq.ParquetFile(origem)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            yield lote.to_pandas()
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {formato}")
+
+
+def validar_bloco(df, deslocamento=0):
+    """Valida um bloco contra os vocabulários de departamento e status.
+
+    Retorna o DataFrame normalizado com as linhas válidas e a lista de erros
+    ``(linha, motivo)``; ``linha`` é contada a partir de 1 no arquivo.
+    """
+    faltando = [col for col in COLUNAS_IMPORTACAO if col not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    df = df[COLUNAS_IMPORTACAO].copy()
+    for col in ("employee_name", "department", "goal_description", "status"):
+        df[col] = df[col].astype("string").str.strip()
+    start = pd.to_datetime(df["start_date"], errors="coerce", format="ISO8601")
+    end = pd.to_datetime(df["end_date"], errors="coerce", format="ISO8601")
+    progress = pd.to_numeric(df["progress"], errors="coerce")
+
+    regras = [
+        (df["employee_name"].fillna("") == "", "nome do funcionário vazio"),
+        (df["goal_description"].fillna("") == "", "descrição da meta vazia"),
+        (~df["department"].isin(DEPARTAMENTOS), "departamento inválido"),
+        (~df["status"].isin(STATUS), "status inválido"),
+        (start.isna(), "data de início inválida"),
+        (end.isna(), "data de fim inválida"),
+        (progress.isna() | (progress < 0) | (progress > 100) | (progress % 1 != 0), "progresso inválido"),
+    ]
+    invalido = pd.Series(False, index=df.index)
+    erros = []
+    for mascara, motivo in regras:
+        mascara = mascara.fillna(True).astype(bool)
+        novos = mascara & ~invalido
+        erros.extend((deslocamento + int(pos) + 1, motivo) for pos in novos.to_numpy().nonzero()[0])
+        invalido |= mascara
+
+    validos = ~invalido
+    df = df[validos]
+    df["start_date"] = start[validos].dt.strftime("%Y-%m-%d")
+    df["end_date"] = end[validos].dt.strftime("%Y-%m-%d")
+    df["progress"] = progress[validos].astype(int)
+    erros.sort()
+    return df, erros
+
+
+def importar_metas(gestor, origem, formato=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Importa metas de ``origem`` em blocos, uma transação por bloco.
+
+    ``origem`` pode ser um caminho ou um arquivo aberto; nesse caso informe
+    ``formato`` ou use um objeto com atributo ``name``. Retorna um dicionário
+    com inseridas, rejeitadas, os primeiros erros, o tempo gasto e a vazão em
+    linhas por segundo.
+    """
+    formato = formato or detectar_formato(getattr(origem, "name", origem))
+    inicio = time.perf_counter()
+    inseridas = rejeitadas = lidas = 0
+    erros = []
+
+    for bloco in ler_em_blocos(origem, formato, tamanho_bloco):
+        validos, erros_bloco = validar_bloco(bloco, deslocamento=lidas)
+        lidas += len(bloco)
+        rejeitadas += len(erros_bloco)
+        erros.extend(erros_bloco[:MAX_ERROS_REPORTADOS - len(erros)])
+        if not validos.empty:
+            inseridas += gestor.add_metas_lote(validos.itertuples(index=False, name=None))
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "inseridas": inseridas,
+        "rejeitadas": rejeitadas,
+        "erros": erros,
+        "segundos": segundos,
+        "linhas_por_segundo": lidas / segundos if segundos > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa metas em lote de um arquivo CSV ou Parquet.")
+    parser.add_argument("arquivo", help="arquivo .csv ou .parquet com as colunas " + ", ".join(COLUNAS_IMPORTACAO))
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_PADRAO, help="linhas por bloco/transação")
+    args = parser.parse_args(argv)
+
+    resultado = importar_metas(GestorMetas(args.db), args.arquivo, args.formato, args.bloco)
+    print(f"Inseridas: {resultado['inseridas']}")
+    print(f"Rejeitadas: {resultado['rejeitadas']}")
+    for linha, motivo in resultado["erros"]:
+        print(f"  linha {linha}: {motivo}")
+    print(f"Tempo: {resultado['segundos']:.2f}s ({resultado['linhas_por_segundo']:.0f} linhas/s)")
+    return 0 if resultado["rejeitadas"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+"""Registro de métricas do processo: tempos de consulta, de páginas e planos de execução.
+
+As consultas do ``GestorMetas`` são medidas pelo decorador ``instrumentar``
+(tempo e linhas retornadas) e, em uma amostra das chamadas, o SQL executado
+é capturado pelo pool de conexões para guardar o ``EXPLAIN QUERY PLAN``. As
+páginas da interface usam ``medir_view``. Tudo fica no registro do processo,
+que pode ser exportado no formato texto do Prometheus.
+"""
+import functools
+import os
+import random
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# Fração das consultas com plano de execução capturado; pode ser ajustada por METAS_AMOSTRA_PLANOS
+TAXA_AMOSTRA_PLANOS = float(os.environ.get("METAS_AMOSTRA_PLANOS", "0.01"))
+# Arquivo padrão da exportação Prometheus; pode ser sobrescrito por METAS_METRICAS_PATH
+METRICAS_PATH_PADRAO = os.environ.get("METAS_METRICAS_PATH", "metricas.prom")
+
+# Limites dos buckets dos histogramas de tempo, em segundos
+BUCKETS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Histogramas que não medem tempo, com os seus próprios limites
+BUCKETS = {
+    "metas_fila_escrita_lote": (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+}
+
+# Descrição de cada métrica, usada no # HELP da exportação
+DESCRICOES = {
+    "metas_consulta_segundos": "Duração das operações do GestorMetas.",
+    "metas_consulta_linhas_total": "Linhas retornadas ou alteradas pelas operações do GestorMetas.",
+    "metas_view_segundos": "Duração da execução das páginas e seções da interface.",
+    "metas_marcadas_atrasadas_total": "Metas marcadas como Atrasada pela marcação periódica.",
+    "metas_arquivadas_total": "Metas de ciclos passados movidas para o arquivo.",
+    "metas_fila_escrita_profundidade": "Escritas aguardando na fila de escrita.",
+    "metas_fila_escrita_lote": "Escritas agrupadas em cada commit da fila de escrita.",
+    "metas_fila_escrita_commit_segundos": "Duração de cada commit em grupo da fila de escrita.",
+    "metas_fila_escrita_total": "Escritas processadas pela fila de escrita.",
+    "metas_pool_conexoes": "Conexões SQLite do pool, por estado.",
+    "metas_cache_bytes": "Memória ocupada pelo cache de snapshots.",
+    "metas_cache_hit_rate": "Fração das leituras atendidas pelo cache de snapshots.",
+}
+
+# Statements cujo plano vale a pena guardar
+_PREFIXOS_PLANO = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+MAX_STATEMENTS_PLANO = 5
+
+_local = threading.local()
+
+
+class _Histograma:
+    __slots__ = ("limites", "buckets", "contagem", "soma", "maximo")
+
+    def __init__(self, limites=BUCKETS_SEGUNDOS):
+        self.limites = limites
+        self.buckets = [0] * len(limites)
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.buckets[i] += 1
+                break
+        self.contagem += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def quantil(self, q):
+        """Estimativa do quantil ``q`` pelo limite superior do bucket."""
+        alvo = q * self.contagem
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, self.buckets):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class RegistroMetricas:
+    """Histogramas, contadores e medidores do processo, identificados por nome e rótulos."""
+
+    def __init__(self, taxa_amostra_planos=TAXA_AMOSTRA_PLANOS):
+        self.taxa_amostra_planos = taxa_amostra_planos
+        self._histogramas = {}
+        self._contadores = {}
+        self._medidores = {}
+        self._planos = {}
+        self._lock = threading.Lock()
+
+    def observar(self, nome, valor, **rotulos):
+        """Registra ``valor`` no histograma ``nome``."""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = _Histograma(BUCKETS.get(nome, BUCKETS_SEGUNDOS))
+            histograma.observar(valor)
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """Soma ``valor`` ao contador ``nome``."""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        """Define o valor atual do medidor ``nome``."""
+        with self._lock:
+            self._medidores[(nome, tuple(sorted(rotulos.items())))] = valor
+
+    def amostrar_plano(self, operacao):
+        """Indica se a próxima chamada de ``operacao`` deve ter o plano capturado."""
+        return operacao not in self._planos or random.random() < self.taxa_amostra_planos
+
+    def registrar_plano(self, operacao, sql, plano, segundos):
+        with self._lock:
+            self._planos[operacao] = {"sql": sql, "plano": plano, "segundos": segundos,
+                                      "registrado_em": time.time()}
+
+    def planos(self):
+        """Último plano de execução amostrado de cada operação."""
+        with self._lock:
+            return {operacao: dict(plano) for operacao, plano in sorted(self._planos.items())}
+
+    def resumo(self, nome):
+        """DataFrame com contagem, média, p95 e máximo (ms) do histograma ``nome`` por rótulos."""
+        with self._lock:
+            linhas = [
+                {**dict(rotulos), "chamadas": h.contagem, "media_ms": h.soma / h.contagem * 1000,
+                 "p95_ms": h.quantil(0.95) * 1000, "max_ms": h.maximo * 1000, "total_s": h.soma}
+                for (nome_h, rotulos), h in self._histogramas.items() if nome_h == nome and h.contagem
+            ]
+        return pd.DataFrame(linhas)
+
+    def contadores(self, nome):
+        """Valores do contador ``nome`` por rótulos."""
+        with self._lock:
+            return {rotulos: valor for (nome_c, rotulos), valor in self._contadores.items() if nome_c == nome}
+
+    def zerar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self._medidores.clear()
+            self._planos.clear()
+
+    def exportar_prometheus(self):
+        """Retorna as métricas no formato texto de exposição do Prometheus."""
+        with self._lock:
+            histogramas = {chave: (h.limites, list(h.buckets), h.contagem, h.soma)
+                           for chave, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+            medidores = dict(self._medidores)
+
+        linhas = []
+        for tipo, valores in (("counter", contadores), ("gauge", medidores), ("histogram", histogramas)):
+            for nome in sorted({nome for nome, _rotulos in valores}):
+                linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+                for (nome_m, rotulos), valor in sorted(valores.items()):
+                    if nome_m != nome:
+                        continue
+                    if tipo != "histogram":
+                        linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+                        continue
+                    limites, buckets, contagem, soma = valor
+                    acumulado = 0
+                    for limite, quantidade in zip(limites, buckets):
+                        acumulado += quantidade
+                        linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', str(limite)),))} {acumulado}")
+                    linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', '+Inf'),))} {contagem}")
+                    linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma}")
+                    linhas.append(f"{nome}_count{_rotulos(rotulos)} {contagem}")
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, destino=None):
+        """Grava a exportação Prometheus em ``destino`` de forma atômica e retorna o caminho."""
+        destino = os.path.abspath(destino or METRICAS_PATH_PADRAO)
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.exportar_prometheus())
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, destino)
+        return destino
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + "}"
+
+
+def captura_sql():
+    """Lista onde o pool deve anotar o SQL executado pela thread atual, ou None."""
+    return getattr(_local, "captura", None)
+
+
+def contar_linhas(resultado):
+    """Linhas de um resultado do GestorMetas: DataFrame, lista, página (df, tem_proxima) ou registro."""
+    if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], pd.DataFrame):
+        resultado = resultado[0]
+    if isinstance(resultado, (pd.DataFrame, list)):
+        return len(resultado)
+    return 0 if resultado is None else 1
+
+
+def _plano(conn, sql):
+    """Texto indentado do EXPLAIN QUERY PLAN de ``sql``."""
+    nivel = {0: -1}
+    linhas = []
+    for id_no, pai, _nao_usado, detalhe in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        nivel[id_no] = nivel.get(pai, -1) + 1
+        linhas.append("  " * nivel[id_no] + detalhe)
+    return "\n".join(linhas)
+
+
+def _registrar_planos(registro, pool, operacao, statements, segundos):
+    # Sem duplicatas (executemany repete o statement), sem o controle de
+    # versão do cache e sem o SQL interno das tabelas do FTS5
+    statements = [
+        sql for sql in dict.fromkeys(sql.strip() for sql in statements if sql)
+        if sql.upper().startswith(_PREFIXOS_PLANO) and "versao_dados" not in sql and "'main'." not in sql
+    ][:MAX_STATEMENTS_PLANO]
+    if not statements:
+        return
+    with pool.conexao() as conn:
+        planos = []
+        for sql in statements:
+            try:
+                planos.append(_plano(conn, sql))
+            except Exception as erro:  # SQL expandido que não pode ser reanalisado
+                planos.append(f"(plano indisponível: {erro})")
+    registro.registrar_plano(operacao, "\n;\n".join(statements), "\n---\n".join(planos), segundos)
+
+
+def instrumentar(metodo=None, *, linhas=contar_linhas):
+    """Decora um método do GestorMetas para medir tempo, linhas e, por amostragem, o plano.
+
+    ``linhas`` converte o resultado no número de linhas registradas; o padrão
+    é ``contar_linhas``.
+    """
+    if metodo is None:
+        return functools.partial(instrumentar, linhas=linhas)
+    operacao = metodo.__name__
+
+    @functools.wraps(metodo)
+    def envolto(self, *args, **kwargs):
+        registro = get_registro()
+        anterior = captura_sql()
+        captura = [] if registro.amostrar_plano(operacao) else None
+        _local.captura = captura
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(self, *args, **kwargs)
+        finally:
+            segundos = time.perf_counter() - inicio
+            _local.captura = anterior
+        registro.observar("metas_consulta_segundos", segundos, operacao=operacao)
+        registro.incrementar("metas_consulta_linhas_total", linhas(resultado), operacao=operacao)
+        if captura:
+            _registrar_planos(registro, self.pool, operacao, captura, segundos)
+        return resultado
+    return envolto
+
+
+def medir_view(nome):
+    """Decora a função de uma página ou seção da interface para medir sua execução."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolto(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                get_registro().observar("metas_view_segundos", time.perf_counter() - inicio, view=nome)
+        return envolto
+    return decorador
+
+
+def registrar_estado(gestor, registro=None):
+    """Atualiza os medidores de pool e cache a partir do estado atual do ``gestor``."""
+    registro = registro or get_registro()
+    pool = gestor.estatisticas_pool()
+    cache = gestor.estatisticas_cache()
+    registro.definir("metas_pool_conexoes", pool["abertas"], estado="abertas")
+    registro.definir("metas_pool_conexoes", pool["ociosas"], estado="ociosas")
+    registro.definir("metas_cache_bytes", cache["bytes"])
+    registro.definir("metas_cache_hit_rate", cache["hit_rate"])
+    return registro
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def get_registro():
+    """Retorna o registro de métricas compartilhado pelo processo."""
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroMetricas()
+        return _registro
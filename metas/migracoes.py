@@ -0,0 +1,575 @@
+"""Migrações versionadas do schema do banco de metas.
+
+Cada migração é uma tupla ``(versao, descricao, passos)``; ``passos`` é uma
+sequência de comandos SQL ou uma função que recebe a conexão. A versão
+aplicada fica registrada em ``PRAGMA user_version`` do próprio arquivo, e
+novas tabelas, colunas e índices devem ser adicionados sempre como uma nova
+entrada no final de ``MIGRACOES``.
+"""
+import logging
+import threading
+
+from .questionario import (
+    BITS_OPCAO, CABECALHO_DIAGNOSTICO, CABECALHO_SUGESTOES, QUESTOES_INDIVIDUAIS, QUESTOES_ORGANIZACIONAIS,
+    SELECOES_ORGANIZACIONAIS, SEM_PROBLEMAS, problemas_das_respostas, textos_diagnostico_individual,
+)
+
+logger = logging.getLogger(__name__)
+
+# Dimensões do resumo materializado: nome da dimensão -> coluna de metas
+DIMENSOES_RESUMO = {"department": "department", "status": "status", "employee": "employee_name"}
+
+# Datas são gravadas como número de dias desde 1970-01-01 (dia juliano 2440587.5)
+EPOCA_JULIANA = 2440587.5
+
+# Código de cada campo no histórico de metas; CAMPO_EXCLUSAO marca a remoção da meta
+CAMPOS_HISTORICO = {"progress": 0, "status_id": 1, "department_id": 2}
+CAMPO_EXCLUSAO = 3
+
+_MOMENTO_ATUAL = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+# Vocabulários iniciais das tabelas de domínio, na ordem das categorias
+_DEPARTAMENTOS_INICIAIS = ["Vendas", "Marketing", "RH", "Financeiro", "TI",
+                           "Operações", "Administrativo", "Produção", "Logística"]
+_STATUS_INICIAIS = ["Em Andamento", "Concluída", "Não Concluída", "Atrasada"]
+
+
+def sql_id(tabela, nome="?"):
+    """Expressão SQL que converte ``nome`` no id da tabela de domínio (NULL se não existir)."""
+    return f"(SELECT id FROM {tabela} WHERE nome = {nome})"
+
+
+def sql_nome(tabela, codigo):
+    """Expressão SQL que converte o id ``codigo`` no nome da tabela de domínio."""
+    return f"(SELECT nome FROM {tabela} WHERE id = {codigo})"
+
+
+def sql_dia(data="?"):
+    """Expressão SQL que converte uma data ISO no número do dia (NULL se inválida)."""
+    return f"CAST(julianday(date({data})) - {EPOCA_JULIANA} AS INTEGER)"
+
+
+def sql_data(dia):
+    """Expressão SQL que converte o número do dia de volta em data ISO (AAAA-MM-DD)."""
+    return f"date({EPOCA_JULIANA} + {dia})"
+
+
+def _sql_texto(texto):
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def sql_problemas(respostas):
+    """Expressão SQL do bitmask de problemas a partir das ``respostas`` do diagnóstico individual."""
+    mascara = problemas_das_respostas(0)
+    # XOR, que o SQLite não tem como operador
+    return f"(({respostas}) | {mascara}) - (({respostas}) & {mascara})"
+
+
+def sql_textos_diagnostico(problemas, diagnosis="diagnosis", suggestions="suggestions"):
+    """Expressões SQL de diagnóstico e sugestões geradas do bitmask ``problemas``.
+
+    Produz os mesmos textos de ``textos_diagnostico_individual``; quando
+    ``problemas`` é NULL (meta sem diagnóstico individual registrado), ficam
+    os textos gravados em ``diagnosis`` e ``suggestions``.
+    """
+    expressoes = []
+    for coluna, cabecalho, indice, sem_problemas in ((diagnosis, CABECALHO_DIAGNOSTICO, 2, SEM_PROBLEMAS[0]),
+                                                     (suggestions, CABECALHO_SUGESTOES, 3, SEM_PROBLEMAS[1])):
+        itens = " || ".join(
+            f"CASE WHEN {problemas} & {1 << i} THEN {_sql_texto(chr(10) + '• ' + questao[indice])} ELSE '' END"
+            for i, questao in enumerate(QUESTOES_INDIVIDUAIS)
+        )
+        expressoes.append(
+            f"CASE WHEN {problemas} IS NULL THEN {coluna} "
+            f"WHEN {problemas} = 0 THEN {_sql_texto(cabecalho + chr(10) + '• ' + sem_problemas)} "
+            f"ELSE {_sql_texto(cabecalho)} || {itens} END"
+        )
+    return tuple(expressoes)
+
+
+# Chave de cada dimensão do resumo e condição de meta concluída, como
+# modelos sobre ``{ref}`` (new/old): primeiro no schema com texto, depois
+# no schema com códigos inteiros (migração 7).
+_CHAVES_RESUMO_TEXTO = {dimensao: "{ref}." + coluna for dimensao, coluna in DIMENSOES_RESUMO.items()}
+_CONCLUIDA_TEXTO = "{ref}.status = 'Concluída'"
+_CHAVES_RESUMO_CODIGOS = {
+    "department": sql_nome("departamentos", "{ref}.department_id"),
+    "status": sql_nome("status_metas", "{ref}.status_id"),
+    "employee": "{ref}.employee_name",
+}
+_CONCLUIDA_CODIGOS = "{ref}.status_id = " + sql_id("status_metas", "'Concluída'")
+
+
+def _sql_resumo_entrada(ref, chaves=_CHAVES_RESUMO_TEXTO, concluida=_CONCLUIDA_TEXTO):
+    """Comandos que somam a meta ``ref`` (new) ao resumo de cada dimensão."""
+    concluida = concluida.format(ref=ref)
+    return "\n".join(f'''
+            INSERT INTO resumo_progresso (dimensao, chave, progress, total, concluidas)
+            VALUES ('{dimensao}', {chave.format(ref=ref)}, {ref}.progress, 1, {concluida})
+            ON CONFLICT (dimensao, chave, progress) DO UPDATE
+            SET total = total + 1, concluidas = concluidas + excluded.concluidas;'''
+        for dimensao, chave in chaves.items())
+
+
+def _sql_resumo_saida(ref, chaves=_CHAVES_RESUMO_TEXTO, concluida=_CONCLUIDA_TEXTO):
+    """Comandos que subtraem a meta ``ref`` (old) do resumo de cada dimensão."""
+    concluida = concluida.format(ref=ref)
+    comandos = []
+    for dimensao, chave in chaves.items():
+        condicao = f"dimensao = '{dimensao}' AND chave = {chave.format(ref=ref)} AND progress = {ref}.progress"
+        comandos.append(f'''
+            UPDATE resumo_progresso
+            SET total = total - 1, concluidas = concluidas - ({concluida})
+            WHERE {condicao};
+            DELETE FROM resumo_progresso WHERE {condicao} AND total <= 0;''')
+    return "\n".join(comandos)
+
+
+def _criar_triggers_resumo(conn, colunas, chaves=_CHAVES_RESUMO_TEXTO, concluida=_CONCLUIDA_TEXTO):
+    """Cria os triggers que mantêm ``resumo_progresso``; ``colunas`` dispara a atualização."""
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_progresso_ai AFTER INSERT ON metas BEGIN
+            {_sql_resumo_entrada("new", chaves, concluida)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_progresso_ad AFTER DELETE ON metas BEGIN
+            {_sql_resumo_saida("old", chaves, concluida)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS resumo_progresso_au
+        AFTER UPDATE OF {colunas} ON metas BEGIN
+            {_sql_resumo_saida("old", chaves, concluida)}
+            {_sql_resumo_entrada("new", chaves, concluida)}
+        END
+    ''')
+
+
+# Triggers que mantêm o índice FTS5 sincronizado com metas
+_TRIGGERS_FTS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS metas_fts_ai AFTER INSERT ON metas BEGIN
+        INSERT INTO metas_fts (rowid, employee_name, goal_description)
+        VALUES (new.id, new.employee_name, new.goal_description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS metas_fts_ad AFTER DELETE ON metas BEGIN
+        INSERT INTO metas_fts (metas_fts, rowid, employee_name, goal_description)
+        VALUES ('delete', old.id, old.employee_name, old.goal_description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS metas_fts_au AFTER UPDATE OF employee_name, goal_description ON metas BEGIN
+        INSERT INTO metas_fts (metas_fts, rowid, employee_name, goal_description)
+        VALUES ('delete', old.id, old.employee_name, old.goal_description);
+        INSERT INTO metas_fts (rowid, employee_name, goal_description)
+        VALUES (new.id, new.employee_name, new.goal_description);
+    END
+    ''',
+)
+
+
+def _criar_resumo_progresso(conn):
+    # Um histograma de progresso (0-100) por grupo permite manter contagem,
+    # soma, mínimo e máximo de forma incremental, inclusive em exclusões.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_progresso (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            progress INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            concluidas INTEGER NOT NULL,
+            PRIMARY KEY (dimensao, chave, progress)
+        ) WITHOUT ROWID
+    ''')
+    _criar_triggers_resumo(conn, "employee_name, department, status, progress")
+    conn.execute("DELETE FROM resumo_progresso")
+    for dimensao, coluna in DIMENSOES_RESUMO.items():
+        conn.execute(f'''
+            INSERT INTO resumo_progresso (dimensao, chave, progress, total, concluidas)
+            SELECT '{dimensao}', {coluna}, progress, COUNT(*), SUM(status = 'Concluída')
+            FROM metas GROUP BY {coluna}, progress
+        ''')
+
+
+_TRIGGER_DIAGNOSTICOS = '''
+    CREATE TRIGGER IF NOT EXISTS diagnosticos_individuais_ad AFTER DELETE ON metas BEGIN
+        DELETE FROM diagnosticos_individuais WHERE meta_id = old.id;
+    END
+'''
+
+
+def _criar_diagnosticos_individuais(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS diagnosticos_individuais (
+            meta_id INTEGER PRIMARY KEY,
+            respostas INTEGER NOT NULL,
+            problemas INTEGER NOT NULL,
+            atualizado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(_TRIGGER_DIAGNOSTICOS)
+    # Converte os textos gerados pela versão anterior do formulário; só
+    # linhas cujo texto é reproduzido exatamente a partir dos problemas são
+    # convertidas, para não perder anotações escritas à mão.
+    convertidas = []
+    rows = conn.execute(
+        "SELECT id, diagnosis, suggestions FROM metas WHERE diagnosis LIKE 'DIAGNÓSTICO AUTOMÁTICO:%'"
+    ).fetchall()
+    for meta_id, diagnosis, suggestions in rows:
+        problemas = sum(1 << i for i, questao in enumerate(QUESTOES_INDIVIDUAIS)
+                        if f"• {questao[2]}" in diagnosis)
+        if textos_diagnostico_individual(problemas) == (diagnosis, suggestions):
+            convertidas.append((meta_id, problemas_das_respostas(problemas), problemas))
+    conn.executemany(
+        "INSERT OR REPLACE INTO diagnosticos_individuais (meta_id, respostas, problemas) VALUES (?, ?, ?)",
+        convertidas,
+    )
+    conn.executemany(
+        "UPDATE metas SET diagnosis = NULL, suggestions = NULL WHERE id = ?",
+        [(meta_id,) for meta_id, _respostas, _problemas in convertidas],
+    )
+
+
+def _codificar_metas(conn):
+    # Departamento e status passam a ser ids das tabelas de domínio e as
+    # datas, números de dia. O SQLite não altera o tipo de colunas, então a
+    # tabela é reconstruída preservando os ids; índices e triggers de metas
+    # são recriados sobre as novas colunas.
+    for tabela, nomes, coluna in (("departamentos", _DEPARTAMENTOS_INICIAIS, "department"),
+                                  ("status_metas", _STATUS_INICIAIS, "status")):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)")
+        conn.executemany(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", [(nome,) for nome in nomes])
+        # Valores fora do vocabulário gravados por versões anteriores são mantidos
+        conn.execute(f"INSERT OR IGNORE INTO {tabela} (nome) SELECT DISTINCT {coluna} FROM metas ORDER BY {coluna}")
+
+    conn.execute('''
+        CREATE TABLE metas_codificada (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_name TEXT NOT NULL,
+            department_id INTEGER NOT NULL REFERENCES departamentos (id),
+            goal_description TEXT NOT NULL,
+            start_day INTEGER NOT NULL,
+            end_day INTEGER NOT NULL,
+            status_id INTEGER NOT NULL REFERENCES status_metas (id),
+            progress INTEGER NOT NULL,
+            completion_day INTEGER,
+            diagnosis TEXT,
+            suggestions TEXT
+        )
+    ''')
+    # Datas gravadas por versões anteriores em outro formato que não o ISO
+    # não têm número de dia; para que a migração não falhe, passam a ser a
+    # data da migração e ficam registradas no log com o valor original
+    hoje = sql_dia("'now'")
+    datas = {}
+    for coluna, obrigatoria in (("start_date", True), ("end_date", True), ("completion_date", False)):
+        invalida = f"{sql_dia(coluna)} IS NULL"
+        datas[coluna] = f"COALESCE({sql_dia(coluna)}, {hoje})"
+        if not obrigatoria:
+            # Sem data de conclusão (NULL ou vazia), a meta continua sem ela
+            invalida += f" AND NULLIF({coluna}, '') IS NOT NULL"
+            datas[coluna] = f"CASE WHEN NULLIF({coluna}, '') IS NULL THEN NULL ELSE {datas[coluna]} END"
+        invalidas = conn.execute(f"SELECT id, {coluna} FROM metas WHERE {invalida}").fetchall()
+        if invalidas:
+            logger.warning("%d metas com %s inválida gravadas com a data de hoje: %s", len(invalidas), coluna,
+                           ", ".join(f"{meta_id} ({valor!r})" for meta_id, valor in invalidas))
+    conn.execute(f'''
+        INSERT INTO metas_codificada
+        SELECT id, employee_name, {sql_id("departamentos", "department")}, goal_description,
+               {datas["start_date"]}, {datas["end_date"]}, {sql_id("status_metas", "status")},
+               progress, {datas["completion_date"]}, diagnosis, suggestions
+        FROM metas
+    ''')
+    sequencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'metas'").fetchone()
+    conn.execute("DROP TABLE metas")
+    conn.execute("ALTER TABLE metas_codificada RENAME TO metas")
+    if sequencia is not None:
+        # Mantém o AUTOINCREMENT: ids de metas excluídas não são reutilizados
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'metas'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('metas', ?)", sequencia)
+
+    for comando in (
+        "CREATE INDEX idx_metas_department ON metas (department_id)",
+        "CREATE INDEX idx_metas_status ON metas (status_id)",
+        "CREATE INDEX idx_metas_employee_name ON metas (employee_name)",
+        "CREATE INDEX idx_metas_end_date ON metas (end_day)",
+        *_TRIGGERS_FTS,
+        _TRIGGER_DIAGNOSTICOS,
+    ):
+        conn.execute(comando)
+    _criar_triggers_resumo(conn, "employee_name, department_id, status_id, progress",
+                           _CHAVES_RESUMO_CODIGOS, _CONCLUIDA_CODIGOS)
+
+
+def _criar_historico(conn):
+    # Histórico append-only das alterações de progresso, status e
+    # departamento, gravado por triggers, com checkpoints do estado completo
+    # para que consultas "na data X" só reprocessem os eventos posteriores.
+    conn.execute(f'''
+        CREATE TABLE historico_metas (
+            id INTEGER PRIMARY KEY,
+            meta_id INTEGER NOT NULL,
+            momento INTEGER NOT NULL DEFAULT ({_MOMENTO_ATUAL}),
+            campo INTEGER NOT NULL,
+            valor INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX idx_historico_metas_momento ON historico_metas (momento)")
+    conn.execute('''
+        CREATE TABLE checkpoints_historico (
+            id INTEGER PRIMARY KEY,
+            momento INTEGER NOT NULL,
+            ultimo_evento INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE estado_checkpoint (
+            checkpoint_id INTEGER NOT NULL,
+            meta_id INTEGER NOT NULL,
+            department_id INTEGER NOT NULL,
+            status_id INTEGER NOT NULL,
+            progress INTEGER NOT NULL,
+            PRIMARY KEY (checkpoint_id, meta_id)
+        ) WITHOUT ROWID
+    ''')
+
+    valores = ", ".join(f"(new.id, {codigo}, new.{campo})" for campo, codigo in CAMPOS_HISTORICO.items())
+    conn.execute(f'''
+        CREATE TRIGGER historico_metas_ai AFTER INSERT ON metas BEGIN
+            INSERT INTO historico_metas (meta_id, campo, valor) VALUES {valores};
+        END
+    ''')
+    for campo, codigo in CAMPOS_HISTORICO.items():
+        conn.execute(f'''
+            CREATE TRIGGER historico_metas_au_{campo} AFTER UPDATE OF {campo} ON metas
+            WHEN new.{campo} IS NOT old.{campo} BEGIN
+                INSERT INTO historico_metas (meta_id, campo, valor) VALUES (new.id, {codigo}, new.{campo});
+            END
+        ''')
+    conn.execute(f'''
+        CREATE TRIGGER historico_metas_ad AFTER DELETE ON metas BEGIN
+            INSERT INTO historico_metas (meta_id, campo, valor) VALUES (old.id, {CAMPO_EXCLUSAO}, 1);
+        END
+    ''')
+
+    # As metas existentes entram no primeiro checkpoint; antes dele não há histórico
+    conn.execute(f"INSERT INTO checkpoints_historico (id, momento, ultimo_evento) VALUES (1, {_MOMENTO_ATUAL}, 0)")
+    conn.execute("INSERT INTO estado_checkpoint SELECT 1, id, department_id, status_id, progress FROM metas")
+
+
+def _sql_itens_questionario(ref):
+    """SELECT com um par (grupo, opção) por pergunta e por opção marcada do questionário ``ref``."""
+    questoes = ", ".join(f"('{chave}', {BITS_OPCAO * i})" for i, chave in enumerate(QUESTOES_ORGANIZACIONAIS))
+    partes = [f"SELECT column1 AS grupo, {ref}.respostas >> column2 & {(1 << BITS_OPCAO) - 1} AS opcao "
+              f"FROM (VALUES {questoes})"]
+    for coluna, opcoes in SELECOES_ORGANIZACIONAIS.items():
+        indices = ", ".join(f"({i})" for i in range(len(opcoes)))
+        partes.append(f"SELECT '{coluna}', column1 FROM (VALUES {indices}) WHERE {ref}.{coluna} >> column1 & 1")
+    return " UNION ALL ".join(partes)
+
+
+def _criar_questionarios(conn):
+    # Uma linha compacta por questionário respondido e dois resumos por
+    # departamento e mês (respostas e soma dos pontos; contagem de cada
+    # opção), mantidos por triggers: o painel lê só os resumos.
+    conn.execute('''
+        CREATE TABLE questionarios_organizacionais (
+            id INTEGER PRIMARY KEY,
+            department_id INTEGER NOT NULL,
+            dia INTEGER NOT NULL,
+            respostas INTEGER NOT NULL,
+            obstaculos INTEGER NOT NULL,
+            areas_melhoria INTEGER NOT NULL,
+            pontos INTEGER NOT NULL,
+            comentario TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE resumo_questionarios (
+            department_id INTEGER NOT NULL,
+            periodo TEXT NOT NULL,
+            respostas INTEGER NOT NULL,
+            pontos INTEGER NOT NULL,
+            PRIMARY KEY (department_id, periodo)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE resumo_questionarios_opcoes (
+            department_id INTEGER NOT NULL,
+            periodo TEXT NOT NULL,
+            grupo TEXT NOT NULL,
+            opcao INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (department_id, periodo, grupo, opcao)
+        ) WITHOUT ROWID
+    ''')
+
+    periodo = {ref: f"strftime('%Y-%m', {sql_data(ref + '.dia')})" for ref in ("new", "old")}
+    conn.execute(f'''
+        CREATE TRIGGER resumo_questionarios_ai AFTER INSERT ON questionarios_organizacionais BEGIN
+            INSERT INTO resumo_questionarios (department_id, periodo, respostas, pontos)
+            VALUES (new.department_id, {periodo["new"]}, 1, new.pontos)
+            ON CONFLICT (department_id, periodo) DO UPDATE
+            SET respostas = respostas + 1, pontos = pontos + excluded.pontos;
+            INSERT INTO resumo_questionarios_opcoes (department_id, periodo, grupo, opcao, total)
+            SELECT new.department_id, {periodo["new"]}, grupo, opcao, 1
+            FROM ({_sql_itens_questionario("new")}) WHERE true
+            ON CONFLICT (department_id, periodo, grupo, opcao) DO UPDATE SET total = total + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER resumo_questionarios_ad AFTER DELETE ON questionarios_organizacionais BEGIN
+            UPDATE resumo_questionarios SET respostas = respostas - 1, pontos = pontos - old.pontos
+            WHERE department_id = old.department_id AND periodo = {periodo["old"]};
+            DELETE FROM resumo_questionarios
+            WHERE department_id = old.department_id AND periodo = {periodo["old"]} AND respostas <= 0;
+            UPDATE resumo_questionarios_opcoes SET total = total - 1
+            WHERE department_id = old.department_id AND periodo = {periodo["old"]}
+              AND (grupo, opcao) IN ({_sql_itens_questionario("old")});
+            DELETE FROM resumo_questionarios_opcoes
+            WHERE department_id = old.department_id AND periodo = {periodo["old"]} AND total <= 0;
+        END
+    ''')
+
+
+MIGRACOES = [
+    (1, "Cria a tabela metas", (
+        '''
+        CREATE TABLE IF NOT EXISTS metas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_name TEXT NOT NULL,
+            department TEXT NOT NULL,
+            goal_description TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress INTEGER NOT NULL,
+            completion_date TEXT,
+            diagnosis TEXT,
+            suggestions TEXT
+        )
+        ''',
+    )),
+    (2, "Índices para os filtros e agregações das abas", (
+        "CREATE INDEX IF NOT EXISTS idx_metas_department ON metas (department)",
+        "CREATE INDEX IF NOT EXISTS idx_metas_status ON metas (status)",
+        "CREATE INDEX IF NOT EXISTS idx_metas_employee_name ON metas (employee_name)",
+        "CREATE INDEX IF NOT EXISTS idx_metas_end_date ON metas (end_date)",
+    )),
+    (3, "Contador de versão dos dados para invalidação de cache", (
+        "CREATE TABLE IF NOT EXISTS versao_dados (id INTEGER PRIMARY KEY CHECK (id = 1), versao INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO versao_dados (id, versao) VALUES (1, 0)",
+    )),
+    (4, "Índice FTS5 sobre funcionário e descrição para a busca de metas", (
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS metas_fts USING fts5(
+            employee_name, goal_description,
+            content='metas', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        *_TRIGGERS_FTS,
+        "INSERT INTO metas_fts (metas_fts) VALUES ('rebuild')",
+    )),
+    (5, "Tabela de resumo por departamento, status e funcionário mantida por triggers", _criar_resumo_progresso),
+    (6, "Respostas do diagnóstico individual em bitmask por meta", _criar_diagnosticos_individuais),
+    (7, "Departamento e status como ids de tabelas de domínio e datas como número do dia", _codificar_metas),
+    (8, "Índice de status e prazo para a marcação de metas atrasadas, com registro das marcações", (
+        # O índice composto também atende os filtros só por status
+        "DROP INDEX IF EXISTS idx_metas_status",
+        "CREATE INDEX idx_metas_status_end ON metas (status_id, end_day)",
+        '''
+        CREATE TABLE marcacoes_atraso (
+            id INTEGER PRIMARY KEY,
+            meta_id INTEGER NOT NULL,
+            end_day INTEGER NOT NULL,
+            marcada_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        "CREATE INDEX idx_marcacoes_atraso_meta ON marcacoes_atraso (meta_id)",
+    )),
+    (9, "Histórico append-only de progresso, status e departamento com checkpoints", _criar_historico),
+    (10, "Respostas do questionário organizacional com resumos por departamento e mês", _criar_questionarios),
+    (11, "Arquivo das metas de ciclos encerrados, com registro das execuções do arquivamento", (
+        f'''
+        CREATE TABLE execucoes_arquivamento (
+            id INTEGER PRIMARY KEY,
+            momento INTEGER NOT NULL DEFAULT ({_MOMENTO_ATUAL}),
+            corte_day INTEGER NOT NULL,
+            metas INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Mesmas colunas gravadas de metas; as respostas do diagnóstico
+        # individual, removidas junto com a meta, são guardadas na própria linha
+        '''
+        CREATE TABLE metas_arquivo (
+            id INTEGER PRIMARY KEY,
+            employee_name TEXT NOT NULL,
+            department_id INTEGER NOT NULL REFERENCES departamentos (id),
+            goal_description TEXT NOT NULL,
+            start_day INTEGER NOT NULL,
+            end_day INTEGER NOT NULL,
+            status_id INTEGER NOT NULL REFERENCES status_metas (id),
+            progress INTEGER NOT NULL,
+            completion_day INTEGER,
+            diagnosis TEXT,
+            suggestions TEXT,
+            diagnostico_respostas INTEGER,
+            execucao_id INTEGER NOT NULL REFERENCES execucoes_arquivamento (id)
+        )
+        ''',
+        # Leituras por faixa de departamento ou funcionário dos relatórios em lote
+        "CREATE INDEX idx_metas_arquivo_department ON metas_arquivo (department_id)",
+        "CREATE INDEX idx_metas_arquivo_employee_name ON metas_arquivo (employee_name)",
+    )),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+_migrados = set()
+_lock = threading.Lock()
+
+
+def versao_schema(conn):
+    """Retorna a versão de schema registrada no banco."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn):
+    """Aplica as migrações pendentes e retorna a lista de versões aplicadas."""
+    aplicadas = []
+    # BEGIN IMMEDIATE garante que apenas um processo migre o arquivo por vez
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        atual = versao_schema(conn)
+        for versao, _descricao, passos in MIGRACOES:
+            if versao <= atual:
+                continue
+            if callable(passos):
+                passos(conn)
+            else:
+                for comando in passos:
+                    conn.execute(comando)
+            conn.execute(f"PRAGMA user_version = {int(versao)}")
+            aplicadas.append(versao)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return aplicadas
+
+
+def garantir_schema(pool):
+    """Migra o banco do pool uma única vez por processo."""
+    if pool.db_path in _migrados:
+        return
+    with _lock:
+        if pool.db_path in _migrados:
+            return
+        with pool.conexao() as conn:
+            if versao_schema(conn) < VERSAO_ATUAL:
+                migrar(conn)
+        _migrados.add(pool.db_path)
@@ -0,0 +1,157 @@
+"""Questionários do diagnóstico de metas.
+
+No diagnóstico individual, as oito respostas "Sim"/"Não" são armazenadas
+como um inteiro (bit i ligado quando a resposta i é "Sim"); os textos de
+diagnóstico e sugestões são gerados a partir do bitmask de problemas. No
+questionário organizacional, cada resposta ocupa 3 bits com o índice da
+opção escolhida e as seleções múltiplas são bitmasks.
+"""
+
+# Perguntas do diagnóstico individual, na ordem dos bits armazenados:
+# (pergunta, resposta que indica problema, diagnóstico, sugestão, ícone, nível do alerta)
+QUESTOES_INDIVIDUAIS = [
+    ("A meta foi percebida como realista e possível de atingir?", "Não",
+     "Meta pode ser irrealista",
+     "Reavalie a meta junto ao funcionário para garantir que esteja adequada ao tempo e ao escopo.",
+     "🎯", "error"),
+    ("Os recursos disponíveis foram suficientes para a execução da meta?", "Não",
+     "Falta de recursos",
+     "Verifique se há necessidade de suporte adicional, como ferramentas, tempo ou equipe.",
+     "🔧", "warning"),
+    ("Há sinais de engajamento ou motivação ao longo do período?", "Não",
+     "Baixa motivação",
+     "Agende uma conversa para entender o que pode estar afetando a motivação e como apoiar melhor.",
+     "😔", "warning"),
+    ("Houve sinais de cansaço excessivo ou sobrecarga?", "Sim",
+     "Possível burnout",
+     "Considere redistribuir tarefas ou revisar prazos para evitar esgotamento.",
+     "😰", "error"),
+    ("O acompanhamento e o feedback foram oferecidos com regularidade?", "Não",
+     "Falta de feedback",
+     "Estabeleça checkpoints periódicos para fortalecer o alinhamento e o suporte.",
+     "📢", "warning"),
+    ("As expectativas e objetivos da meta estavam claros desde o início?", "Não",
+     "Falta de clareza",
+     "Reforce os critérios de sucesso e prazos de forma objetiva com o funcionário.",
+     "❓", "warning"),
+    ("Houve mudanças ou imprevistos no período da meta?", "Sim",
+     "Ocorreram imprevistos",
+     "Considere adaptar prazos ou prioridades diante de imprevistos relevantes.",
+     "⚡", "info"),
+    ("O funcionário participou da definição da meta?", "Não",
+     "Meta imposta sem participação",
+     "Envolva o funcionário na construção das metas para aumentar clareza e comprometimento.",
+     "🤝", "warning"),
+]
+
+# Bits das perguntas em que "Sim" indica problema (as demais indicam problema com "Não")
+_MASCARA_SIM = sum(1 << i for i, questao in enumerate(QUESTOES_INDIVIDUAIS) if questao[1] == "Sim")
+_MASCARA_TODAS = (1 << len(QUESTOES_INDIVIDUAIS)) - 1
+
+
+def codificar_respostas(respostas):
+    """Codifica as respostas "Sim"/"Não" (na ordem das perguntas) em um inteiro: bit i = "Sim"."""
+    return sum(1 << i for i, resposta in enumerate(respostas) if resposta == "Sim")
+
+
+def decodificar_respostas(codigo):
+    """Converte o inteiro de respostas de volta na lista de "Sim"/"Não"."""
+    return ["Sim" if codigo >> i & 1 else "Não" for i in range(len(QUESTOES_INDIVIDUAIS))]
+
+
+def problemas_das_respostas(codigo):
+    """Retorna o bitmask de problemas: bit i ligado se a resposta i indica problema.
+
+    Cada pergunta é binária, então a conversão é um XOR e também serve para
+    reconstruir as respostas a partir dos problemas.
+    """
+    return codigo ^ (_MASCARA_TODAS & ~_MASCARA_SIM)
+
+
+def problemas_identificados(problemas):
+    """Lista as perguntas (tuplas de ``QUESTOES_INDIVIDUAIS``) marcadas no bitmask de problemas."""
+    return [questao for i, questao in enumerate(QUESTOES_INDIVIDUAIS) if problemas >> i & 1]
+
+
+# Cabeçalhos e itens dos textos gerados quando nenhum problema é identificado
+CABECALHO_DIAGNOSTICO = "DIAGNÓSTICO AUTOMÁTICO:"
+CABECALHO_SUGESTOES = "SUGESTÕES AUTOMÁTICAS:"
+SEM_PROBLEMAS = ("Nenhum problema crítico identificado. Meta apresenta boas condições de execução.",
+                 "Continue com a estratégia atual e mantenha o acompanhamento regular.")
+
+
+def textos_diagnostico_individual(problemas):
+    """Gera os textos de diagnóstico e sugestões a partir do bitmask de problemas."""
+    identificados = problemas_identificados(problemas)
+    diagnosticos = [q[2] for q in identificados] or [SEM_PROBLEMAS[0]]
+    sugestoes = [q[3] for q in identificados] or [SEM_PROBLEMAS[1]]
+    return (CABECALHO_DIAGNOSTICO + "".join(f"\n• {item}" for item in diagnosticos),
+            CABECALHO_SUGESTOES + "".join(f"\n• {item}" for item in sugestoes))
+
+
+# Questionário organizacional do "Diagnóstico Interativo", na ordem dos
+# campos de 3 bits armazenados: chave -> (pergunta, opções, opções que pontuam)
+QUESTOES_ORGANIZACIONAIS = {
+    "recursos_adequados": ("Os funcionários têm recursos adequados para atingir suas metas?",
+                           ["Sim, completamente", "Parcialmente", "Não, faltam recursos", "Não sei avaliar"],
+                           {"Sim, completamente"}),
+    "comunicacao_clara": ("As metas foram comunicadas de forma clara?",
+                          ["Sim, muito clara", "Razoavelmente clara", "Pouco clara", "Confusa"],
+                          {"Sim, muito clara"}),
+    "prazo_realista": ("Os prazos estabelecidos são realistas?",
+                       ["Sim, adequados", "Um pouco apertados", "Muito apertados", "Impossíveis"],
+                       {"Sim, adequados"}),
+    "apoio_gestao": ("Há apoio suficiente da gestão?",
+                     ["Sim, total apoio", "Apoio moderado", "Pouco apoio", "Sem apoio"],
+                     {"Sim, total apoio"}),
+    "treinamento": ("Os funcionários receberam treinamento adequado?",
+                    ["Sim, completo", "Parcial", "Mínimo", "Nenhum"],
+                    {"Sim, completo"}),
+    "motivacao_equipe": ("Como está a motivação da equipe?",
+                         ["Muito alta", "Alta", "Média", "Baixa", "Muito baixa"],
+                         {"Muito alta", "Alta"}),
+    "frequencia_revisao": ("Com que frequência as metas são revisadas?",
+                           ["Semanalmente", "Quinzenalmente", "Mensalmente", "Trimestralmente", "Raramente"],
+                           set()),
+    "feedback_regular": ("Há feedback regular sobre o progresso?",
+                         ["Sim, constante", "Ocasionalmente", "Raramente", "Nunca"],
+                         set()),
+    "ferramentas_adequadas": ("As ferramentas de trabalho são adequadas?",
+                              ["Sim, excelentes", "Adequadas", "Básicas", "Inadequadas"],
+                              set()),
+}
+BITS_OPCAO = 3
+TOTAL_PONTOS = sum(1 for _pergunta, _opcoes, pontuam in QUESTOES_ORGANIZACIONAIS.values() if pontuam)
+
+# Seleções múltiplas, guardadas como bitmask (bit i = opção i marcada)
+OBSTACULOS = ["Falta de tempo", "Recursos insuficientes", "Falta de conhecimento técnico",
+              "Problemas de comunicação", "Mudanças de prioridades", "Sobrecarga de trabalho",
+              "Falta de apoio da gestão", "Problemas externos", "Outros"]
+AREAS_MELHORIA = ["Planejamento de metas", "Comunicação", "Recursos e ferramentas",
+                  "Treinamento", "Acompanhamento", "Motivação da equipe",
+                  "Processos internos", "Suporte técnico"]
+SELECOES_ORGANIZACIONAIS = {"obstaculos": OBSTACULOS, "areas_melhoria": AREAS_MELHORIA}
+
+
+def codificar_questionario(escolhas):
+    """Codifica as escolhas (chave -> opção) em um inteiro com o índice de cada opção em 3 bits."""
+    return sum(opcoes.index(escolhas[chave]) << BITS_OPCAO * i
+               for i, (chave, (_pergunta, opcoes, _pontuam)) in enumerate(QUESTOES_ORGANIZACIONAIS.items()))
+
+
+def decodificar_questionario(codigo):
+    """Converte o inteiro de respostas de volta no dicionário chave -> opção."""
+    mascara = (1 << BITS_OPCAO) - 1
+    return {chave: opcoes[codigo >> BITS_OPCAO * i & mascara]
+            for i, (chave, (_pergunta, opcoes, _pontuam)) in enumerate(QUESTOES_ORGANIZACIONAIS.items())}
+
+
+def pontos_questionario(codigo):
+    """Pontos de saúde das metas (0 a ``TOTAL_PONTOS``) das respostas codificadas."""
+    escolhas = decodificar_questionario(codigo)
+    return sum(escolhas[chave] in pontuam for chave, (_pergunta, _opcoes, pontuam) in QUESTOES_ORGANIZACIONAIS.items())
+
+
+def codificar_selecao(selecionadas, opcoes):
+    """Codifica as opções marcadas de uma seleção múltipla em bitmask."""
+    return sum(1 << opcoes.index(opcao) for opcao in set(selecionadas))
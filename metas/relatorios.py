@@ -0,0 +1,400 @@
+"""Geração em lote de relatórios por departamento ou por funcionário.
+
+Cada relatório reúne, para um grupo, as estatísticas da página de
+Relatórios e da Análise Geral: resumo executivo, progresso (média, mínimo,
+máximo e percentis), quebra por funcionário (ou a lista de metas), metas
+que precisam de atenção, metas de destaque e prazos por mês. Os grupos são
+ordenados e divididos em faixas contíguas com número parecido de metas;
+cada faixa vai para um processo, que lê do banco só as metas dela (pelo
+índice da coluna do grupo) e grava um arquivo HTML e/ou CSV por grupo.
+Com ``--incluir-arquivo``, as metas arquivadas entram nos relatórios.
+
+Uso pela linha de comando::
+
+    python -m metas.relatorios relatorios/ --por department --processos 8 --formatos html csv
+"""
+import argparse
+import csv
+import html
+import os
+import re
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .banco import PoolConexoes
+from .diagnostico import ALERTAS_CRITICOS, PROGRESSO_DESTAQUE, diagnosticar
+from .gestor import SELECT_METAS, SELECT_METAS_ARQUIVADAS, STATUS, GestorMetas
+from .metricas import instrumentar
+
+# Coluna gravada em metas (usada nas faixas) e coluna lida de cada grupo
+COLUNAS_GRUPO = {"department": ("department_id", "department"), "employee": ("employee_name", "employee_name")}
+FORMATOS = ("html", "csv")
+# Faixas por processo: mais faixas que processos equilibram grupos de tamanhos diferentes
+FAIXAS_POR_PROCESSO = 4
+# Máximo de metas críticas e de destaque listadas no HTML; o CSV traz todas
+LIMITE_LISTAS_HTML = 200
+PERCENTIS = {"Progresso P25": 25, "Progresso Mediana": 50, "Progresso P75": 75, "Progresso P90": 90}
+
+# Colunas de cada meta no CSV e nas seções do HTML
+_COLUNAS_CSV = ["id", "employee_name", "department", "goal_description", "start_date", "end_date",
+                "status", "progress", "completion_date", "dias_restantes", "risco", "acao", "alerta"]
+_COLUNAS_HTML = ["id", "employee_name", "goal_description", "status", "progress", "end_date", "acao", "alerta",
+                 "mensagem"]
+_Meta = namedtuple("_Meta", _COLUNAS_HTML)
+
+_ESTILO = """
+body { font-family: sans-serif; margin: 2rem; color: #262730; }
+h1 { margin-bottom: 0; }
+table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; }
+th, td { border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: right; }
+th { background: #f0f2f6; }
+td:first-child, th:first-child { text-align: left; }
+.alerta { margin: 0.3rem 0; padding: 0.4rem 0.6rem; border-radius: 0.3rem; }
+.warning { background: #fffce7; } .info { background: #e8f2fc; } .success { background: #e8f9ee; }
+"""
+
+
+def _grupos(gestor, dimensao, incluir_arquivo=False):
+    """Grupos da dimensão com o valor gravado (``chave``), o nome e o total de metas, em ordem de chave."""
+    if dimensao not in COLUNAS_GRUPO:
+        raise ValueError(f"Dimensão de relatório inválida: {dimensao}")
+    totais = gestor.resumo_por_dimensao(dimensao, incluir_arquivo)["total"]
+    grupos = pd.DataFrame({"chave": totais.index, "nome": totais.index, "total": totais.to_numpy()})
+    if dimensao == "department":
+        with gestor.pool.conexao() as conn:
+            ids = dict(conn.execute('SELECT nome, id FROM departamentos').fetchall())
+        grupos["chave"] = grupos["nome"].map(ids)
+    return grupos.sort_values("chave", ignore_index=True)
+
+
+def _dividir(grupos, faixas):
+    """Divide os grupos (em ordem) em até ``faixas`` faixas contíguas com número parecido de metas."""
+    antes = grupos["total"].cumsum() - grupos["total"]
+    numero = (antes * faixas // max(int(grupos["total"].sum()), 1)).to_numpy()
+    return [grupos[numero == n] for n in np.unique(numero)]
+
+
+def _nome_arquivo(nome):
+    """Nome de arquivo seguro derivado do nome do grupo (sem acentos e sem espaços)."""
+    ascii_ = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "_", ascii_).strip("_") or "grupo"
+
+
+def _nomes_arquivos(nomes):
+    """Nomes de arquivo únicos para os grupos, na ordem recebida."""
+    usados, resultado = {}, []
+    for nome in nomes:
+        base = _nome_arquivo(nome)
+        usados[base] = usados.get(base, 0) + 1
+        resultado.append(base if usados[base] == 1 else f"{base}_{usados[base]}")
+    return resultado
+
+
+def estatisticas_por_grupo(df, coluna, hoje=None):
+    """Estatísticas de relatório das metas de ``df`` (colunas de ``SELECT_METAS``), por ``coluna``.
+
+    Calculadas de uma vez para todos os grupos; cada resultado é indexado
+    pelo grupo (primeiro nível do índice):
+
+    - ``resumo``: totais por status, progresso médio, mínimo, máximo, taxa de
+      sucesso, percentis e número de metas críticas e de destaque
+    - ``por_funcionario``: as colunas do relatório "Por Funcionário", por grupo e funcionário
+    - ``prazos_por_mes``: metas por grupo, mês de vencimento e status
+    - ``metas``: todas as metas com as colunas de ``diagnosticar`` e a mensagem do alerta
+    """
+    metas = df.join(diagnosticar(df, hoje))
+    mensagens = {alerta: mensagem for alerta, (_nivel, mensagem) in ALERTAS_CRITICOS.items()}
+    metas["mensagem"] = metas["alerta"].map(mensagens)
+    metas["concluida"] = metas["status"] == "Concluída"
+    grupo = metas[coluna]
+
+    progresso = metas.groupby(coluna, sort=False)["progress"]
+    resumo = pd.crosstab(grupo, metas["status"]).reindex(columns=STATUS, fill_value=0)
+    resumo.insert(0, "Total de Metas", resumo.sum(axis=1))
+    resumo["Progresso Médio"] = progresso.mean()
+    resumo["Progresso Mín"] = progresso.min()
+    resumo["Progresso Máx"] = progresso.max()
+    resumo["Taxa Sucesso %"] = resumo["Concluída"] / resumo["Total de Metas"] * 100
+    percentis = progresso.quantile([p / 100 for p in PERCENTIS.values()]).unstack()
+    resumo[list(PERCENTIS)] = percentis.reindex(resumo.index).to_numpy()
+    resumo["Metas Críticas"] = metas.groupby(coluna, sort=False)["critica"].sum()
+    resumo["Metas de Destaque"] = metas.groupby(coluna, sort=False)["destaque"].sum()
+
+    funcionario = metas.groupby([coluna, "employee_name"], sort=True)
+    por_funcionario = pd.DataFrame({
+        "Total Metas": funcionario.size(),
+        "Progresso Médio": funcionario["progress"].mean(),
+        "Progresso Mín": funcionario["progress"].min(),
+        "Progresso Máx": funcionario["progress"].max(),
+        "Concluídas": funcionario["concluida"].sum(),
+    })
+    por_funcionario["Taxa Sucesso %"] = por_funcionario["Concluídas"] / por_funcionario["Total Metas"] * 100
+
+    # As datas vêm em ISO (AAAA-MM-DD): o mês é o prefixo
+    mes = metas["end_date"].str.slice(0, 7)
+    prazos_por_mes = (metas.groupby([grupo, mes.rename("Mês de Vencimento"), metas["status"]]).size()
+                      .unstack("status").reindex(columns=STATUS).fillna(0).astype("int64"))
+
+    return {
+        "resumo": resumo,
+        "por_funcionario": por_funcionario.round(1).rename_axis([coluna, "Funcionário"]),
+        "prazos_por_mes": prazos_por_mes.rename_axis(columns=None),
+        "metas": metas,
+    }
+
+
+def _textos_html(valores):
+    """Textos das células de uma coluna, já escapados; números reais com uma casa decimal."""
+    if isinstance(valores, (pd.Series, pd.Index)):
+        numerica = valores.dtype.kind in "fiub"
+        valores = valores.to_numpy() if numerica else valores.to_numpy(dtype=object, na_value=None)
+    else:
+        valores = np.asarray(valores)
+    if valores.dtype.kind == "f":
+        return [f"{valor:.1f}" if valor == valor else "" for valor in valores.tolist()]
+    if valores.dtype.kind in "iub":
+        return [str(valor) for valor in valores.tolist()]
+    return ["" if valor is None else html.escape(str(valor)) for valor in valores.tolist()]
+
+
+def _tabela_html(cabecalho, colunas):
+    """Tabela HTML simples a partir das colunas (sequências de valores)."""
+    corpo = "\n".join(
+        "<tr><td>" + "</td><td>".join(linha) + "</td></tr>" for linha in zip(*map(_textos_html, colunas))
+    )
+    titulos = "".join(f"<th>{html.escape(str(nome))}</th>" for nome in cabecalho)
+    return f"<table><thead><tr>{titulos}</tr></thead><tbody>\n{corpo}\n</tbody></table>"
+
+
+def _tabela_df(df, index=True):
+    cabecalho = ([df.index.name or ""] if index else []) + list(df.columns)
+    return _tabela_html(cabecalho, ([df.index] if index else []) + [df[coluna] for coluna in df.columns])
+
+
+def _markdown_html(texto):
+    """Converte o negrito em markdown (``**texto**``) das mensagens do diagnóstico."""
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(texto))
+
+
+def _restantes(total, listadas):
+    """Aviso das metas de uma lista do relatório que ficaram de fora do HTML."""
+    return f"<p>… e mais {total - listadas} metas (lista completa no CSV).</p>" if total > listadas else ""
+
+
+def relatorio_html(titulo, resumo, criticas, destaque, prazos_por_mes, gerado_em, por_funcionario=None,
+                   metas=None):
+    """Monta o relatório HTML autocontido de um grupo.
+
+    ``resumo`` é a linha do grupo em ``estatisticas_por_grupo``; ``criticas``,
+    ``destaque`` e ``metas`` são listas de metas (tuplas com
+    ``_COLUNAS_HTML``), as duas primeiras com até ``LIMITE_LISTAS_HTML``
+    metas. Com ``por_funcionario``, o relatório traz a quebra por
+    funcionário; com ``metas``, a lista das metas do grupo.
+    """
+    contagens = resumo[["Total de Metas", *STATUS, "Metas Críticas", "Metas de Destaque"]].astype(int)
+    total = contagens["Total de Metas"]
+    progresso = ["Progresso Médio", "Progresso Mín", "Progresso Máx", *PERCENTIS]
+    partes = [
+        f"<h1>📋 {html.escape(titulo)}</h1>",
+        f"<p>Gerado em {gerado_em:%Y-%m-%d %H:%M}</p>",
+        "<h2>Resumo Executivo</h2><ul>",
+        f"<li><strong>Total de Metas:</strong> {total}</li>",
+        *(f"<li><strong>{status}:</strong> {contagens[status]} ({contagens[status] / total * 100:.1f}%)</li>"
+          for status in STATUS),
+        f"<li><strong>Progresso Médio:</strong> {resumo['Progresso Médio']:.1f}%</li>",
+        f"<li><strong>Taxa de Sucesso:</strong> {resumo['Taxa Sucesso %']:.1f}%</li>",
+        "</ul>",
+        "<h2>📊 Estatísticas de Progresso</h2>",
+        _tabela_html(progresso, [[float(resumo[coluna])] for coluna in progresso]),
+    ]
+    if por_funcionario is not None:
+        partes += ["<h2>👤 Por Funcionário</h2>", _tabela_df(por_funcionario)]
+    if metas is not None:
+        cabecalho = ["ID", "Descrição", "Status", "Progresso", "Data Fim", "Ação Sugerida"]
+        colunas = [[getattr(meta, coluna) for meta in metas]
+                   for coluna in ("id", "goal_description", "status", "progress", "end_date", "acao")]
+        partes += ["<h2>🎯 Metas</h2>", _tabela_html(cabecalho, colunas)]
+
+    partes.append("<h2>⚠️ Metas que Precisam de Atenção</h2>")
+    if not criticas:
+        partes.append('<p class="alerta success">✅ Todas as metas estão com progresso satisfatório!</p>')
+    partes += [
+        f'<div class="alerta {ALERTAS_CRITICOS[meta.alerta][0]}">'
+        f'🔴 <strong>{html.escape(meta.employee_name)}</strong> - {html.escape(meta.goal_description)} '
+        f'({meta.status}, {meta.progress}%, fim {meta.end_date})<br>{_markdown_html(meta.mensagem)}</div>'
+        for meta in criticas
+    ]
+    partes.append(_restantes(contagens["Metas Críticas"], len(criticas)))
+
+    partes.append("<h2>🌟 Metas de Destaque</h2>")
+    if not destaque:
+        partes.append(f"<p>Nenhuma meta com progresso acima de {PROGRESSO_DESTAQUE}% encontrada.</p>")
+    partes += [
+        f'<div class="alerta success">🎯 {html.escape(meta.employee_name)} - '
+        f'{html.escape(meta.goal_description)} ({meta.progress}%)</div>'
+        for meta in destaque
+    ]
+    partes.append(_restantes(contagens["Metas de Destaque"], len(destaque)))
+    partes += ["<h2>📅 Metas por Mês de Vencimento</h2>", _tabela_df(prazos_por_mes)]
+
+    return (
+        '<!DOCTYPE html>\n<html lang="pt-BR"><head><meta charset="utf-8">'
+        f"<title>{html.escape(titulo)}</title><style>{_ESTILO}</style></head>\n<body>\n"
+        + "\n".join(partes) + "\n</body></html>\n"
+    )
+
+
+def _linhas(colunas, posicoes, tipo=tuple):
+    """Linhas das ``posicoes`` a partir das colunas (arrays), como tuplas ou ``tipo``."""
+    linhas = zip(*(coluna[posicoes] for coluna in colunas))
+    return list(linhas) if tipo is tuple else list(map(tipo._make, linhas))
+
+
+def _gerar_faixa(db_path, dimensao, faixa, diretorio, formatos, hoje, incluir_arquivo=False):
+    """Gera os relatórios de uma faixa de grupos; executado em um processo do pool.
+
+    ``faixa`` é uma lista de (chave, nome, arquivo) em ordem de chave. As
+    estatísticas são calculadas de uma vez para a faixa inteira. Retorna
+    uma linha de tempos por relatório, com a parte de cada um na leitura e
+    nas estatísticas da faixa, proporcional ao número de metas.
+    """
+    inicio = time.perf_counter()
+    # Conexões próprias do processo: as do pool do processo pai não podem ser reaproveitadas
+    pool = PoolConexoes(db_path, max_ociosas=1)
+    gravada, lida = COLUNAS_GRUPO[dimensao]
+    consultas = [SELECT_METAS, SELECT_METAS_ARQUIVADAS] if incluir_arquivo else [SELECT_METAS]
+    with pool.conexao() as conn:
+        df = pd.concat([pd.read_sql_query(
+            f'{consulta} WHERE {gravada} BETWEEN ? AND ? ORDER BY {gravada}, id',
+            conn, params=(faixa[0][0], faixa[-1][0]),
+        ) for consulta in consultas], ignore_index=True)
+    pool.fechar()
+    if incluir_arquivo:
+        # As metas arquivadas de cada grupo entram na ordem de id, como as da tabela viva
+        df = df.sort_values("id", ignore_index=True)
+    estatisticas = estatisticas_por_grupo(df, lida, hoje)
+    segundos_faixa = time.perf_counter() - inicio
+
+    metas, resumo = estatisticas["metas"], estatisticas["resumo"]
+    posicoes = metas.groupby(lida, sort=False).indices
+    # Colunas extraídas uma vez para a faixa; cada relatório só recorta as suas linhas
+    colunas_html = [metas[coluna].to_numpy(dtype=object, na_value=None) for coluna in _COLUNAS_HTML]
+    colunas_csv = [metas[coluna].to_numpy(dtype=object, na_value=None) for coluna in _COLUNAS_CSV]
+    critica, destaque = metas["critica"].to_numpy(), metas["destaque"].to_numpy()
+    por_funcionario = dict(iter(estatisticas["por_funcionario"].groupby(level=0, sort=False)))
+    prazos_por_mes = dict(iter(estatisticas["prazos_por_mes"].groupby(level=0, sort=False)))
+    gerado_em = pd.Timestamp.now()
+    titulo = "Relatório do Departamento" if dimensao == "department" else "Relatório de Metas de"
+
+    tempos = []
+    for _chave, nome, arquivo in faixa:
+        inicio = time.perf_counter()
+        grupo = posicoes.get(nome)
+        if grupo is None:
+            # Todas as metas do grupo foram excluídas depois da listagem dos grupos
+            continue
+        arquivos = []
+        if "html" in formatos:
+            caminho = os.path.join(diretorio, f"{arquivo}.html")
+            criticas = _linhas(colunas_html, grupo[critica[grupo]][:LIMITE_LISTAS_HTML], _Meta)
+            destaques = _linhas(colunas_html, grupo[destaque[grupo]][:LIMITE_LISTAS_HTML], _Meta)
+            if dimensao == "department":
+                extras = {"por_funcionario": por_funcionario[nome].droplevel(0)}
+            else:
+                extras = {"metas": _linhas(colunas_html, grupo, _Meta)}
+            conteudo = relatorio_html(f"{titulo} {nome}", resumo.loc[nome], criticas, destaques,
+                                      prazos_por_mes[nome].droplevel(0), gerado_em, **extras)
+            with open(caminho, "w", encoding="utf-8") as saida:
+                saida.write(conteudo)
+            arquivos.append(caminho)
+        if "csv" in formatos:
+            caminho = os.path.join(diretorio, f"{arquivo}.csv")
+            with open(caminho, "w", encoding="utf-8", newline="") as saida:
+                escritor = csv.writer(saida)
+                escritor.writerow(_COLUNAS_CSV)
+                escritor.writerows(_linhas(colunas_csv, grupo))
+            arquivos.append(caminho)
+        tempos.append({
+            "grupo": nome, "metas": len(grupo),
+            "segundos": time.perf_counter() - inicio + segundos_faixa * len(grupo) / max(len(df), 1),
+            "pid": os.getpid(), "arquivos": arquivos,
+        })
+    return tempos
+
+
+@instrumentar
+def gerar_relatorios(gestor, diretorio, dimensao="department", formatos=FORMATOS, processos=None, hoje=None,
+                     incluir_arquivo=False):
+    """Gera um relatório por grupo de ``dimensao`` ('department' ou 'employee') em ``diretorio``.
+
+    As faixas de grupos são distribuídas entre ``processos`` processos
+    (padrão: número de CPUs); com 1, tudo roda no processo atual. Com
+    ``incluir_arquivo``, as metas arquivadas entram nos grupos. Retorna um
+    DataFrame com uma linha por relatório: ``grupo``, ``metas``,
+    ``segundos`` (leitura e geração), ``pid`` e ``arquivos``.
+    """
+    formatos = tuple(formatos)
+    invalidos = set(formatos) - set(FORMATOS)
+    if invalidos:
+        raise ValueError(f"Formatos de relatório não suportados: {', '.join(sorted(invalidos))}")
+    processos = processos or os.cpu_count() or 1
+    os.makedirs(diretorio, exist_ok=True)
+
+    grupos = _grupos(gestor, dimensao, incluir_arquivo)
+    grupos["arquivo"] = _nomes_arquivos(grupos["nome"])
+    faixas = [list(faixa[["chave", "nome", "arquivo"]].itertuples(index=False, name=None))
+              for faixa in _dividir(grupos, processos * FAIXAS_POR_PROCESSO)]
+    argumentos = (gestor.db_path, dimensao)
+    hoje = hoje or date.today()
+
+    tempos = []
+    if processos == 1:
+        for faixa in faixas:
+            tempos += _gerar_faixa(*argumentos, faixa, diretorio, formatos, hoje, incluir_arquivo)
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(_gerar_faixa, *argumentos, faixa, diretorio, formatos, hoje, incluir_arquivo)
+                       for faixa in faixas]
+            for futuro in as_completed(futuros):
+                tempos += futuro.result()
+    colunas = ["grupo", "metas", "segundos", "pid", "arquivos"]
+    return pd.DataFrame(tempos, columns=colunas).sort_values("grupo", ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um relatório HTML/CSV por departamento ou funcionário.")
+    parser.add_argument("diretorio", help="diretório de saída dos relatórios")
+    parser.add_argument("--db", default=None, help="caminho do banco SQLite (padrão: METAS_DB_PATH ou metas.db)")
+    parser.add_argument("--por", choices=sorted(COLUNAS_GRUPO), default="department", help="um relatório por grupo")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=list(FORMATOS))
+    parser.add_argument("--processos", type=int, default=None, help="processos do pool (padrão: número de CPUs)")
+    parser.add_argument("--data", type=date.fromisoformat, default=None,
+                        help="data de referência do diagnóstico (padrão: hoje)")
+    parser.add_argument("--tempos", default=None, help="arquivo CSV com o tempo de cada relatório")
+    parser.add_argument("--incluir-arquivo", action="store_true", help="inclui as metas arquivadas")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    tempos = gerar_relatorios(GestorMetas(args.db), args.diretorio, args.por, args.formatos,
+                              args.processos, args.data, args.incluir_arquivo)
+    segundos = time.perf_counter() - inicio
+    if args.tempos:
+        tempos.drop(columns="arquivos").to_csv(args.tempos, index=False)
+
+    print(f"{len(tempos)} relatórios ({int(tempos['metas'].sum())} metas) gravados em {args.diretorio} "
+          f"em {segundos:.1f}s com {tempos['pid'].nunique()} processo(s)")
+    if len(tempos):
+        por_relatorio = tempos["segundos"] * 1000
+        print(f"  por relatório: p50 {por_relatorio.quantile(0.5):.1f} ms, "
+              f"p95 {por_relatorio.quantile(0.95):.1f} ms, máximo {por_relatorio.max():.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
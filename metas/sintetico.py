@@ -0,0 +1,211 @@
+"""Gerador reprodutível de metas sintéticas para testes de carga e benchmarks.
+
+As metas são distribuídas pelos nove departamentos com pesos diferentes,
+cada funcionário pertence a um único departamento e as datas e o progresso
+seguem o status: metas vencidas tendem a estar concluídas, metas em
+andamento têm progresso proporcional ao tempo decorrido e metas atrasadas
+ficam abaixo dele.
+
+Uso pela linha de comando::
+
+    python -m metas.sintetico metas_100k.db --metas 100000 --semente 42
+    python -m metas.sintetico metas_100k.db --metas 0 --questionarios 50000
+"""
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .gestor import DEPARTAMENTOS, GestorMetas
+from .importacao import COLUNAS_IMPORTACAO
+from .questionario import BITS_OPCAO, QUESTOES_ORGANIZACIONAIS, SELECOES_ORGANIZACIONAIS
+
+TAMANHO_BLOCO_PADRAO = 50_000
+METAS_POR_FUNCIONARIO = 6
+
+# Participação de cada departamento no total de funcionários (mesma ordem de DEPARTAMENTOS)
+PESOS_DEPARTAMENTOS = [0.18, 0.10, 0.07, 0.08, 0.12, 0.14, 0.08, 0.15, 0.08]
+
+PRIMEIROS_NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro", "Quésia", "Rafael", "Sofia", "Tiago",
+    "Úrsula", "Vinícius", "Yasmin", "Wagner", "Alice", "Bernardo", "Cecília", "Davi", "Elisa", "Fábio",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+]
+
+# Modelos de descrição por departamento; {n} recebe um número entre 5 e 40
+MODELOS_DESCRICAO = {
+    "Vendas": ["Aumentar o faturamento da carteira em {n}%", "Fechar {n} novos contratos no período",
+               "Reduzir o ciclo de vendas em {n} dias"],
+    "Marketing": ["Gerar {n}% mais leads qualificados", "Publicar {n} campanhas digitais",
+                  "Aumentar o engajamento nas redes em {n}%"],
+    "RH": ["Reduzir o turnover em {n}%", "Concluir {n} processos seletivos",
+           "Aplicar {n} treinamentos de integração"],
+    "Financeiro": ["Reduzir custos operacionais em {n}%", "Fechar o balanço mensal {n} dias antes",
+                   "Renegociar {n} contratos com fornecedores"],
+    "TI": ["Reduzir incidentes críticos em {n}%", "Automatizar {n} processos manuais",
+           "Migrar {n} sistemas para a nuvem"],
+    "Operações": ["Aumentar a produtividade da equipe em {n}%", "Padronizar {n} procedimentos operacionais",
+                  "Reduzir retrabalho em {n}%"],
+    "Administrativo": ["Digitalizar {n}% dos documentos físicos", "Reduzir o prazo de compras em {n} dias",
+                       "Revisar {n} contratos de serviços"],
+    "Produção": ["Reduzir o desperdício de matéria-prima em {n}%", "Aumentar a produção diária em {n}%",
+                 "Zerar acidentes por {n} semanas seguidas"],
+    "Logística": ["Reduzir o prazo médio de entrega em {n}%", "Otimizar {n} rotas de distribuição",
+                  "Diminuir avarias no transporte em {n}%"],
+}
+
+# Duração das metas em dias e probabilidade de cada uma
+DURACOES = [30, 90, 180, 365]
+PESOS_DURACOES = [0.15, 0.35, 0.30, 0.20]
+JANELA_INICIO_DIAS = 730
+# Questionários organizacionais: janela de datas e chance de marcar cada opção das seleções múltiplas
+JANELA_QUESTIONARIOS_DIAS = 365
+CHANCE_SELECAO = 0.2
+
+
+def _nomes_funcionarios(quantidade):
+    """Nomes únicos e determinísticos; acima das combinações disponíveis recebem um número."""
+    combinacoes = len(PRIMEIROS_NOMES) * len(SOBRENOMES)
+    nomes = []
+    for i in range(quantidade):
+        nome = f"{PRIMEIROS_NOMES[i % len(PRIMEIROS_NOMES)]} {SOBRENOMES[(i // len(PRIMEIROS_NOMES)) % len(SOBRENOMES)]}"
+        nomes.append(nome if i < combinacoes else f"{nome} {i // combinacoes + 1}")
+    return np.array(nomes, dtype=object)
+
+
+def gerar_metas(quantidade, semente=0, referencia=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Gera ``quantidade`` metas em DataFrames de até ``tamanho_bloco`` linhas.
+
+    As colunas são as de ``COLUNAS_IMPORTACAO``, com datas ISO. Para a mesma
+    semente, quantidade, data de referência e tamanho de bloco o resultado é
+    sempre o mesmo. ``referencia`` é o "hoje" usado para definir o status
+    (padrão: data atual).
+    """
+    rng = np.random.default_rng(semente)
+    hoje = np.datetime64(referencia or date.today(), "D")
+
+    total_funcionarios = max(1, quantidade // METAS_POR_FUNCIONARIO)
+    funcionarios = _nomes_funcionarios(total_funcionarios)
+    departamento_funcionario = rng.choice(len(DEPARTAMENTOS), size=total_funcionarios, p=PESOS_DEPARTAMENTOS)
+    departamentos = np.array(DEPARTAMENTOS, dtype=object)
+
+    gerados = 0
+    while gerados < quantidade:
+        n = min(tamanho_bloco, quantidade - gerados)
+        funcionario = rng.integers(0, total_funcionarios, size=n)
+        departamento = departamento_funcionario[funcionario]
+
+        inicio = hoje - rng.integers(0, JANELA_INICIO_DIAS, size=n).astype("timedelta64[D]")
+        duracao = rng.choice(DURACOES, size=n, p=PESOS_DURACOES) + rng.integers(-10, 11, size=n)
+        fim = inicio + duracao.astype("timedelta64[D]")
+        decorrido = np.clip((hoje - inicio).astype(int) / duracao, 0, 1)
+
+        vencida = fim < hoje
+        sorteio = rng.random(n)
+        status = np.where(
+            vencida,
+            np.select([sorteio < 0.60, sorteio < 0.85], ["Concluída", "Não Concluída"], "Atrasada"),
+            np.where(sorteio < 0.88, "Em Andamento", "Atrasada"),
+        )
+        progresso = np.select(
+            [status == "Concluída", status == "Em Andamento", status == "Atrasada"],
+            [
+                np.full(n, 100.0),
+                np.clip(decorrido * 100 + rng.normal(0, 15, size=n), 0, 99),
+                np.clip(decorrido * 100 * rng.uniform(0.3, 0.8, size=n), 0, 95),
+            ],
+            np.clip(rng.beta(2, 3, size=n) * 100, 0, 95),
+        ).astype(int)
+
+        modelo = rng.integers(0, 3, size=n)
+        numero = rng.integers(5, 41, size=n)
+        descricoes = [MODELOS_DESCRICAO[d][m].format(n=k) for d, m, k in zip(departamentos[departamento], modelo, numero)]
+
+        yield pd.DataFrame({
+            "employee_name": funcionarios[funcionario],
+            "department": departamentos[departamento],
+            "goal_description": descricoes,
+            "start_date": np.datetime_as_string(inicio),
+            "end_date": np.datetime_as_string(fim),
+            "status": status,
+            "progress": progresso,
+        }, columns=COLUNAS_IMPORTACAO)
+        gerados += n
+
+
+def popular_banco(gestor, quantidade, semente=0, referencia=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Insere ``quantidade`` metas sintéticas, uma transação por bloco; retorna as metas inseridas."""
+    inseridas = 0
+    for bloco in gerar_metas(quantidade, semente, referencia, tamanho_bloco):
+        inseridas += gestor.add_metas_lote(bloco.itertuples(index=False, name=None))
+    return inseridas
+
+
+def gerar_questionarios(quantidade, semente=0, referencia=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Gera ``quantidade`` questionários organizacionais em listas de até ``tamanho_bloco`` tuplas.
+
+    As tuplas seguem os parâmetros de ``GestorMetas.add_questionario``, com
+    datas nos ``JANELA_QUESTIONARIOS_DIAS`` dias até ``referencia``. As
+    opções de cada pergunta são sorteadas com peso maior para as primeiras.
+    """
+    rng = np.random.default_rng(semente)
+    hoje = np.datetime64(referencia or date.today(), "D")
+    departamentos = np.array(DEPARTAMENTOS, dtype=object)
+
+    gerados = 0
+    while gerados < quantidade:
+        n = min(tamanho_bloco, quantidade - gerados)
+        departamento = departamentos[rng.choice(len(DEPARTAMENTOS), size=n, p=PESOS_DEPARTAMENTOS)]
+        respostas = np.zeros(n, dtype=np.int64)
+        for i, (_pergunta, opcoes, _pontuam) in enumerate(QUESTOES_ORGANIZACIONAIS.values()):
+            pesos = np.arange(len(opcoes), 0, -1) / sum(range(1, len(opcoes) + 1))
+            respostas |= rng.choice(len(opcoes), size=n, p=pesos).astype(np.int64) << BITS_OPCAO * i
+        selecoes = [
+            ((rng.random((n, len(opcoes))) < CHANCE_SELECAO) << np.arange(len(opcoes))).sum(axis=1)
+            for opcoes in SELECOES_ORGANIZACIONAIS.values()
+        ]
+        datas = np.datetime_as_string(hoje - rng.integers(0, JANELA_QUESTIONARIOS_DIAS, size=n).astype("timedelta64[D]"))
+        yield [(d, int(r), int(o), int(a), None, dt) for d, r, o, a, dt in zip(departamento, respostas, *selecoes, datas)]
+        gerados += n
+
+
+def popular_questionarios(gestor, quantidade, semente=0, referencia=None, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """Insere ``quantidade`` questionários sintéticos, uma transação por bloco; retorna os inseridos."""
+    return sum(gestor.add_questionarios_lote(bloco)
+               for bloco in gerar_questionarios(quantidade, semente, referencia, tamanho_bloco))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preenche um banco com metas sintéticas.")
+    parser.add_argument("db", help="caminho do banco SQLite (criado se não existir)")
+    parser.add_argument("--metas", type=int, default=1000, help="número de metas a gerar (padrão: 1000)")
+    parser.add_argument("--semente", type=int, default=0, help="semente do gerador (padrão: 0)")
+    parser.add_argument("--referencia", type=date.fromisoformat, default=None,
+                        help="data de referência AAAA-MM-DD para o status (padrão: hoje)")
+    parser.add_argument("--questionarios", type=int, default=0,
+                        help="número de questionários organizacionais a gerar (padrão: 0)")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_PADRAO, help="metas por transação")
+    args = parser.parse_args(argv)
+
+    gestor = GestorMetas(args.db)
+    inicio = time.perf_counter()
+    inseridas = popular_banco(gestor, args.metas, args.semente, args.referencia, args.bloco)
+    segundos = time.perf_counter() - inicio
+    print(f"{inseridas} metas geradas em {args.db} em {segundos:.1f}s ({inseridas / segundos:.0f} metas/s)")
+    if args.questionarios:
+        inicio = time.perf_counter()
+        inseridos = popular_questionarios(gestor, args.questionarios, args.semente, args.referencia, args.bloco)
+        segundos = time.perf_counter() - inicio
+        print(f"{inseridos} questionários gerados em {segundos:.1f}s ({inseridos / segundos:.0f} questionários/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())